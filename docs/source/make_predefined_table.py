@@ -4,14 +4,15 @@ from __future__ import print_function
 import numbers
 
 import crcmod.predefined
+from crcmod.crcmod import _verifyPoly
 
 table_data = [
     [   "Name",            'name',     32,    ],
-    [   "Polynomial",      'poly',     22,    ],
+    [   "Polynomial",      'poly',     24,    ],
     [   "Reversed?",       'reverse',  10,    ],
-    [   "Init-value",      'init',     20,    ],
-    [   "XOR-out",         'xor_out',  20,    ],
-    [   "Check",           'check',    20,    ],
+    [   "Init-value",      'init',     24,    ],
+    [   "XOR-out",         'xor_out',  24,    ],
+    [   "Check",           'check',    24,    ],
 ]
 
 ccitt_defns = [
@@ -26,7 +27,7 @@ print('  '.join(("%-*s" % (table_data_item[2], table_data_item[0]) for table_dat
 print(column_dashes)
 
 for defn in crcmod.predefined._crc_definitions:
-    poly_width = crcmod.crcmod._verifyPoly(defn['poly'])
+    poly_width = _verifyPoly(defn['poly'])
     hex_width = (poly_width + 3) // 4
     defn_data_list = []
     for (header_text, key, width) in table_data:
@@ -38,6 +39,8 @@ for defn in crcmod.predefined._crc_definitions:
             item = "``%s``" % (defn[key])
             if defn['name'] in ccitt_defns:
                 item = ' '.join([item, '[#ccitt]_'])
+            if defn['reverse_out'] != defn['reverse']:
+                item = ' '.join([item, '[#refout]_'])
         item = "%-*s" % (width, item)
         defn_data_list.append(item)
     print('  '.join(defn_data_list).strip())
@@ -26,6 +26,8 @@
 # SOFTWARE.
 #-----------------------------------------------------------------------------
 
+import itertools
+
 def _get_buffer_view(in_obj):
     if isinstance(in_obj, str):
         raise TypeError('Unicode-objects must be encoded before calculating a CRC')
@@ -105,3 +107,122 @@ def _crc64r(data, crc, table):
         crc = table[x ^ (crc & 0xFF)] ^ (crc >> 8)
     return crc
 
+def _crc128(data, crc, table):
+    mv = _get_buffer_view(data)
+    crc = crc & 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF
+    for x in mv.tobytes():
+        crc = table[x ^ ((crc>>120) & 0xFF)] ^ ((crc << 8) & 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF00)
+    return crc
+
+def _crc128r(data, crc, table):
+    mv = _get_buffer_view(data)
+    crc = crc & 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF
+    for x in mv.tobytes():
+        crc = table[x ^ (crc & 0xFF)] ^ (crc >> 8)
+    return crc
+
+_kernels = {
+    ( 8, False) : _crc8,
+    ( 8, True)  : _crc8r,
+    (16, False) : _crc16,
+    (16, True)  : _crc16r,
+    (24, False) : _crc24,
+    (24, True)  : _crc24r,
+    (32, False) : _crc32,
+    (32, True)  : _crc32r,
+    (64, False) : _crc64,
+    (64, True)  : _crc64r,
+}
+
+# There is nothing to gain from interleaving the buffers in Python, so they
+# are processed one at a time.
+def _crcmulti(datas, crc, table, sizeBits, rev):
+    try:
+        fun = _kernels[(sizeBits, bool(rev))]
+    except KeyError:
+        raise ValueError('invalid CRC size')
+    return [fun(data, crc, table) for data in datas]
+
+# The equivalent of _weightScan in _crcfunext.c, used by crcmod.analysis.  Refer
+# to the C code for a description.
+def _weightScan(syndromes, weight, right):
+    if weight < 2 or right < 0 or right > 2 or right > weight - 2:
+        raise ValueError('invalid error weight')
+
+    s = list(syndromes)
+    n = len(s)
+    table = {}
+    total = 0
+    first = -1
+    for j in range(n - 1 - right, weight - right - 2, -1):
+        if right == 1:
+            parts = [(s[j+1], j+1)]
+        elif right == 2:
+            parts = [(s[j+1] ^ s[q], q) for q in range(j+2, n)]
+        else:
+            parts = []
+        for (key, last) in parts:
+            entry = table.setdefault(key, [0, last])
+            entry[0] += n - last
+            entry[1] = min(entry[1], last)
+
+        for bits in itertools.combinations(range(1, j), weight - right - 2):
+            key = s[0] ^ s[j]
+            for i in bits:
+                key ^= s[i]
+            if right == 0:
+                if key == 0:
+                    total += n - j
+                    first = j if first < 0 else min(first, j)
+            elif key in table:
+                (count, last) = table[key]
+                total += count
+                first = last if first < 0 else min(first, last)
+    return (total, first)
+
+# The equivalents of the GF(2) helpers in _crcfunext.c, used by crcmod.gf2.
+# Polynomials are passed as strings of bytes, least significant byte first.
+def _gf2mod(a, p):
+    n = p.bit_length() - 1
+    if n < 0:
+        raise ZeroDivisionError('polynomial division by zero')
+    while True:
+        shift = a.bit_length() - 1 - n
+        if shift < 0:
+            return a
+        a ^= p << shift
+
+def _gf2mul(a, b):
+    if a.bit_length() < b.bit_length():
+        (a, b) = (b, a)
+    r = 0
+    while b:
+        if b & 1:
+            r ^= a
+        a <<= 1
+        b >>= 1
+    return r
+
+def _gf2bytes(a, size):
+    return a.to_bytes(size, 'little')
+
+def _gf2clmul(a, b):
+    r = _gf2mul(int.from_bytes(a, 'little'), int.from_bytes(b, 'little'))
+    return _gf2bytes(r, len(a) + len(b))
+
+def _gf2mulmod(a, b, p):
+    p = int.from_bytes(p, 'little')
+    a = _gf2mod(int.from_bytes(a, 'little'), p)
+    b = _gf2mod(int.from_bytes(b, 'little'), p)
+    r = _gf2mod(_gf2mul(a, b), p)
+    return _gf2bytes(r, (p.bit_length() + 7) // 8)
+
+def _gf2powmod(a, e, p):
+    p = int.from_bytes(p, 'little')
+    a = _gf2mod(int.from_bytes(a, 'little'), p)
+    r = _gf2mod(1, p)
+    for bit in bin(int.from_bytes(e, 'little'))[2:]:
+        r = _gf2mod(_gf2mul(r, r), p)
+        if bit == '1':
+            r = _gf2mod(_gf2mul(r, a), p)
+    return _gf2bytes(r, (p.bit_length() + 7) // 8)
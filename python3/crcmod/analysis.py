@@ -0,0 +1,180 @@
+#-----------------------------------------------------------------------------
+# Copyright (c) 2010  Raymond L. Buvel
+# Copyright (c) 2010  Craig McQueen
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#-----------------------------------------------------------------------------
+'''
+crcmod.analysis measures how well a CRC polynomial detects bit errors, for
+choosing the polynomial of a new protocol.
+
+To use it, e.g.:
+    import crcmod.analysis
+
+    # The Hamming distance of CRC-32 for 1000 bits of data, and the number of
+    # undetected errors of each weight.
+    crcmod.analysis.hammingDistance(0x104C11DB7, 1000)
+    crcmod.analysis.weights(0x104C11DB7, 1000, maxWeight=5)
+
+    # The longest data for which each Hamming distance holds.
+    crcmod.analysis.hdLengths(0x104C11DB7, 3000, maxWeight=5)
+
+    # The best of a few polynomials for 100 bits of data.
+    crcmod.analysis.rank([0x104C11DB7, 0x11EDC6F41, 0x1741B8CD7], 100)
+
+The polynomials are given in the same form as to crcmod.mkCrcFun.  Lengths
+are numbers of data bits, not counting the CRC.  The Hamming distance (HD) is
+the smallest number of bit errors in the data and CRC together that can go
+undetected.
+
+The undetected errors of each weight are found by a meet-in-the-middle search
+over the syndromes of the bits of the codeword.  With the extension module,
+the search is done in C for polynomials of up to 64 bits.  Its time grows
+with the square of the length for errors of up to 5 bits, and with the cube
+for 6 bits.
+'''
+
+from array import array
+
+from crcmod.crcmod import _verifyPoly, _crcfun
+import crcmod._crcfunpy as _crcfunpy
+
+__all__ = [
+    'weights',
+    'hammingDistance',
+    'hdLengths',
+    'rank',
+]
+
+#-----------------------------------------------------------------------------
+def weights(poly, dataBits, maxWeight=6):
+    '''Return a list of the number of undetected errors of each weight.
+
+    poly -- The generator polynomial.
+
+    dataBits -- The number of data bits protected by the CRC.
+
+    maxWeight -- The largest number of bit errors to consider.
+
+    Element w of the list is the number of patterns of w bit errors in the
+    data and the CRC that are not detected.  Elements 0 and 1 are always zero.
+    '''
+    scan = _mkScan(poly, dataBits, maxWeight)
+    return [0, 0] + [scan(w)[0] for w in range(2, maxWeight+1)]
+
+def hammingDistance(poly, dataBits, maxWeight=6):
+    '''Return the Hamming distance of the CRC for the given number of data
+    bits, or None if every error of up to maxWeight bits is detected.
+    '''
+    scan = _mkScan(poly, dataBits, maxWeight)
+    for w in range(2, maxWeight+1):
+        if scan(w)[0]:
+            return w
+    return None
+
+def hdLengths(poly, maxDataBits, maxWeight=6):
+    '''Return a dictionary mapping each Hamming distance the CRC has for data
+    of up to maxDataBits bits to the largest number of data bits with that
+    Hamming distance.
+
+    The key maxWeight+1 stands for the lengths where every error of up to
+    maxWeight bits is detected, so the Hamming distance is at least that.
+    '''
+    n = _verifyPoly(poly)
+    scan = _mkScan(poly, maxDataBits, maxWeight)
+
+    # The number of data bits from which errors of each weight go undetected.
+    first = {}
+    for w in range(2, maxWeight+1):
+        last = scan(w)[1]
+        if last >= 0:
+            first[w] = last + 1 - n
+
+    # Errors of w bits are the first to go undetected from first[w] data bits
+    # up to the limit where a lighter error does.
+    lengths = {}
+    limit = maxDataBits
+    for w in range(2, maxWeight+1):
+        if w in first and first[w] <= limit:
+            lengths[w] = limit
+            limit = first[w] - 1
+    if limit > 0:
+        lengths[maxWeight+1] = limit
+    return lengths
+
+def rank(polys, dataBits, maxWeight=6):
+    '''Return a list of (poly, hd, undetected) tuples for the polynomials,
+    best first.
+
+    hd is the Hamming distance for the given number of data bits, or None if
+    every error of up to maxWeight bits is detected.  undetected is the number
+    of undetected errors of hd bits.  The polynomials are ranked by the
+    Hamming distance, and then by the number of undetected errors.
+    '''
+    results = []
+    for poly in polys:
+        scan = _mkScan(poly, dataBits, maxWeight)
+        (hd, undetected) = (None, 0)
+        for w in range(2, maxWeight+1):
+            undetected = scan(w)[0]
+            if undetected:
+                hd = w
+                break
+        results.append((poly, hd, undetected))
+
+    results.sort(key=lambda result: (-(result[1] or maxWeight+1), result[2]))
+    return results
+
+#-----------------------------------------------------------------------------
+# Return a function that searches for the undetected errors of a given weight
+# in a codeword of dataBits data bits and the CRC.  It returns the number of
+# errors and the last bit of the shortest codeword with such an error, or -1.
+# The syndrome of bit i is x^i modulo the polynomial.
+
+def _mkScan(poly, dataBits, maxWeight):
+    n = _verifyPoly(poly)
+    if dataBits < 0:
+        raise ValueError('The number of data bits must not be negative')
+    if maxWeight < 2:
+        raise ValueError('The error weight must be at least 2')
+
+    syndromes = []
+    s = 1
+    for i in range(dataBits + n):
+        syndromes.append(s)
+        s = s << 1
+        if s >> n:
+            s = s ^ poly
+
+    if n <= 64:
+        syndromes = array('Q', syndromes)
+        weightScan = _crcfun._weightScan
+    else:
+        weightScan = _crcfunpy._weightScan
+
+    # A polynomial with a factor of (x+1) detects every odd number of errors.
+    even = bin(poly).count('1') % 2 == 0
+
+    def scan(weight):
+        if even and weight % 2:
+            return (0, -1)
+        # Up to two bits in the right part keeps the table to the square of
+        # the length.
+        return weightScan(syndromes, weight, min(2, (weight-1)//2))
+    return scan
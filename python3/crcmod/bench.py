@@ -0,0 +1,286 @@
+#-----------------------------------------------------------------------------
+# Copyright (c) 2010  Raymond L. Buvel
+# Copyright (c) 2010  Craig McQueen
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#-----------------------------------------------------------------------------
+'''
+crcmod.bench measures the speed of crcmod, so that performance regressions
+can be caught before an upgrade is rolled out.
+
+To use it, e.g.:
+    python -m crcmod.bench --output results.json
+
+The following are measured, and written out as JSON.
+
+kernels -- The time per call and the throughput of each low level CRC
+function, in the extension module and in the Python implementation, for data
+from 1 byte up to --max-size bytes.  The Python implementation is only run up
+to --python-max-size bytes, since it takes minutes on the larger sizes.
+
+crc -- The time per call of the Crc methods update, digest, new and copy.
+
+tables -- The time to build the table for a CRC of each kernel size.
+
+stdlib -- CRC-32 and XMODEM (CRC-CCITT) computed by crcmod side by side with
+zlib.crc32, binascii.crc32 and binascii.crc_hqx on the same data.  crcmod is
+measured through mkCrcFun and through the kernel alone, since mkCrcFun hands
+these algorithms to binascii where that is the faster.  The ratio is the time
+relative to the crcmod kernel, so a ratio below 1 is faster than crcmod.  The
+peak memory allocated by a call and the number of memory blocks left allocated
+after 100 calls are found with tracemalloc, for data of up to 1 MiB.  They are
+null for the larger sizes, which would take minutes and show nothing more.
+
+Each time is the best of --repeat runs, each of which makes enough calls to
+take at least --min-time seconds.  The data is 1 GiB at the largest size by
+default, so that much memory must be available.
+'''
+
+import argparse
+import binascii
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+
+try:
+    import zlib
+except ImportError:
+    zlib = None
+
+import crcmod._crcfunpy as _crcfunpy
+from crcmod.crcmod import Crc, mkCrcFun, _usingExtension, _crcfun, _getTable
+from crcmod.crcmod import _mkTable, _mkTable_r, _packTable, _tableView
+
+__all__ = [
+    'run',
+    'main',
+]
+
+# A polynomial for each of the kernel sizes.
+_polys = {
+      8 : 0x107,
+     16 : 0x11021,
+     24 : 0x1864CFB,
+     32 : 0x104C11DB7,
+     64 : 0x142F0E1EBA9EA3693,
+    128 : (1<<128) | 0x87,
+}
+
+_sizes = [1 << (4*i) for i in range(8)] + [1 << 30]
+
+# The largest data for which the memory allocated by the stdlib comparison is
+# measured.
+_allocationMaxSize = 1 << 20
+
+#-----------------------------------------------------------------------------
+def run(maxSize=1<<30, pythonMaxSize=1<<20, minTime=0.1, repeat=3):
+    '''Run the benchmarks and return the results as a dictionary.
+
+    The parameters have the same meaning as the command line options.
+    '''
+    backends = [('_crcfunpy', _crcfunpy, pythonMaxSize)]
+    if _usingExtension:
+        import crcmod._crcfunext as _crcfunext
+        backends.insert(0, ('_crcfunext', _crcfunext, maxSize))
+
+    def measure(fun):
+        return _measure(fun, minTime, repeat)
+
+    results = {
+        'python' : sys.version,
+        'platform' : platform.platform(),
+        'extension' : _usingExtension,
+        'minTime' : minTime,
+        'repeat' : repeat,
+    }
+
+    kernels = []
+    sizes = [size for size in _sizes if size <= max(maxSize, pythonMaxSize)]
+    pattern = bytes(range(256))
+    for size in sizes:
+        data = pattern * (size // 256) + pattern[:size % 256]
+        for (backendName, backend, backendMaxSize) in backends:
+            if size > backendMaxSize:
+                continue
+            for (kernelBits, rev, tableList) in _tables():
+                name = '_crc%d%s' % (kernelBits, 'r' if rev else '')
+                fun = getattr(backend, name)
+                table = _packTable(tableList, kernelBits)
+                if backend is _crcfunpy:
+                    table = _tableView(table, kernelBits)
+                seconds = measure(lambda: fun(data, 0, table))
+                kernels.append({
+                    'backend' : backendName,
+                    'kernel' : name,
+                    'size' : size,
+                    'seconds' : seconds,
+                    'bytesPerSecond' : size / seconds,
+                })
+        del data
+    results['kernels'] = kernels
+
+    crc = Crc(_polys[32], initCrc=0, xorOut=0xFFFFFFFF)
+    crc.update(b'123456789')
+    msg = bytes(16)
+    results['crc'] = [
+        {'operation' : 'update', 'size' : len(msg), 'seconds' : measure(lambda: crc.update(msg))},
+        {'operation' : 'digest', 'seconds' : measure(crc.digest)},
+        {'operation' : 'new', 'seconds' : measure(crc.new)},
+        {'operation' : 'copy', 'seconds' : measure(crc.copy)},
+    ]
+
+    tables = []
+    for (kernelBits, rev) in [(n, rev) for n in sorted(_polys) for rev in (False, True)]:
+        poly = _polys[kernelBits]
+        mkTable = _mkTable_r if rev else _mkTable
+        tables.append({
+            'sizeBits' : kernelBits,
+            'rev' : rev,
+            'seconds' : measure(lambda: mkTable(poly, kernelBits)),
+        })
+    results['tables'] = tables
+
+    results['stdlib'] = _stdlib([size for size in _sizes if size <= maxSize], measure)
+
+    return results
+
+def main(argv=None):
+    '''Run the benchmarks from the command line.'''
+    parser = argparse.ArgumentParser(prog='python -m crcmod.bench',
+                                     description='Measure the speed of crcmod.')
+    parser.add_argument('--max-size', type=int, default=1<<30,
+                        help='largest data size in bytes (default: 1 GiB)')
+    parser.add_argument('--python-max-size', type=int, default=1<<20,
+                        help='largest data size for the Python implementation (default: 1 MiB)')
+    parser.add_argument('--min-time', type=float, default=0.1,
+                        help='least time in seconds of each run (default: 0.1)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of runs, of which the best is kept (default: 3)')
+    parser.add_argument('--output', default=None,
+                        help='file to write the JSON results to (default: standard output)')
+    args = parser.parse_args(argv)
+
+    results = run(args.max_size, args.python_max_size, args.min_time, args.repeat)
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+#-----------------------------------------------------------------------------
+# Return a list of (kernelBits, rev, table) for each of the low level functions.
+
+def _tables():
+    tables = []
+    for kernelBits in sorted(_polys):
+        poly = _polys[kernelBits]
+        tables.append((kernelBits, False, _mkTable(poly, kernelBits)))
+        tables.append((kernelBits, True, _mkTable_r(poly, kernelBits)))
+    return tables
+
+# Compare crcmod with the CRC functions of the standard library.
+
+def _stdlib(sizes, measure):
+    # The extension module takes the packed table, the Python kernels a view.
+    packed = 1 if _usingExtension else 0
+    crc32Table = _getTable(_polys[32], 32, True)[packed]
+    xmodemTable = _getTable(_polys[16], 16, False)[packed]
+    algorithms = [
+        ('crc-32', [
+            ('crcmod', mkCrcFun(_polys[32], initCrc=0, xorOut=0xFFFFFFFF)),
+            ('crcmod kernel', lambda data: 0xFFFFFFFF ^ _crcfun._crc32r(data, 0xFFFFFFFF, crc32Table)),
+            ('zlib.crc32', zlib and zlib.crc32),
+            ('binascii.crc32', binascii.crc32),
+        ]),
+        ('xmodem', [
+            ('crcmod', mkCrcFun(_polys[16], initCrc=0, rev=False)),
+            ('crcmod kernel', lambda data: _crcfun._crc16(data, 0, xmodemTable)),
+            ('binascii.crc_hqx', lambda data: binascii.crc_hqx(data, 0)),
+        ]),
+    ]
+
+    results = []
+    pattern = bytes(range(256))
+    for size in sizes:
+        data = pattern * (size // 256) + pattern[:size % 256]
+        for (algorithm, funs) in algorithms:
+            expected = funs[0][1](data)
+            entries = []
+            for (name, fun) in funs:
+                if fun is None:
+                    continue
+                (peakBytes, retainedBlocks) = (None, None)
+                if size <= _allocationMaxSize:
+                    (peakBytes, retainedBlocks) = _allocations(lambda: fun(data))
+                entries.append({
+                    'algorithm' : algorithm,
+                    'function' : name,
+                    'size' : size,
+                    'seconds' : measure(lambda: fun(data)),
+                    'peakBytes' : peakBytes,
+                    'retainedBlocks' : retainedBlocks,
+                    'matches' : fun(data) == expected,
+                })
+            kernelSeconds = entries[1]['seconds']
+            for entry in entries:
+                entry['bytesPerSecond'] = size / entry['seconds']
+                entry['ratio'] = entry['seconds'] / kernelSeconds
+            results.extend(entries)
+        del data
+    return results
+
+# Return the peak memory allocated by a call of fun, and the number of memory
+# blocks that are still allocated after 100 calls.
+def _allocations(fun, calls=100):
+    fun()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        (current, peak) = tracemalloc.get_traced_memory()
+        for i in range(calls):
+            fun()
+        peakBytes = tracemalloc.get_traced_memory()[1] - current
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    after = after.filter_traces(ignore)
+    before = before.filter_traces(ignore)
+    retainedBlocks = sum([stat.count_diff for stat in after.compare_to(before, 'lineno')])
+    return (peakBytes, retainedBlocks)
+
+# Return the best time per call of fun, out of repeat runs which each make
+# enough calls to take at least minTime seconds.
+def _measure(fun, minTime, repeat):
+    timer = timeit.Timer(fun)
+    number = 1
+    while True:
+        seconds = timer.timeit(number)
+        if seconds >= minTime:
+            break
+        number *= max(2, min(10, int(1.2*minTime/max(seconds, 1e-9))))
+    best = min([seconds] + timer.repeat(repeat-1, number))
+    return best / number
+
+if __name__ == '__main__':
+    main()
@@ -21,7 +21,7 @@
 # SOFTWARE.
 #-----------------------------------------------------------------------------
 '''crcmod is a Python module for gererating objects that compute the Cyclic
-Redundancy Check.  Any 8, 16, 24, 32, or 64 bit polynomial can be used.  
+Redundancy Check.  Any polynomial of degree 1 to 128 can be used.
 
 The following are the public components of this module.
 
@@ -30,12 +30,20 @@ algorithms in the hashlib module in the Python standard library.  These
 instances also provide a method for generating a C/C++ function to compute
 the CRC.
 
+CrcAlgorithm -- the parameters, table and function of a CRC algorithm, shared
+by the Crc instances using it.
+
 mkCrcFun -- create a Python function to compute the CRC using the specified
 polynomial and initial value.  This provides a much simpler interface if
 all you need is a function for CRC calculation.
+
+forge -- change a field of some data so that its CRC has a given value.
+
+backends, useBackend -- list and force the implementations used to compute the
+CRC.
 '''
 
-__all__ = '''mkCrcFun Crc
+__all__ = '''mkCrcFun Crc CrcAlgorithm forge backends useBackend
 '''.split()
 
 # Select the appropriate set of low-level CRC functions for this installation.
@@ -48,7 +56,118 @@ except ImportError:
     import crcmod._crcfunpy as _crcfun
     _usingExtension = False
 
-import sys, struct
+import crcmod._crcfunpy as _crcfunpy
+
+# crcmod.gf2, binascii and collections.abc are imported on first use, to keep
+# them out of the time taken to import crcmod.
+import os, sys, struct, functools, contextvars
+
+#-----------------------------------------------------------------------------
+class CrcAlgorithm:
+    '''The parameters, table and function of a CRC algorithm.
+
+    A CrcAlgorithm is immutable, and is shared by all of the Crc instances
+    using the algorithm, which only hold their current CRC value.  Crc
+    instances made with the same parameters share the same CrcAlgorithm.
+
+    The parameters are the same as those of Crc.  They are available as the
+    attributes poly, initCrc, reverse, reverseOut and xorOut, along with
+    digest_size, table, a read-only sequence of the entries of the CRC table,
+    crcfun, the function computing the CRC as returned by mkCrcFun, backend
+    and name.
+    '''
+    __slots__ = ('poly', 'initCrc', 'reverse', 'reverseOut', 'xorOut',
+                 'digest_size', 'table', 'crcfun', '_name')
+
+    def __init__(self, poly, initCrc=~0, rev=True, xorOut=0, revOut=None):
+        (sizeBits, initCrc, xorOut) = _verifyParams(poly, initCrc, xorOut)
+        if revOut is None:
+            revOut = rev
+        (crcfun, table) = _mkCrcFun(poly, sizeBits, initCrc, rev, xorOut, revOut)
+        self._set(poly=poly, initCrc=initCrc, reverse=rev, reverseOut=revOut,
+                  xorOut=xorOut, digest_size=(sizeBits+7)//8, table=table,
+                  crcfun=crcfun)
+
+    def _set(self, **attributes):
+        for (name, value) in attributes.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('CrcAlgorithm objects are immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('CrcAlgorithm objects are immutable')
+
+    @property
+    def backend(self):
+        '''The name of the backend computing the CRC.  Refer to
+        crcmod.backends.
+        '''
+        return self.crcfun.backend
+
+    @property
+    def name(self):
+        '''The name of the algorithm, as for the hashlib objects.  This is the
+        name in crcmod.predefined, or 'crc-' followed by the polynomial in hex
+        for an algorithm that is not predefined.
+        '''
+        # Looked up on first use and kept, since crcmod.predefined imports
+        # this module.
+        try:
+            return self._name
+        except AttributeError:
+            pass
+        from crcmod.predefined import findPredefinedName
+        name = findPredefinedName(self.poly, self.initCrc, self.reverse,
+                                  self.xorOut, self.reverseOut)
+        self._set(_name=name or 'crc-0x%X' % self.poly)
+        return self._name
+
+    def new(self, arg=None):
+        '''Return a new Crc instance using this algorithm.  If a string is
+        provided in the optional arg parameter, it is passed to the update
+        method.
+        '''
+        n = Crc(poly=None, initialize=False)
+        n.algorithm = self
+        n.crcValue = self.initCrc
+        if arg is not None:
+            n.update(arg)
+        return n
+
+    def _withFun(self, crcfun):
+        # Return a copy of the algorithm computing the CRC with another
+        # function, for crcmod.jit and crcmod.stats.
+        n = object.__new__(CrcAlgorithm)
+        n._set(**dict([(name, getattr(self, name)) for name in CrcAlgorithm.__slots__
+                       if hasattr(self, name)]))
+        n._set(crcfun=crcfun)
+        return n
+
+# The size of the buffer that Crc.updateFile reads into, as in
+# hashlib.file_digest.
+_fileBufferSize = 2**18
+
+# The version of the tuple returned by Crc.getstate.  It changes whenever the
+# layout does, so that old states are rejected rather than misread.
+_stateVersion = 1
+
+# Restore a pickled Crc instance.
+def _restoreCrc(cls, state):
+    return cls.fromstate(state)[0]
+
+# Crc instances made with the same parameters share a CrcAlgorithm.  The
+# backend that is forced is part of the key.
+@functools.lru_cache(maxsize=128)
+def _getAlgorithm(poly, initCrc, rev, xorOut, revOut, backend):
+    return CrcAlgorithm(poly, initCrc, rev, xorOut, revOut)
+
+def _findAlgorithm(poly, initCrc, rev, xorOut, revOut):
+    (sizeBits, initCrc, xorOut) = _verifyParams(poly, initCrc, xorOut)
+    if revOut is None:
+        revOut = rev
+    return _getAlgorithm(poly, initCrc, bool(rev), xorOut, bool(revOut),
+                         _backend.get())
 
 #-----------------------------------------------------------------------------
 class Crc:
@@ -71,7 +190,8 @@ class Crc:
     poly -- The generator polynomial to use in calculating the CRC.  The value
     is specified as a Python integer.  The bits in this integer are the
     coefficients of the polynomial.  The only polynomials allowed are those
-    that generate 8, 16, 24, 32, or 64 bit CRCs.
+    that generate 1 to 128 bit CRCs.  The digest_size attribute is the number of
+    bits rounded up to whole bytes.
 
     initCrc -- Initial value used to start the CRC calculation.  This initial
     value should be the initial shift register value XORed with the final XOR
@@ -85,37 +205,105 @@ class Crc:
 
     xorOut -- Final value to XOR with the calculated CRC value.  Used by some
     CRC algorithms.  Defaults to zero.
+
+    revOut -- A flag that selects a bit reversed CRC value when True, for the
+    few algorithms that reflect the result differently from the data.  The
+    initCrc and xorOut values apply to the CRC value as returned.  Defaults to
+    None, which means the same as rev.
+
+    An instance only holds its current CRC value, in the crcValue attribute,
+    and the shared CrcAlgorithm, in the algorithm attribute.  The parameters
+    are read-only attributes taken from the algorithm.
+
+    An instance is meant to be used by one thread at a time: update does not
+    lock it, so concurrent updates of the same instance can lose data.  Give
+    each thread its own instance with new or copy.  The algorithm, its table
+    and the CRC functions can be shared freely, and the extension module
+    releases the GIL for large buffers.
     '''
-    def __init__(self, poly, initCrc=~0, rev=True, xorOut=0, initialize=True):
+    __slots__ = ('algorithm', 'crcValue')
+
+    # The CRC is computed a byte at a time.  This is the block_size of the
+    # hashlib objects.
+    block_size = 1
+
+    def __init__(self, poly, initCrc=~0, rev=True, xorOut=0, initialize=True,
+                 revOut=None):
         if not initialize:
             # Don't want to perform the initialization when using new or copy
             # to create a new instance.
             return
 
-        (sizeBits, initCrc, xorOut) = _verifyParams(poly, initCrc, xorOut)
-        self.digest_size = sizeBits//8
-        self.initCrc = initCrc
-        self.xorOut = xorOut
-
-        self.poly = poly
-        self.reverse = rev
-
-        (crcfun, table) = _mkCrcFun(poly, sizeBits, initCrc, rev, xorOut)
-        self._crc = crcfun
-        self.table = table
+        self.algorithm = _findAlgorithm(poly, initCrc, rev, xorOut, revOut)
+        self.crcValue = self.algorithm.initCrc
+
+    # The parameters are those of the algorithm, which is shared.
+
+    @property
+    def poly(self):
+        '''The generator polynomial.'''
+        return self.algorithm.poly
+
+    @property
+    def initCrc(self):
+        '''The initial CRC value.'''
+        return self.algorithm.initCrc
+
+    @property
+    def reverse(self):
+        '''True if the algorithm is bit reversed.'''
+        return self.algorithm.reverse
+
+    @property
+    def reverseOut(self):
+        '''True if the CRC value is bit reversed.'''
+        return self.algorithm.reverseOut
+
+    @property
+    def xorOut(self):
+        '''The final XOR value.'''
+        return self.algorithm.xorOut
+
+    @property
+    def digest_size(self):
+        '''The size of the CRC value in bytes.'''
+        return self.algorithm.digest_size
+
+    @property
+    def table(self):
+        '''A read-only sequence of the entries of the CRC table.'''
+        return self.algorithm.table
+
+    @property
+    def name(self):
+        '''The name of the algorithm, as for the hashlib objects.  Refer to
+        CrcAlgorithm.name.
+        '''
+        return self.algorithm.name
 
-        self.crcValue = self.initCrc
+    @property
+    def _crc(self):
+        return self.algorithm.crcfun
 
     def __str__(self):
         lst = []
         lst.append('poly = 0x%X' % self.poly)
         lst.append('reverse = %s' % self.reverse)
+        if self.reverseOut != self.reverse:
+            lst.append('reverseOut = %s' % self.reverseOut)
         fmt = '0x%%0%dX' % (self.digest_size*2)
         lst.append('initCrc  = %s' % (fmt % self.initCrc))
         lst.append('xorOut   = %s' % (fmt % self.xorOut))
         lst.append('crcValue = %s' % (fmt % self.crcValue))
         return '\n'.join(lst)
 
+    @property
+    def backend(self):
+        '''The name of the backend computing the CRC.  Refer to
+        crcmod.backends.
+        '''
+        return self.algorithm.crcfun.backend
+
     def new(self, arg=None):
         '''Create a new instance of the Crc class initialized to the same
         values as the original instance.  The current CRC is set to the initial
@@ -123,18 +311,17 @@ class Crc:
         passed to the update method.
         '''
         n = Crc(poly=None, initialize=False)
-        n._crc = self._crc
-        n.digest_size = self.digest_size
-        n.initCrc = self.initCrc
-        n.xorOut = self.xorOut
-        n.table = self.table
-        n.crcValue = self.initCrc
-        n.reverse = self.reverse
-        n.poly = self.poly
+        n._initFrom(self)
         if arg is not None:
             n.update(arg)
         return n
 
+    def _initFrom(self, other):
+        # Share the algorithm of another instance so that no table needs to be
+        # built.  The current CRC is set to the initial value.
+        self.algorithm = other.algorithm
+        self.crcValue = other.algorithm.initCrc
+
     def copy(self):
         '''Create a new instance of the Crc class initialized to the same
         values as the original instance.  The current CRC is set to the current
@@ -145,41 +332,246 @@ class Crc:
         c.crcValue = self.crcValue
         return c
 
+    def getstate(self, length=None):
+        '''Return the state of the calculation as a tuple that can be stored
+        and passed to Crc.fromstate to continue the calculation later, e.g.
+        after a restart.
+
+        length -- An optional count of the data processed so far, such as the
+        offset to resume reading from, which is kept with the state and given
+        back by fromstate.  Crc instances do not count the data themselves.
+
+        The tuple is (version, poly, initCrc, reverse, xorOut, reverseOut,
+        crcValue, length), where version identifies the layout of the state.
+        It holds no table: the table is found in the cache, or built again,
+        when the state is restored.
+        '''
+        a = self.algorithm
+        return (_stateVersion, a.poly, a.initCrc, a.reverse, a.xorOut,
+                a.reverseOut, self.crcValue, length)
+
+    @classmethod
+    def fromstate(cls, state):
+        '''Return a tuple (crc, length) of a new instance continuing the
+        calculation saved by getstate, and the length saved with it.
+
+        A ValueError is raised if the state has a version that this release
+        does not know.  The backend is chosen again, so an instance made by
+        crcmod.jit or crcmod.stats is restored as an ordinary one.
+        '''
+        if not state or state[0] != _stateVersion:
+            raise ValueError('Unknown CRC state version %r' % (state[:1] or None,))
+        (version, poly, initCrc, rev, xorOut, revOut, crcValue, length) = state
+        n = cls.__new__(cls)
+        n.algorithm = _findAlgorithm(poly, initCrc, rev, xorOut, revOut)
+        if crcValue < 0 or crcValue.bit_length() > _verifyPoly(poly):
+            raise ValueError('The CRC value does not fit the polynomial')
+        n.crcValue = crcValue
+        return (n, length)
+
+    def __reduce__(self):
+        # Pickle the state rather than the algorithm, which holds the table and
+        # a function that cannot be pickled.
+        return (_restoreCrc, (self.__class__, self.getstate()))
+
     def update(self, data):
         '''Update the current CRC value using the string specified as the data
         parameter.
         '''
-        self.crcValue = self._crc(data, self.crcValue)
+        self.crcValue = self.algorithm.crcfun(data, self.crcValue)
+
+    def updateFile(self, fileobj):
+        '''Update the current CRC value with the rest of the data of a binary
+        file object, and return the number of bytes read.
+
+        The data is read into a reused buffer with readinto, in the same way as
+        hashlib.file_digest, so no bytes objects are made.  Objects with a
+        getbuffer method, such as io.BytesIO, are used without reading.
+        '''
+        if hasattr(fileobj, 'getbuffer'):
+            start = fileobj.tell()
+            with fileobj.getbuffer() as view, view[start:] as rest:
+                self.update(rest)
+                count = len(rest)
+            fileobj.seek(0, os.SEEK_END)
+            return count
+
+        crcfun = self.algorithm.crcfun
+        crc = self.crcValue
+        buf = bytearray(_fileBufferSize)
+        view = memoryview(buf)
+        count = 0
+        try:
+            while True:
+                size = fileobj.readinto(buf)
+                if size is None:
+                    raise BlockingIOError('I/O operation would block')
+                if size == 0:
+                    break
+                crc = crcfun(view[:size], crc)
+                count = count + size
+        finally:
+            self.crcValue = crc
+        return count
+
+    def updateBits(self, data, nbits, offset=0):
+        '''Update the current CRC value using nbits bits of the data, starting
+        at bit number offset.  The bits are numbered in the order in which the
+        algorithm processes them: starting from the least significant bit of
+        each byte for the bit reversed algorithms, and from the most
+        significant bit otherwise.
+
+        The whole bytes are passed to the table driven function used by the
+        update method.  A partial byte at either end only costs one more table
+        lookup.
+        '''
+        mv = memoryview(data).cast('B')
+        if nbits < 0 or offset < 0 or offset + nbits > 8*len(mv):
+            raise ValueError('The bits must lie within the data')
 
-    def digest(self):
+        crc = self.crcValue
+        first = offset // 8
+        skip = offset % 8
+        if skip and nbits:
+            n = min(nbits, 8 - skip)
+            if self.reverse:
+                crc = self._crcBits(crc, mv[first] >> skip, n)
+            else:
+                crc = self._crcBits(crc, (mv[first] << skip) & 0xFF, n)
+            nbits -= n
+            first += 1
+
+        last = first + nbits//8
+        if last > first:
+            crc = self._crc(mv[first:last], crc)
+
+        if nbits % 8:
+            crc = self._crcBits(crc, mv[last], nbits % 8)
+
+        self.crcValue = crc
+
+    def _crcBits(self, crc, byte, nbits):
+        # Process the first nbits (less than 8) bits of the byte.  The table
+        # entry for a byte whose first 8-nbits bits are zero is the effect of
+        # the remaining bits, so the partial byte is a single lookup on the
+        # shift register.
+        width = self.poly.bit_length() - 1
+        sizeBits = _kernelSize(width)
+        reflect = self.reverseOut != self.reverse
+
+        reg = crc ^ self.xorOut
+        if reflect:
+            reg = _mkReflect(width)(reg)
+        if self.reverse:
+            reg = reg & ((1<<width) - 1)
+            index = ((reg ^ byte) & ((1<<nbits) - 1)) << (8 - nbits)
+            reg = self.table[index] ^ (reg >> nbits)
+        else:
+            mask = (1<<sizeBits) - 1
+            reg = (reg << (sizeBits - width)) & mask
+            index = (((reg >> (sizeBits - 8)) ^ byte) & 0xFF) >> (8 - nbits)
+            reg = (self.table[index] ^ (reg << nbits)) & mask
+            reg = reg >> (sizeBits - width)
+        if reflect:
+            reg = _mkReflect(width)(reg)
+        return reg ^ self.xorOut
+
+    def correct(self, data, receivedCrc, maxBits=1):
+        '''Return a copy of data with the bit errors located by receivedCrc
+        corrected.
+
+        data -- The data as received.  It follows the data that has been passed
+        to the update method, if any.
+
+        receivedCrc -- The CRC value that was received with the data.
+
+        maxBits -- The number of bit errors to correct, 1 or 2.
+
+        The errors may also be in receivedCrc, in which case the data is
+        returned unchanged.  ValueError is raised if the errors cannot be
+        located unambiguously.  That happens when there are more errors than
+        maxBits that do not happen to look like fewer, or when the data is too
+        long for the polynomial to tell the positions apart.
+
+        The syndrome of each bit position is looked up in an index that is
+        built once for each length of data.  The most recently used indexes are
+        kept.
+        '''
+        if maxBits not in (1, 2):
+            raise ValueError('Only 1 or 2 bit errors can be corrected')
+
+        mv = memoryview(data).cast('B')
+        nbits = 8*len(mv)
+        syndrome = self._crc(mv, self.crcValue) ^ receivedCrc
+        if syndrome == 0:
+            return mv.tobytes()
+
+        index = _syndromeIndex(self.poly, self.reverseOut, nbits)
+        if syndrome in index:
+            positions = [index[syndrome]]
+        elif maxBits == 2:
+            # Each pair of positions whose syndromes add up is found twice.
+            pairs = [(a, index[syndrome ^ s]) for (s, a) in index.items()
+                     if (syndrome ^ s) in index]
+            positions = list(pairs[0]) if len(pairs) == 2 else [None]
+        else:
+            positions = [None]
+        if None in positions:
+            raise ValueError('The errors cannot be located')
+
+        result = bytearray(mv)
+        for k in positions:
+            if k < nbits:
+                if self.reverse:
+                    result[k//8] ^= 1 << (k%8)
+                else:
+                    result[k//8] ^= 0x80 >> (k%8)
+        return bytes(result)
+
+    def digest(self, byteorder='big'):
         '''Return the current CRC value as a string of bytes.  The length of
         this string is specified in the digest_size attribute.
+
+        byteorder -- 'big' for the most significant byte first, or 'little'
+        for the least significant byte first, as in the CRC-16/MODBUS trailer.
         '''
-        n = self.digest_size
-        crc = self.crcValue
-        lst = []
-        while n > 0:
-            lst.append(crc & 0xFF)
-            crc = crc >> 8
-            n -= 1
-        lst.reverse()
-        return bytes(lst)
-
-    def hexdigest(self):
+        return self.crcValue.to_bytes(self.digest_size, byteorder)
+
+    def hexdigest(self, byteorder='big'):
         '''Return the current CRC value as a string of hex digits.  The length
-        of this string is twice the digest_size attribute.
+        of this string is twice the digest_size attribute.  The byte order is
+        the same as for digest.
+        '''
+        if byteorder == 'big':
+            return '%0*X' % (2*self.digest_size, self.crcValue)
+        return self.digest(byteorder).hex().upper()
+
+    def intdigest(self):
+        '''Return the current CRC value as an integer.  This is the same as
+        the crcValue attribute.
+        '''
+        return self.crcValue
+
+    def digestInto(self, buf, offset=0, byteorder='big'):
+        '''Write the current CRC value into a writable buffer without creating
+        a string, and return the number of bytes written, digest_size.
+
+        buf -- An object supporting the writable buffer interface, such as a
+        bytearray holding a frame that the CRC is appended to.
+
+        offset -- The position in buf to write the CRC value.
+
+        byteorder -- The byte order, as for digest.
         '''
         n = self.digest_size
-        crc = self.crcValue
-        lst = []
-        while n > 0:
-            lst.append('%02X' % (crc & 0xFF))
-            crc = crc >> 8
-            n -= 1
-        lst.reverse()
-        return ''.join(lst)
-
-    def generateCode(self, functionName, out, dataType=None, crcType=None):
+        mv = memoryview(buf).cast('B')
+        if offset < 0 or offset + n > len(mv):
+            raise ValueError('The CRC value does not fit in the buffer')
+        mv[offset:offset+n] = self.crcValue.to_bytes(n, byteorder)
+        return n
+
+    def generateCode(self, functionName, out, dataType=None, crcType=None,
+                     table='byte', unroll=1, streaming=False, align=None):
         '''Generate a C/C++ function.
 
         functionName -- String specifying the name of the function.
@@ -191,19 +583,73 @@ class Crc:
         data to the function.  Defaults to UINT8.
 
         crcType -- An optional parameter specifying the data type of the CRC
-        value.  Defaults to one of UINT8, UINT16, UINT32, or UINT64 depending
-        on the size of the CRC value.
+        value.  Defaults to one of UINT8, UINT16, UINT32, UINT64 or UINT128
+        depending on the size of the CRC value.  UINT128 must be defined as a
+        128-bit unsigned type, such as unsigned __int128 with GCC or Clang.
+        The non-reflected algorithms narrower than this type shift the CRC to
+        the high order bits on entry and back on exit, so the tables hold
+        shifted values.
+
+        table -- An optional parameter selecting the lookup tables used by the
+        generated code, trading memory against speed.  Defaults to 'byte'.
+
+            'bitwise'   No table.  Eight shift/XOR steps per byte.
+            'nibble'    A 16 entry table used four bits at a time.
+            'byte'      A 256 entry table used one byte at a time.
+            'slice4'    4, 8 or 16 tables of 256 entries used to process that
+            'slice8'    many bytes per loop iteration (slicing-by-N).
+            'slice16'
+
+        The size of the tables in bytes and a rough estimate of the speed on a
+        32 or 64-bit processor with a data cache are as follows, where S is the
+        size of crcType in bytes.  The speed on a small microcontroller mostly
+        depends on the number of operations per byte, which is in the same
+        order.
+
+            table       table bytes     cycles/byte
+            'bitwise'   0               25 - 40
+            'nibble'    16*S            8 - 12
+            'byte'      256*S           4 - 7
+            'slice4'    1024*S          2 - 3
+            'slice8'    2048*S          1 - 2
+            'slice16'   4096*S          1 - 1.5
+
+        unroll -- An optional parameter specifying how many times the body of
+        the main loop is repeated.  Defaults to 1.
+
+        streaming -- When True, generate the three functions functionName_init,
+        functionName_update and functionName_finalize instead of a single
+        function, so that the CRC of data arriving in pieces is conditioned only
+        once.  The update function works on the raw shift register and the
+        finalize function returns the CRC value.  Defaults to False.
+
+        align -- An optional parameter specifying the alignment in bytes of the
+        tables, for example the cache line size.  This uses the GCC/Clang
+        aligned attribute.
+
+        The 'byte' table with the other options left at their defaults
+        generates the same code as earlier versions of crcmod.  Any other
+        combination places the tables at file scope as functionName_table and
+        declares the data as const.
         '''
         if dataType is None:
             dataType = 'UINT8'
 
+        width = _verifyPoly(self.poly)
+        sizeBits = _kernelSize(width)
+        typeBits = sizeBits
+        if typeBits == 24:
+            typeBits = 32
         if crcType is None:
-            size = 8*self.digest_size
-            if size == 24:
-                size = 32
-            crcType = 'UINT%d' % size
+            crcType = 'UINT%d' % typeBits
 
-        if self.digest_size == 1:
+        if table not in _codeTables:
+            raise ValueError('Unknown table type %r' % (table,))
+        slices = _codeTables[table]
+        if unroll < 1:
+            raise ValueError('unroll must be at least 1')
+
+        if sizeBits == 8:
             # Both 8-bit CRC algorithms are the same
             crcAlgor = 'table[*data ^ (%s)crc]'
         elif self.reverse:
@@ -213,66 +659,156 @@ class Crc:
         else:
             # The forward CRC algorithms larger than 8 bits have an extra shift
             # operation to get the high byte.
-            shift = 8*(self.digest_size - 1)
+            shift = sizeBits - 8
             crcAlgor = 'table[*data ^ (%%s)(crc >> %d)] ^ (crc << 8)' % shift
 
-        fmt = '0x%%0%dX' % (2*self.digest_size)
-        if self.digest_size <= 4:
-            fmt = fmt + 'U,'
-        else:
-            # Need the long long type identifier to keep gcc from complaining.
-            fmt = fmt + 'ULL,'
+        def const(val):
+            return _cConstant(val, sizeBits, crcType)
 
         # Select the number of entries per row in the output code.
-        n = {1:8, 2:8, 3:4, 4:4, 8:2}[self.digest_size]
+        n = {8:8, 16:8, 24:4, 32:4, 64:2, 128:1}[sizeBits]
 
-        lst = []
-        for i, val in enumerate(self.table):
-            if (i % n) == 0:
-                lst.append('\n    ')
-            lst.append(fmt % val)
+        if table == 'nibble':
+            tables = [_mkNibbleTable(self.table, self.reverse)]
+        else:
+            tables = _mkSliceTables(self.table, slices, self.reverse, sizeBits)
+        crcTables = []
+        for tableList in tables:
+            lst = []
+            for i, val in enumerate(tableList):
+                if (i % n) == 0:
+                    lst.append('\n    ')
+                lst.append(const(val) + ',')
+            crcTables.append(''.join(lst))
 
         poly = 'polynomial: 0x%X' % self.poly
         if self.reverse:
             poly = poly + ', bit reverse algorithm'
+        if self.reverseOut != self.reverse:
+            poly = poly + ', bit reversed result'
 
         if self.xorOut:
-            # Need to remove the comma from the format.
-            preCondition = '\n    crc = crc ^ %s;' % (fmt[:-1] % self.xorOut)
-            postCondition = preCondition
+            xorCondition = '\n    crc = crc ^ %s;' % const(self.xorOut)
+        else:
+            xorCondition = ''
+
+        maskCondition = ''
+        if width < typeBits and (self.reverse or sizeBits < typeBits):
+            # CRCs narrower than the variable need to be conditioned so that
+            # only the CRC bits are used.
+            maskCondition = '\n    crc = crc & %s;' % const((1<<width) - 1)
+
+        # The non-reflected algorithms work on the register shifted to the high
+        # order bits of the table entries.
+        shiftIn = ''
+        shiftOut = ''
+        if width < sizeBits and not self.reverse:
+            shiftIn = '\n    crc = crc << %d;' % (sizeBits - width)
+            shiftOut = '\n    crc = crc >> %d;' % (sizeBits - width)
+
+        # The shift register is the reflection of the CRC value when the
+        # result is reflected differently from the data.  The reflection only
+        # uses the CRC bits, so no mask is needed.
+        reflect = self.reverseOut != self.reverse
+        if reflect:
+            reflectCondition = _reflectTemplate % {'crcType' : crcType, 'width' : width}
+            maskCondition = ''
         else:
-            preCondition = ''
-            postCondition = ''
+            reflectCondition = ''
 
-        if self.digest_size == 3:
-            # The 24-bit CRC needs to be conditioned so that only 24-bits are
-            # used from the 32-bit variable.
-            if self.reverse:
-                preCondition += '\n    crc = crc & 0xFFFFFFU;'
-            else:
-                postCondition += '\n    crc = crc & 0xFFFFFFU;'
-                
+        if self.reverse:
+            preCondition = xorCondition + maskCondition + reflectCondition
+            postCondition = reflectCondition + xorCondition
+        else:
+            preCondition = xorCondition + reflectCondition + shiftIn
+            postCondition = shiftOut + reflectCondition + xorCondition + maskCondition
 
         parms = {
             'dataType' : dataType,
             'crcType' : crcType,
             'name' : functionName,
             'crcAlgor' : crcAlgor % dataType,
-            'crcTable' : ''.join(lst),
+            'crcTable' : crcTables[0],
             'poly' : poly,
             'preCondition' : preCondition,
             'postCondition' : postCondition,
         }
-        out.write(_codeTemplate % parms) 
+
+        if slices == 1 and unroll == 1 and not streaming and align is None:
+            out.write(_codeTemplate % parms)
+            return
+
+        # The remaining variants share a table at file scope.
+        tableName = functionName + '_table'
+        parms['locals'] = ''
+        if table == 'bitwise':
+            if self.reverse:
+                poly = _bitrev(self.poly & ((1<<width) - 1), width)
+            else:
+                poly = (self.poly << (sizeBits - width)) & ((1<<sizeBits) - 1)
+            parms['locals'] = '\n    int bit;'
+            step = _bitwiseStep(const(poly), const(1<<(sizeBits-1)),
+                                crcType, self.reverse, sizeBits)
+        elif table == 'nibble':
+            parms['tableDecl'] = '%s[16]' % tableName
+            step = _nibbleStep(tableName, self.reverse, sizeBits)
+        elif slices == 1:
+            parms['tableDecl'] = '%s[256]' % tableName
+            step = '\n        crc = %s;' % (crcAlgor.replace('table', tableName) % dataType)
+        else:
+            parms['tableDecl'] = '%s[%d][256]' % (tableName, slices)
+            parms['crcTable'] = ','.join(['\n    {%s\n    }' % t.replace('\n', '\n    ') for t in crcTables])
+            step = '\n        crc = %s;' % (crcAlgor.replace('table', tableName + '[0]') % dataType)
+            blockStep = _sliceStep(tableName, slices, dataType, self.reverse, sizeBits)
+
+        if slices <= 1:
+            # The main loop repeats the byte at a time step.
+            slices = 1
+            blockStep = step.replace('*data', 'data[0]')
+
+        if align is None:
+            parms['align'] = ''
+        else:
+            parms['align'] = ' __attribute__((aligned(%d)))' % align
+
+        blockSize = slices*unroll
+        loops = _tailLoop % step
+        if blockSize > 1:
+            mainLoop = ''.join([blockStep + '\n        data += %d;' % slices] * unroll)
+            loops = _mainLoop % (blockSize, mainLoop, blockSize) + loops
+        parms['loops'] = loops
+
+        if table != 'bitwise':
+            out.write(_tableTemplate % parms)
+        else:
+            out.write('// Automatically generated CRC function\n// %s\n' % parms['poly'])
+        if streaming:
+            if reflect:
+                parms['initCrc'] = const(_bitrev(self.initCrc ^ self.xorOut, width))
+            else:
+                parms['initCrc'] = const(self.initCrc ^ self.xorOut)
+            parms['xorOut'] = const(self.xorOut)
+            parms['finalize'] = reflectCondition
+            if self.reverse:
+                parms['preCondition'] = maskCondition
+                parms['postCondition'] = ''
+            else:
+                parms['preCondition'] = shiftIn
+                parms['postCondition'] = shiftOut + maskCondition
+            out.write(_streamingTemplate % parms)
+        else:
+            out.write(_blockTemplate % parms)
 
 #-----------------------------------------------------------------------------
-def mkCrcFun(poly, initCrc=~0, rev=True, xorOut=0):
+def mkCrcFun(poly, initCrc=~0, rev=True, xorOut=0, revOut=None):
     '''Return a function that computes the CRC using the specified polynomial.
 
     poly -- integer representation of the generator polynomial
     initCrc -- default initial CRC value
     rev -- when true, indicates that the data is processed bit reversed.
     xorOut -- the final XOR value
+    revOut -- when true, indicates that the CRC is bit reversed.  Defaults to
+    the same as rev.
 
     The returned function has the following user interface
     def crcfun(data, crc=initCrc):
@@ -281,7 +817,131 @@ def mkCrcFun(poly, initCrc=~0, rev=True, xorOut=0):
     # First we must verify the params
     (sizeBits, initCrc, xorOut) = _verifyParams(poly, initCrc, xorOut)
     # Make the function (and table), return the function
-    return _mkCrcFun(poly, sizeBits, initCrc, rev, xorOut)[0]
+    return _mkCrcFun(poly, sizeBits, initCrc, rev, xorOut, revOut)[0]
+
+#-----------------------------------------------------------------------------
+def forge(crc, data, offset, target):
+    '''Return a copy of data with the bytes of a field changed so that the CRC
+    of the data is target.
+
+    crc -- A Crc instance for the CRC algorithm.  The data follows the data
+    that has been passed to its update method, if any.
+
+    data -- The data containing the field.
+
+    offset -- The offset of the field in the data.  The field is digest_size
+    bytes long, 4 bytes for a 32-bit CRC.
+
+    target -- The CRC value the data must have.
+
+    Changing a bit of the field that is followed by t more bits changes the
+    CRC by x^(n+t) modulo the polynomial, whatever the rest of the data.  The
+    new field is found by solving a linear system over GF(2) made of these
+    changes, so apart from calculating the CRC of the data once, the time
+    depends only on the logarithm of the distance from the field to the end.
+    ValueError is raised if the field does not lie within the data, or if the
+    polynomial has no x^0 term and the target cannot be reached.
+    '''
+    import crcmod.gf2 as gf2
+
+    mv = memoryview(data).cast('B')
+    nbytes = crc.digest_size
+    if offset < 0 or offset + nbytes > len(mv):
+        raise ValueError('The field must lie within the data')
+
+    poly = crc.poly
+    n = poly.bit_length() - 1
+    mask = (1<<n) - 1
+    reflect = _mkReflect(n)
+    diff = (crc._crc(mv, crc.crcValue) ^ target) & mask
+
+    # The change made by each bit of the field, starting from the last bit
+    # processed.
+    change = gf2.xnmod(n + 8*(len(mv) - offset - nbytes), poly)
+    cols = []
+    for k in range(8*nbytes):
+        cols.append(reflect(change) if crc.reverseOut else change)
+        change = change << 1
+        if change >> n:
+            change = change ^ poly
+
+    flips = gf2.solve(cols, diff)[0]
+    if flips is None:
+        raise ValueError('The CRC cannot be forced to the target value')
+
+    result = bytearray(mv)
+    for k in range(8*nbytes):
+        if (flips >> k) & 1:
+            i = offset + nbytes - 1 - k//8
+            if crc.reverse:
+                result[i] ^= 0x80 >> (k%8)
+            else:
+                result[i] ^= 1 << (k%8)
+    return bytes(result)
+
+#-----------------------------------------------------------------------------
+def backends():
+    '''Return a list of the names of the backends that can be forced.
+
+    'table' -- The table-driven kernels of the extension module.  Only
+    available if the extension module was built.
+
+    'python' -- The table-driven kernels written in Python.
+
+    The backend of a CRC function or Crc instance is in its backend attribute.
+    Besides these, it may be 'binascii' for the algorithms that are handed to
+    the binascii module, or 'jit-' and the table parameter for crcmod.jit.
+    '''
+    if _usingExtension:
+        return ['table', 'python']
+    return ['python']
+
+def useBackend(name):
+    '''Return a context manager that forces the backend of the CRC functions
+    and Crc instances created within it.
+
+    name -- One of the names returned by backends, or 'auto' to pick the
+    fastest.
+
+    Objects created earlier keep their backend, and so do the instances made
+    from them with the new and copy methods.  The selection only applies to the
+    current thread, or asyncio task.  The default is taken from the
+    CRCMOD_BACKEND environment variable, or else 'auto'.
+    '''
+    return _UseBackend(name)
+
+# The context manager returned by useBackend.  It is written out rather than
+# made with contextlib, which is slow to import.
+class _UseBackend:
+    def __init__(self, name):
+        self.name = name
+        self.tokens = []
+
+    def __enter__(self):
+        self.tokens.append(_backend.set(_verifyBackend(self.name)))
+
+    def __exit__(self, excType, excValue, traceback):
+        _backend.reset(self.tokens.pop())
+        return False
+
+def _verifyBackend(name):
+    if name == 'auto' or name in backends():
+        return name
+    raise ValueError('Unknown CRC backend %r, expected one of %s' %
+                     (name, ', '.join(['auto'] + backends())))
+
+# A bad CRCMOD_BACKEND must not stop crcmod from being imported, so it is
+# reported with a warning and the fastest backend is used instead.
+def _defaultBackend():
+    name = os.environ.get('CRCMOD_BACKEND') or 'auto'
+    try:
+        return _verifyBackend(name)
+    except ValueError as e:
+        import warnings
+        warnings.warn('Ignoring CRCMOD_BACKEND: %s' % e, RuntimeWarning)
+        return 'auto'
+
+_backend = contextvars.ContextVar('crcmod.backend', default=_defaultBackend())
 
 #-----------------------------------------------------------------------------
 # Naming convention:
@@ -293,12 +953,10 @@ def mkCrcFun(poly, initCrc=~0, rev=True, xorOut=0):
 # of bits in the CRC.
 
 def _verifyPoly(poly):
-    msg = 'The degree of the polynomial must be 8, 16, 24, 32 or 64'
-    for n in (8,16,24,32,64):
-        low = 1<<n
-        high = low*2
-        if low <= poly < high:
-            return n
+    msg = 'The degree of the polynomial must be between 1 and 128'
+    n = poly.bit_length() - 1
+    if 1 <= n <= 128:
+        return n
     raise ValueError(msg)
 
 #-----------------------------------------------------------------------------
@@ -311,6 +969,66 @@ def _bitrev(x, n):
         x = x >> 1
     return y
 
+# The bit reversal of each byte.  Written out so that importing the module does
+# not have to compute it.
+_bitrevTable = bytes.fromhex(
+    '008040c020a060e0109050d030b070f0088848c828a868e8189858d838b878f8'
+    '048444c424a464e4149454d434b474f40c8c4ccc2cac6cec1c9c5cdc3cbc7cfc'
+    '028242c222a262e2129252d232b272f20a8a4aca2aaa6aea1a9a5ada3aba7afa'
+    '068646c626a666e6169656d636b676f60e8e4ece2eae6eee1e9e5ede3ebe7efe'
+    '018141c121a161e1119151d131b171f1098949c929a969e9199959d939b979f9'
+    '058545c525a565e5159555d535b575f50d8d4dcd2dad6ded1d9d5ddd3dbd7dfd'
+    '038343c323a363e3139353d333b373f30b8b4bcb2bab6beb1b9b5bdb3bbb7bfb'
+    '078747c727a767e7179757d737b777f70f8f4fcf2faf6fef1f9f5fdf3fbf7fff')
+
+# Return a function that bit reverses an n-bit value.  This reverses the bits
+# of each byte with a translation table instead of looping over the bits.
+def _mkReflect(n):
+    nbytes = (n+7)//8
+    shift = 8*nbytes - n
+    mask = (1<<n) - 1
+    def reflect(x):
+        x = (x & mask).to_bytes(nbytes, 'little').translate(_bitrevTable)
+        return int.from_bytes(x, 'big') >> shift
+    return reflect
+
+#-----------------------------------------------------------------------------
+# Return a dictionary mapping the syndrome of each single bit error in nbits
+# bits of data, and in the CRC value itself, to the position of the bit.  The
+# data bits are numbered in the order they are processed, and bit i of the CRC
+# value is numbered nbits+i.  Syndromes that are shared by more than one
+# position map to None.
+#
+# An error in the data bit that is followed by t more bits changes the shift
+# register by x^(n+t) modulo the polynomial, so the syndromes are found by
+# shifting the register along, starting from the last bit.
+
+@functools.lru_cache(maxsize=16)
+def _syndromeIndex(poly, reverseOut, nbits):
+    n = poly.bit_length() - 1
+    mask = (1<<n) - 1
+    top = 1<<(n-1)
+    poly = poly & mask
+    reflect = _mkReflect(n)
+
+    index = {}
+    def add(syndrome, position):
+        if syndrome in index:
+            index[syndrome] = None
+        else:
+            index[syndrome] = position
+
+    reg = poly
+    for k in range(nbits-1, -1, -1):
+        add(reflect(reg) if reverseOut else reg, k)
+        if reg & top:
+            reg = ((reg << 1) & mask) ^ poly
+        else:
+            reg = reg << 1
+    for i in range(n):
+        add(1<<i, nbits + i)
+    return index
+
 #-----------------------------------------------------------------------------
 # The following functions compute the CRC for a single byte.  These are used
 # to build up the tables needed in the CRC algorithm.  Assumes the high order
@@ -358,16 +1076,118 @@ def _mkTable_r(poly, n):
     return table
 
 #-----------------------------------------------------------------------------
-# Map the CRC size onto the functions that handle these sizes.
-
-_sizeMap = {
-     8 : [_crcfun._crc8, _crcfun._crc8r],
-    16 : [_crcfun._crc16, _crcfun._crc16r],
-    24 : [_crcfun._crc24, _crcfun._crc24r],
-    32 : [_crcfun._crc32, _crcfun._crc32r],
-    64 : [_crcfun._crc64, _crcfun._crc64r],
+# Return a C literal for a value of the specified number of bits.  C has no
+# 128-bit literals, so those are built from two 64-bit halves.
+
+def _cConstant(val, sizeBits, crcType):
+    if sizeBits <= 32:
+        return '0x%0*XU' % (sizeBits//4, val)
+    if sizeBits <= 64:
+        # Need the long long type identifier to keep gcc from complaining.
+        return '0x%0*XULL' % (sizeBits//4, val)
+    return '(((%s)0x%016XULL << 64) | 0x%016XULL)' % (crcType, val >> 64,
+                                                    val & ((1<<64) - 1))
+
+#-----------------------------------------------------------------------------
+# The following functions support the slicing-by-N variants of the generated
+# code.  Table k gives the CRC of a byte followed by k zero bytes, so N bytes
+# can be looked up independently and combined with XOR.
+
+_codeTables = {
+    'bitwise' : 0,
+    'nibble' : 0,
+    'byte' : 1,
+    'slice4' : 4,
+    'slice8' : 8,
+    'slice16' : 16,
 }
 
+def _mkSliceTables(table, slices, rev, sizeBits):
+    mask = (1<<sizeBits) - 1
+    tables = [list(table)]
+    for k in range(1, slices):
+        prev = tables[-1]
+        if rev:
+            tables.append([table[x & 0xFF] ^ (x >> 8) for x in prev])
+        else:
+            shift = sizeBits - 8
+            tables.append([table[x >> shift] ^ ((x << 8) & mask) for x in prev])
+    return tables
+
+# The 16 entry table used to process four bits at a time.  These entries are
+# already in the byte table: the byte whose other four bits are zero.
+def _mkNibbleTable(table, rev):
+    if rev:
+        return [table[i << 4] for i in range(16)]
+    else:
+        return [table[i] for i in range(16)]
+
+def _nibbleStep(tableName, rev, sizeBits):
+    if rev:
+        lst = [
+            'crc = %s[(crc ^ *data) & 0x0F] ^ (crc >> 4);',
+            'crc = %s[(crc ^ (*data >> 4)) & 0x0F] ^ (crc >> 4);',
+        ]
+        lst = [x % tableName for x in lst]
+    else:
+        lst = [
+            'crc = %s[((crc >> %d) ^ (*data >> 4)) & 0x0F] ^ (crc << 4);',
+            'crc = %s[((crc >> %d) ^ *data) & 0x0F] ^ (crc << 4);',
+        ]
+        lst = [x % (tableName, sizeBits - 4) for x in lst]
+    return ''.join(['\n        ' + x for x in lst])
+
+# For CRC types narrower than int, crc << 1 is promoted to int, so both results
+# are cast back to the CRC type to keep the two branches of ?: the same type.
+def _bitwiseStep(poly, topBit, crcType, rev, sizeBits):
+    if rev:
+        lst = [
+            'crc = crc ^ *data;',
+            'for (bit = 0; bit < 8; bit++)',
+            '    crc = (crc & 1U) ? (crc >> 1) ^ %s : (crc >> 1);' % poly,
+        ]
+    else:
+        if sizeBits > 8:
+            lst = ['crc = crc ^ ((%s)*data << %d);' % (crcType, sizeBits - 8)]
+        else:
+            lst = ['crc = crc ^ *data;']
+        lst.extend([
+            'for (bit = 0; bit < 8; bit++)',
+            '    crc = (crc & %s) ? (%s)((crc << 1) ^ %s) : (%s)(crc << 1);'
+            % (topBit, crcType, poly, crcType),
+        ])
+    return ''.join(['\n        ' + x for x in lst])
+
+# Return the C statement that processes one block of slices bytes.
+def _sliceStep(tableName, slices, dataType, rev, sizeBits):
+    nbytes = sizeBits//8
+    terms = []
+    for i in range(slices):
+        if i < nbytes:
+            if rev:
+                shift = 8*i
+            else:
+                shift = sizeBits - 8 - 8*i
+            if shift:
+                crcByte = ' ^ (%s)(crc >> %d)' % (dataType, shift)
+            else:
+                crcByte = ' ^ (%s)crc' % dataType
+        else:
+            crcByte = ''
+        if slices == 1:
+            terms.append('%s[data[%d]%s]' % (tableName, i, crcByte))
+        else:
+            terms.append('%s[%d][data[%d]%s]' % (tableName, slices-1-i, i, crcByte))
+
+    if slices < nbytes:
+        # Part of the CRC remains after the bytes that have been looked up.
+        if rev:
+            terms.append('(crc >> %d)' % (8*slices))
+        else:
+            terms.append('(crc << %d)' % (8*slices))
+
+    return '\n        crc = %s;' % ' ^\n              '.join(terms)
+
 #-----------------------------------------------------------------------------
 # Build a mapping of size to struct module type code.  This table is
 # constructed dynamically so that it has the best chance of picking the best
@@ -383,8 +1203,24 @@ for typeCode in 'B H I L Q'.split():
 
 _sizeToTypeCode[24] = _sizeToTypeCode[32]
 
+# The 128-bit table holds the low and then the high 64 bits of each entry.
+_sizeToTypeCode[128] = '512%s' % _sizeToTypeCode[64][-1]
+
 del typeCode, size
 
+#-----------------------------------------------------------------------------
+# Return the size of the kernel used for a CRC of n bits.  CRCs that do not fit
+# a kernel exactly are computed in the next larger one.  The reflected
+# algorithms use the n-bit table unchanged, since the register is shifted
+# towards the low order bits.  The other algorithms work on the register
+# shifted to the high order bits of the kernel, so the polynomial and the
+# table are shifted the same way.
+
+def _kernelSize(n):
+    for size in (8,16,24,32,64,128):
+        if n <= size:
+            return size
+
 #-----------------------------------------------------------------------------
 # The following function validates the parameters of the CRC, namely,
 # poly, and initial/final XOR values.
@@ -413,28 +1249,178 @@ def _verifyParams(poly, initCrc, xorOut):
 # extension module could be loaded.  Otherwise, a Python implementation is
 # used.
 #
-# In addition to this function, a list containing the CRC table is returned.
+# In addition to this function, a read-only sequence of the entries of the CRC
+# table is returned.
+#
+# The backend forced with useBackend or CRCMOD_BACKEND is looked up when the
+# function is made.  The function records the backend it ended up with in its
+# backend attribute.
+#
+# Building a table in Python takes much longer than anything else done here, so
+# the tables are cached by polynomial and direction.  Any number of functions
+# and Crc instances using the same polynomial share a single table.  The cache
+# is bounded like the one of _getAlgorithm; a function keeps its table after
+# the table has been dropped from the cache.
+#
+# The table is kept once, as the string of machine words used by the extension
+# module.  The Python kernels and the table attribute use a read-only view of
+# the same memory instead of a list of integers.
 
-def _mkCrcFun(poly, sizeBits, initCrc, rev, xorOut):
+@functools.lru_cache(maxsize=128)
+def _getTable(poly, sizeBits, rev):
+    kernelBits = _kernelSize(sizeBits)
     if rev:
         tableList = _mkTable_r(poly, sizeBits)
-        _fun = _sizeMap[sizeBits][1]
     else:
-        tableList = _mkTable(poly, sizeBits)
-        _fun = _sizeMap[sizeBits][0]
-
-    _table = tableList
-    if _usingExtension:
-        _table = struct.pack(_sizeToTypeCode[sizeBits], *tableList)
+        tableList = _mkTable(poly << (kernelBits - sizeBits), kernelBits)
+
+    packed = _packTable(tableList, kernelBits)
+    return (_tableView(packed, kernelBits), packed)
+
+# Pack a table into the string of machine words used by the extension module.
+def _packTable(tableList, kernelBits):
+    if kernelBits == 128:
+        mask = (1<<64) - 1
+        return struct.pack(_sizeToTypeCode[128],
+                           *[x for v in tableList for x in (v & mask, v >> 64)])
+    return struct.pack(_sizeToTypeCode[kernelBits], *tableList)
+
+# Return a read-only sequence of the entries of a packed table.
+def _tableView(packed, kernelBits):
+    words = memoryview(packed).cast(_sizeToTypeCode[kernelBits][-1])
+    if kernelBits == 128:
+        import collections.abc
+        collections.abc.Sequence.register(_Table128)
+        return _Table128(words)
+    return words
+
+# The entries of a 128-bit table, which holds two machine words per entry.  It
+# is registered as a Sequence by _tableView.
+class _Table128:
+    __slots__ = ('_words',)
+
+    def __init__(self, words):
+        self._words = words
+
+    def __len__(self):
+        return len(self._words) // 2
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index = index + len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('table index out of range')
+        return self._words[2*index] | (self._words[2*index+1] << 64)
+
+    def tolist(self):
+        return list(self)
+
+def _mkCrcFun(poly, sizeBits, initCrc, rev, xorOut, revOut=None):
+    if revOut is not None and bool(revOut) != bool(rev):
+        # The kernel works on the shift register, which is the reflection of
+        # the CRC value.  Reflect once on entry and once on exit.
+        (regfun, table) = _mkCrcFun(poly, sizeBits, 0, rev, 0)
+        reflect = _mkReflect(sizeBits)
+        if xorOut == 0:
+            def crcfun(data, crc=initCrc, regfun=regfun):
+                return reflect(regfun(data, reflect(crc)))
+        else:
+            def crcfun(data, crc=initCrc, regfun=regfun):
+                return xorOut ^ reflect(regfun(data, reflect(xorOut ^ crc)))
+
+        def batch(datas, crc=initCrc, regfun=regfun):
+            return [xorOut ^ reflect(reg) for reg in regfun.batch(datas, reflect(xorOut ^ crc))]
+        crcfun.batch = batch
+        crcfun.backend = regfun.backend
+        return crcfun, table
+
+    selected = _backend.get()
+    if selected == 'python':
+        lowlevel = _crcfunpy
+    else:
+        lowlevel = _crcfun
 
-    if xorOut == 0:
+    (table, _table) = _getTable(poly, sizeBits, rev)
+    if lowlevel is _crcfunpy:
+        _table = table
+    kernelBits = _kernelSize(sizeBits)
+    if rev:
+        _fun = getattr(lowlevel, '_crc%dr' % kernelBits)
+    else:
+        _fun = getattr(lowlevel, '_crc%d' % kernelBits)
+    if lowlevel is _crcfunpy:
+        backend = 'python'
+    else:
+        backend = 'table'
+
+    shift = kernelBits - sizeBits
+    if shift and rev:
+        # The kernel only drops the bits above its own size.
+        mask = (1<<sizeBits) - 1
+        if xorOut == 0:
+            def crcfun(data, crc=initCrc, table=_table, fun=_fun):
+                return fun(data, crc & mask, table)
+        else:
+            def crcfun(data, crc=initCrc, table=_table, fun=_fun):
+                return xorOut ^ fun(data, (xorOut ^ crc) & mask, table)
+    elif shift:
+        # The register is kept in the high order bits of the kernel.
+        if xorOut == 0:
+            def crcfun(data, crc=initCrc, table=_table, fun=_fun):
+                return fun(data, crc << shift, table) >> shift
+        else:
+            def crcfun(data, crc=initCrc, table=_table, fun=_fun):
+                return xorOut ^ (fun(data, (xorOut ^ crc) << shift, table) >> shift)
+    elif xorOut == 0:
         def crcfun(data, crc=initCrc, table=_table, fun=_fun):
             return fun(data, crc, table)
     else:
         def crcfun(data, crc=initCrc, table=_table, fun=_fun):
             return xorOut ^ fun(data, xorOut ^ crc, table)
 
-    return crcfun, tableList
+    # binascii has its own functions for two common algorithms, compared with
+    # the kernels by crcmod.bench.  binascii.crc32 is the faster at every size.
+    # binascii.crc_hqx does one table lookup per byte without the interleaving
+    # of the extension module, so it only beats the Python implementation.
+    # Forcing a backend turns this off.
+    if selected == 'auto' and poly == 0x104C11DB7 and rev:
+        import binascii
+        backend = 'binascii'
+        k = xorOut ^ 0xFFFFFFFF
+        if k == 0:
+            def crcfun(data, crc=initCrc, crc32=binascii.crc32):
+                return crc32(data, crc)
+        else:
+            def crcfun(data, crc=initCrc, crc32=binascii.crc32):
+                return k ^ crc32(data, k ^ crc)
+    elif selected == 'auto' and poly == 0x11021 and not rev and not _usingExtension:
+        import binascii
+        backend = 'binascii'
+        def crcfun(data, crc=initCrc, crc_hqx=binascii.crc_hqx):
+            return xorOut ^ crc_hqx(data, xorOut ^ crc)
+
+    # The batch function computes the CRCs of a sequence of buffers.  The
+    # kernels of up to 64 bits interleave the buffers, see _crcfunext.c.
+    if kernelBits == 128:
+        def multi(datas, reg):
+            return [_fun(data, reg, _table) for data in datas]
+    else:
+        def multi(datas, reg):
+            return lowlevel._crcmulti(datas, reg, _table, kernelBits, rev)
+
+    if rev:
+        mask = (1<<sizeBits) - 1
+        def batch(datas, crc=initCrc):
+            return [xorOut ^ reg for reg in multi(datas, (xorOut ^ crc) & mask)]
+    else:
+        def batch(datas, crc=initCrc):
+            return [xorOut ^ (reg >> shift) for reg in multi(datas, (xorOut ^ crc) << shift)]
+    crcfun.batch = batch
+    crcfun.backend = backend
+
+    return crcfun, table
 
 #-----------------------------------------------------------------------------
 _codeTemplate = '''// Automatically generated CRC function
@@ -455,3 +1441,61 @@ _codeTemplate = '''// Automatically generated CRC function
 }
 '''
 
+_tableTemplate = '''// Automatically generated CRC tables
+// %(poly)s
+static const %(crcType)s %(tableDecl)s%(align)s = {%(crcTable)s
+};
+'''
+
+_mainLoop = '''
+    while (len >= %d)
+    {%s
+        len -= %d;
+    }'''
+
+_tailLoop = '''
+    while (len > 0)
+    {%s
+        data++;
+        len--;
+    }'''
+
+_blockTemplate = '''
+%(crcType)s
+%(name)s(const %(dataType)s *data, int len, %(crcType)s crc)
+{%(locals)s%(preCondition)s%(loops)s%(postCondition)s
+    return crc;
+}
+'''
+
+_streamingTemplate = '''
+%(crcType)s
+%(name)s_init(void)
+{
+    return %(initCrc)s;
+}
+
+%(crcType)s
+%(name)s_update(const %(dataType)s *data, int len, %(crcType)s crc)
+{%(locals)s%(preCondition)s%(loops)s%(postCondition)s
+    return crc;
+}
+
+%(crcType)s
+%(name)s_finalize(%(crcType)s crc)
+{%(finalize)s
+    return crc ^ %(xorOut)s;
+}
+'''
+
+_reflectTemplate = '''
+    {
+        %(crcType)s r = 0;
+        int i;
+        for (i = 0; i < %(width)d; i++)
+        {
+            r = (r << 1) | (crc & 1);
+            crc = crc >> 1;
+        }
+        crc = r;
+    }'''
@@ -0,0 +1,195 @@
+#-----------------------------------------------------------------------------
+# Copyright (c) 2010  Raymond L. Buvel
+# Copyright (c) 2010  Craig McQueen
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#-----------------------------------------------------------------------------
+'''
+crcmod.gf2 provides arithmetic on polynomials over GF(2), the algebra behind
+CRC calculation.
+
+To use it, e.g.:
+    import crcmod.gf2
+
+    # x^(8*1000) modulo the CRC-32 polynomial, which combines the CRC of a
+    # message with the CRC of the 1000 bytes following it.
+    crcmod.gf2.xnmod(8*1000, 0x104C11DB7)
+
+    # The inverse of x modulo the polynomial, which undoes one bit shift.
+    crcmod.gf2.inverse(2, 0x104C11DB7)
+
+The polynomials are represented as non-negative integers with the bits being
+the coefficients, in the same form as the polynomials given to
+crcmod.mkCrcFun.  Addition and subtraction are both XOR.
+
+With the extension module, multiplication is done in C on 64-bit words, using
+the carry-less multiply instruction on processors which have it, and powers
+are raised entirely in C.  Without it, the same operations are done in Python.
+Division and the functions built on it are done in Python, as is solve, which
+solves linear systems over GF(2) rather than working on polynomials.
+'''
+
+from crcmod.crcmod import _crcfun
+
+__all__ = [
+    'clmul',
+    'divmodPoly',
+    'modPoly',
+    'gcd',
+    'mulmod',
+    'powmod',
+    'xnmod',
+    'inverse',
+    'solve',
+]
+
+#-----------------------------------------------------------------------------
+def clmul(a, b):
+    '''Return the product of the polynomials a and b.
+    '''
+    return _fromBytes(_crcfun._gf2clmul(_toBytes(a), _toBytes(b)))
+
+def divmodPoly(a, b):
+    '''Return the quotient and the remainder of dividing the polynomial a by
+    the polynomial b, as a tuple.
+    '''
+    _verifyPoly(a)
+    nb = _verifyModulus(b).bit_length()
+    q = 0
+    while True:
+        shift = a.bit_length() - nb
+        if shift < 0:
+            return (q, a)
+        a ^= b << shift
+        q |= 1 << shift
+
+def modPoly(a, p):
+    '''Return the remainder of dividing the polynomial a by the polynomial p.
+    '''
+    return mulmod(a, 1, p)
+
+def gcd(a, b):
+    '''Return the greatest common divisor of the polynomials a and b.
+    '''
+    _verifyPoly(a)
+    _verifyPoly(b)
+    while b:
+        (a, b) = (b, modPoly(a, b))
+    return a
+
+def mulmod(a, b, p):
+    '''Return the product of the polynomials a and b modulo the polynomial p.
+    '''
+    p = _verifyModulus(p)
+    return _fromBytes(_crcfun._gf2mulmod(_toBytes(a), _toBytes(b), _toBytes(p)))
+
+def powmod(a, e, p):
+    '''Return the polynomial a raised to the power e modulo the polynomial p.
+
+    e -- A non-negative integer.
+    '''
+    p = _verifyModulus(p)
+    if e < 0:
+        raise ValueError('The exponent must not be negative')
+    return _fromBytes(_crcfun._gf2powmod(_toBytes(a), _toBytes(e), _toBytes(p)))
+
+def xnmod(n, p):
+    '''Return x^n modulo the polynomial p.
+
+    Multiplying a CRC register by x^n modulo the polynomial has the same effect
+    as feeding n zero bits through it, without the initial and final XOR
+    values, so this is the basis of combining CRCs and of zero extension.
+    '''
+    return powmod(2, n, p)
+
+def inverse(a, p):
+    '''Return the inverse of the polynomial a modulo the polynomial p.
+
+    Raises ValueError if a and p have a common factor, so that there is no
+    inverse.
+    '''
+    p = _verifyModulus(p)
+    # Extended Euclid, keeping only the coefficient of a.
+    (r0, r1) = (p, modPoly(a, p))
+    (s0, s1) = (0, 1)
+    while r1:
+        (q, r) = divmodPoly(r0, r1)
+        (r0, r1) = (r1, r)
+        (s0, s1) = (s1, s0 ^ clmul(q, s1))
+    if r0 != 1:
+        raise ValueError('The polynomial has no inverse modulo p')
+    return modPoly(s0, p)
+
+def solve(cols, y):
+    '''Solve the linear system sum(x_i * cols[i]) == y over GF(2).
+
+    cols -- A sequence of integers, each holding a column of the system.
+
+    y -- An integer holding the right hand side.
+
+    Return a tuple (x, null).  x is an integer with bit i being x_i, or None if
+    there is no solution.  null is a list of the basis of the null space, and
+    XORing any combination of them into x gives the other solutions.
+    '''
+    # Pivots are kept as (leading bit, column, combination of the inputs) in
+    # descending order so that each reduction only introduces lower bits.
+    # Combinations that reduce to zero span the null space.
+    pivots = []
+    null = []
+    for (i, col) in enumerate(cols):
+        comb = 1 << i
+        for (bit, pcol, pcomb) in pivots:
+            if col & bit:
+                col ^= pcol
+                comb ^= pcomb
+        if col:
+            pivots.append((1 << (col.bit_length() - 1), col, comb))
+            pivots.sort(reverse=True)
+        else:
+            null.append(comb)
+
+    x = 0
+    for (bit, pcol, pcomb) in pivots:
+        if y & bit:
+            y ^= pcol
+            x ^= pcomb
+    if y:
+        return (None, null)
+    return (x, null)
+
+#-----------------------------------------------------------------------------
+# The extension module takes polynomials as strings of bytes, least significant
+# byte first.
+
+def _verifyPoly(a):
+    if a < 0:
+        raise ValueError('A polynomial must not be negative')
+    return a
+
+def _verifyModulus(p):
+    if _verifyPoly(p) == 0:
+        raise ZeroDivisionError('polynomial division by zero')
+    return p
+
+def _toBytes(a):
+    _verifyPoly(a)
+    return a.to_bytes((a.bit_length() + 7) // 8, 'little')
+
+def _fromBytes(s):
+    return int.from_bytes(s, 'little')
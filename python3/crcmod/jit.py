@@ -0,0 +1,246 @@
+#-----------------------------------------------------------------------------
+# Copyright (c) 2010  Raymond L. Buvel
+# Copyright (c) 2010  Craig McQueen
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#-----------------------------------------------------------------------------
+'''
+crcmod.jit compiles the code produced by Crc.generateCode with the local C
+compiler and loads it with ctypes.  The polynomial, the tables, the final XOR
+value and the width are all constants in the compiled code.
+
+To use it, e.g.:
+    import crcmod.jit
+    import crcmod.predefined
+
+    crc32 = crcmod.jit.compile(crcmod.predefined.Crc('crc-32'))
+    crc32.update(b'123456789')
+
+    crc32func = crcmod.jit.mkCrcFun(0x104C11DB7, initCrc=0, xorOut=0xFFFFFFFF)
+
+The compiled shared objects are cached on disk, so the compiler is only run
+once per host for each CRC algorithm.  The cache is placed in the directory
+named by the CRCMOD_JIT_CACHE environment variable, or else in crcmod/jit
+below the user's cache directory.  The compiler is taken from the CC
+environment variable, or else the one Python was built with.  This module
+requires a C compiler that can build shared objects, such as GCC or Clang.
+'''
+
+import ctypes
+import hashlib
+import io
+import os
+import shlex
+import subprocess
+import sys
+import sysconfig
+import tempfile
+
+from crcmod.crcmod import Crc, _verifyPoly, _kernelSize
+from crcmod._crcfunpy import _get_buffer_view
+
+__all__ = [
+    'compile',
+    'mkCrcFun',
+]
+
+# Functions that are already loaded in this process, by source hash.
+_loaded = {}
+
+#-----------------------------------------------------------------------------
+def compile(crc, table='slice8'):
+    '''Return a new Crc instance that uses a compiled function for the CRC
+    algorithm of crc.  The current CRC is set to the initial value.
+
+    crc -- A Crc instance specifying the CRC algorithm.
+
+    table -- The lookup tables used by the compiled code.  Refer to
+    Crc.generateCode for the choices.  Defaults to 'slice8'.
+    '''
+    n = crc.new()
+    n.algorithm = crc.algorithm._withFun(_compileFun(crc, table))
+    return n
+
+def mkCrcFun(poly, initCrc=~0, rev=True, xorOut=0, revOut=None, table='slice8'):
+    '''Return a compiled function that computes the CRC using the specified
+    polynomial.  The parameters and the returned function, including its batch
+    attribute, are the same as those of crcmod.mkCrcFun.  Refer to compile for
+    the table parameter.
+    '''
+    return _compileFun(Crc(poly, initCrc, rev, xorOut, revOut=revOut), table)
+
+#-----------------------------------------------------------------------------
+# The generated function takes an int length, so the wrapper feeds it pieces
+# that fit.  It also gives every width the same ctypes signature.  The data is
+# passed without const, which the code for table='byte' does not declare.
+
+_wrapperTemplate = '''
+#include <limits.h>
+#include <stddef.h>
+
+#if defined(_WIN32)
+__declspec(dllexport)
+#endif
+UINT64
+crcmod_jit(const UINT8 *data, size_t len, UINT64 crc)
+{
+    %(crcType)s c = (%(crcType)s)crc;
+    while (len > INT_MAX)
+    {
+        c = crcmod_jit_kernel((UINT8 *)data, INT_MAX, c);
+        data += INT_MAX;
+        len -= INT_MAX;
+    }
+    return crcmod_jit_kernel((UINT8 *)data, (int)len, c);
+}
+'''
+
+# ctypes has no 128-bit integer, so the CRC is passed as two 64-bit halves,
+# low half first.
+_wrapper128Template = '''
+#include <limits.h>
+#include <stddef.h>
+
+#if defined(_WIN32)
+__declspec(dllexport)
+#endif
+void
+crcmod_jit(const UINT8 *data, size_t len, UINT64 *crc)
+{
+    UINT128 c = ((UINT128)crc[1] << 64) | crc[0];
+    while (len > INT_MAX)
+    {
+        c = crcmod_jit_kernel((UINT8 *)data, INT_MAX, c);
+        data += INT_MAX;
+        len -= INT_MAX;
+    }
+    c = crcmod_jit_kernel((UINT8 *)data, (int)len, c);
+    crc[0] = (UINT64)c;
+    crc[1] = (UINT64)(c >> 64);
+}
+'''
+
+_typedefs = '''typedef unsigned char      UINT8;
+typedef unsigned short     UINT16;
+typedef unsigned int       UINT32;
+typedef unsigned long long UINT64;
+'''
+
+_typedef128 = '''typedef unsigned __int128  UINT128;
+'''
+
+_mask64 = (1<<64) - 1
+
+def _compileFun(crc, table):
+    size = _kernelSize(_verifyPoly(crc.poly))
+    if size == 24:
+        size = 32
+    out = io.StringIO()
+    out.write(_typedefs)
+    if size == 128:
+        out.write(_typedef128)
+    crc.generateCode('crcmod_jit_kernel', out, table=table)
+    if size == 128:
+        out.write(_wrapper128Template)
+    else:
+        out.write(_wrapperTemplate % {'crcType' : 'UINT%d' % size})
+    source = out.getvalue()
+
+    compiler = _compiler()
+    key = hashlib.sha256('\0'.join([source, ' '.join(compiler), sys.platform,
+                                    sysconfig.get_platform()]).encode()).hexdigest()
+
+    kernel = _loaded.get(key, None)
+    if kernel is None:
+        kernel = _load(source, compiler, key)
+        if size == 128:
+            kernel.restype = None
+            kernel.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_void_p]
+        else:
+            kernel.restype = ctypes.c_uint64
+            kernel.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_uint64]
+        _loaded[key] = kernel
+
+    initCrc = crc.initCrc
+    if size == 128:
+        def crcfun(data, crc=initCrc, kernel=kernel):
+            reg = (ctypes.c_uint64 * 2)(crc & _mask64, (crc >> 64) & _mask64)
+            if isinstance(data, bytes):
+                kernel(data, len(data), reg)
+            else:
+                kernel(*_bufferArgs(data) + (reg,))
+            return (reg[1] << 64) | reg[0]
+    else:
+        def crcfun(data, crc=initCrc, kernel=kernel):
+            if isinstance(data, bytes):
+                return kernel(data, len(data), crc)
+            return kernel(*_bufferArgs(data) + (crc,))
+
+    # The compiled code has no interleaved kernel, so the batch function calls
+    # it once per buffer.
+    def batch(datas, crc=initCrc):
+        return [crcfun(data, crc) for data in datas]
+    crcfun.batch = batch
+    crcfun.backend = 'jit-%s' % table
+    return crcfun
+
+# Return the pointer and length arguments for an object supporting the buffer
+# interface.  Writable buffers are passed without copying.
+def _bufferArgs(data):
+    mv = _get_buffer_view(data)
+    if mv.readonly:
+        return (mv.tobytes(), mv.nbytes)
+    return ((ctypes.c_char * mv.nbytes).from_buffer(mv), mv.nbytes)
+
+def _compiler():
+    cc = os.environ.get('CC', None) or sysconfig.get_config_var('CC') or 'cc'
+    return shlex.split(cc)
+
+def _cacheDir():
+    path = os.environ.get('CRCMOD_JIT_CACHE', None)
+    if path:
+        return path
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA', None) or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME', None) or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'crcmod', 'jit')
+
+def _load(source, compiler, key):
+    suffix = sysconfig.get_config_var('SHLIB_SUFFIX') or '.so'
+    cacheDir = _cacheDir()
+    path = os.path.join(cacheDir, 'crc_%s%s' % (key[:32], suffix))
+
+    if not os.path.exists(path):
+        os.makedirs(cacheDir, exist_ok=True)
+        # Build in a private directory and move the result into place, so that
+        # concurrent processes never load a partly written file.
+        with tempfile.TemporaryDirectory(dir=cacheDir) as tmp:
+            src = os.path.join(tmp, 'crc.c')
+            obj = os.path.join(tmp, 'crc' + suffix)
+            with open(src, 'w') as f:
+                f.write(source)
+            cmd = compiler + ['-O3', '-shared', '-fPIC', '-o', obj, src]
+            result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            if result.returncode != 0:
+                raise OSError('C compiler failed: %s\n%s' % (' '.join(cmd),
+                              result.stdout.decode(errors='replace')))
+            os.replace(obj, path)
+
+    return ctypes.CDLL(path).crcmod_jit
@@ -30,14 +30,20 @@ To use it, e.g.:
 
 crcmod.predefined.Crc is an alias for crcmod.predefined.PredefinedCrc
 But if doing 'from crc.predefined import *', only PredefinedCrc is imported.
+
+crcmod.predefined.new(name, data) works like hashlib.new, and the instances
+can be given to hashlib.file_digest, e.g.:
+    hashlib.file_digest(f, lambda: crcmod.predefined.PredefinedCrc("crc-32c"))
 '''
 
 # local imports
 import crcmod
+from crcmod.crcmod import _verifyParams, _backend
 
 __all__ = [
     'PredefinedCrc',
     'mkPredefinedCrcFun',
+    'findPredefinedName',
 ]
 
 REVERSE = True
@@ -45,9 +51,26 @@ NON_REVERSE = False
 
 # The following table defines the parameters of well-known CRC algorithms.
 # The "Check" value is the CRC for the ASCII byte sequence b"123456789". It
-# can be used for unit tests.
+# can be used for unit tests.  An optional last column gives the reflection of
+# the result, when it differs from the "Reverse" column.
 _crc_definitions_table = [
 #       Name                Identifier-name,    Poly            Reverse         Init-value      XOR-out     Check
+    [   'crc-3-gsm',        'Crc3Gsm',          0xB,            NON_REVERSE,    0x7,            0x7,        0x4,        ],
+    [   'crc-3-rohc',       'Crc3Rohc',         0xB,            REVERSE,        0x7,            0x0,        0x6,        ],
+    [   'crc-4-g-704',      'Crc4G704',         0x13,           REVERSE,        0x0,            0x0,        0x7,        ],
+    [   'crc-4-interlaken', 'Crc4Interlaken',   0x13,           NON_REVERSE,    0x0,            0xF,        0xB,        ],
+    [   'crc-5-epc-c1g2',   'Crc5EpcC1g2',      0x29,           NON_REVERSE,    0x09,           0x00,       0x00,       ],
+    [   'crc-5-g-704',      'Crc5G704',         0x35,           REVERSE,        0x00,           0x00,       0x07,       ],
+    [   'crc-5-usb',        'Crc5Usb',          0x25,           REVERSE,        0x00,           0x1F,       0x19,       ],
+    [   'crc-6-cdma2000-a', 'Crc6Cdma2000A',    0x67,           NON_REVERSE,    0x3F,           0x00,       0x0D,       ],
+    [   'crc-6-cdma2000-b', 'Crc6Cdma2000B',    0x47,           NON_REVERSE,    0x3F,           0x00,       0x3B,       ],
+    [   'crc-6-darc',       'Crc6Darc',         0x59,           REVERSE,        0x00,           0x00,       0x26,       ],
+    [   'crc-6-g-704',      'Crc6G704',         0x43,           REVERSE,        0x00,           0x00,       0x06,       ],
+    [   'crc-6-gsm',        'Crc6Gsm',          0x6F,           NON_REVERSE,    0x3F,           0x3F,       0x13,       ],
+    [   'crc-7',            'Crc7',             0x89,           NON_REVERSE,    0x00,           0x00,       0x75,       ],
+    [   'crc-7-rohc',       'Crc7Rohc',         0xCF,           REVERSE,        0x7F,           0x00,       0x53,       ],
+    [   'crc-7-umts',       'Crc7Umts',         0xC5,           NON_REVERSE,    0x00,           0x00,       0x61,       ],
+
     [   'crc-8',            'Crc8',             0x107,          NON_REVERSE,    0x00,           0x00,       0xF4,       ],
     [   'crc-8-darc',       'Crc8Darc',         0x139,          REVERSE,        0x00,           0x00,       0x15,       ],
     [   'crc-8-i-code',     'Crc8ICode',        0x11D,          NON_REVERSE,    0xFD,           0x00,       0x7E,       ],
@@ -55,6 +78,35 @@ _crc_definitions_table = [
     [   'crc-8-maxim',      'Crc8Maxim',        0x131,          REVERSE,        0x00,           0x00,       0xA1,       ],
     [   'crc-8-rohc',       'Crc8Rohc',         0x107,          REVERSE,        0xFF,           0x00,       0xD0,       ],
     [   'crc-8-wcdma',      'Crc8Wcdma',        0x19B,          REVERSE,        0x00,           0x00,       0x25,       ],
+    [   'crc-8-autosar',    'Crc8Autosar',      0x12F,          NON_REVERSE,    0x00,           0xFF,       0xDF,       ],
+    [   'crc-8-bluetooth',  'Crc8Bluetooth',    0x1A7,          REVERSE,        0x00,           0x00,       0x26,       ],
+    [   'crc-8-cdma2000',   'Crc8Cdma2000',     0x19B,          NON_REVERSE,    0xFF,           0x00,       0xDA,       ],
+    [   'crc-8-dvb-s2',     'Crc8DvbS2',        0x1D5,          NON_REVERSE,    0x00,           0x00,       0xBC,       ],
+    [   'crc-8-ebu',        'Crc8Ebu',          0x11D,          REVERSE,        0xFF,           0x00,       0x97,       ],
+    [   'crc-8-gsm-a',      'Crc8GsmA',         0x11D,          NON_REVERSE,    0x00,           0x00,       0x37,       ],
+    [   'crc-8-gsm-b',      'Crc8GsmB',         0x149,          NON_REVERSE,    0xFF,           0xFF,       0x94,       ],
+    [   'crc-8-hitag',      'Crc8Hitag',        0x11D,          NON_REVERSE,    0xFF,           0x00,       0xB4,       ],
+    [   'crc-8-lte',        'Crc8Lte',          0x19B,          NON_REVERSE,    0x00,           0x00,       0xEA,       ],
+    [   'crc-8-mifare-mad', 'Crc8MifareMad',    0x11D,          NON_REVERSE,    0xC7,           0x00,       0x99,       ],
+    [   'crc-8-nrsc-5',     'Crc8Nrsc5',        0x131,          NON_REVERSE,    0xFF,           0x00,       0xF7,       ],
+    [   'crc-8-opensafety', 'Crc8Opensafety',   0x12F,          NON_REVERSE,    0x00,           0x00,       0x3E,       ],
+    [   'crc-8-sae-j1850',  'Crc8SaeJ1850',     0x11D,          NON_REVERSE,    0x00,           0xFF,       0x4B,       ],
+
+    [   'crc-10',           'Crc10',            0x633,          NON_REVERSE,    0x000,          0x000,      0x199,      ],
+    [   'crc-10-cdma2000',  'Crc10Cdma2000',    0x7D9,          NON_REVERSE,    0x3FF,          0x000,      0x233,      ],
+    [   'crc-10-gsm',       'Crc10Gsm',         0x575,          NON_REVERSE,    0x3FF,          0x3FF,      0x12A,      ],
+    [   'crc-11-flexray',   'Crc11Flexray',     0xB85,          NON_REVERSE,    0x01A,          0x000,      0x5A3,      ],
+    [   'crc-11-umts',      'Crc11Umts',        0xB07,          NON_REVERSE,    0x000,          0x000,      0x061,      ],
+    [   'crc-12-cdma2000',  'Crc12Cdma2000',    0x1F13,         NON_REVERSE,    0xFFF,          0x000,      0xD4D,      ],
+    [   'crc-12-dect',      'Crc12Dect',        0x180F,         NON_REVERSE,    0x000,          0x000,      0xF5B,      ],
+    [   'crc-12-gsm',       'Crc12Gsm',         0x1D31,         NON_REVERSE,    0xFFF,          0xFFF,      0xB34,      ],
+    # The result of CRC-12/UMTS is bit reversed although the data is not.
+    [   'crc-12-umts',      'Crc12Umts',        0x180F,         NON_REVERSE,    0x000,          0x000,      0xDAF,      REVERSE,    ],
+    [   'crc-13-bbc',       'Crc13Bbc',         0x3CF5,         NON_REVERSE,    0x0000,         0x0000,     0x04FA,     ],
+    [   'crc-14-darc',      'Crc14Darc',        0x4805,         REVERSE,        0x0000,         0x0000,     0x082D,     ],
+    [   'crc-14-gsm',       'Crc14Gsm',         0x602D,         NON_REVERSE,    0x3FFF,         0x3FFF,     0x30AE,     ],
+    [   'crc-15',           'Crc15',            0xC599,         NON_REVERSE,    0x0000,         0x0000,     0x059E,     ],
+    [   'crc-15-mpt1327',   'Crc15Mpt1327',     0xE815,         NON_REVERSE,    0x0001,         0x0001,     0x2566,     ],
 
     [   'crc-16',           'Crc16',            0x18005,        REVERSE,        0x0000,         0x0000,     0xBB3D,     ],
     [   'crc-16-buypass',   'Crc16Buypass',     0x18005,        NON_REVERSE,    0x0000,         0x0000,     0xFEE8,     ],
@@ -79,10 +131,32 @@ _crc_definitions_table = [
     [   'kermit',           'CrcKermit',        0x11021,        REVERSE,        0x0000,         0x0000,     0x2189,     ],
     [   'crc-ccitt-false',  'CrcCcittFalse',    0x11021,        NON_REVERSE,    0xFFFF,         0x0000,     0x29B1,     ],
     [   'crc-aug-ccitt',    'CrcAugCcitt',      0x11021,        NON_REVERSE,    0x1D0F,         0x0000,     0xE5CC,     ],
+    [   'crc-16-a',         'Crc16A',           0x11021,        REVERSE,        0x6363,         0x0000,     0xBF05,     ],
+    [   'crc-16-cdma2000',  'Crc16Cdma2000',    0x1C867,        NON_REVERSE,    0xFFFF,         0x0000,     0x4C06,     ],
+    [   'crc-16-cms',       'Crc16Cms',         0x18005,        NON_REVERSE,    0xFFFF,         0x0000,     0xAEE7,     ],
+    [   'crc-16-gsm',       'Crc16Gsm',         0x11021,        NON_REVERSE,    0xFFFF,         0xFFFF,     0xCE3C,     ],
+    [   'crc-16-lj1200',    'Crc16Lj1200',      0x16F63,        NON_REVERSE,    0x0000,         0x0000,     0xBDF4,     ],
+    [   'crc-16-m17',       'Crc16M17',         0x15935,        NON_REVERSE,    0xFFFF,         0x0000,     0x772B,     ],
+    [   'crc-16-nrsc-5',    'Crc16Nrsc5',       0x1080B,        REVERSE,        0xFFFF,         0x0000,     0xA066,     ],
+    [   'crc-16-opensafety-a', 'Crc16OpensafetyA', 0x15935,        NON_REVERSE,    0x0000,         0x0000,     0x5D38,     ],
+    [   'crc-16-opensafety-b', 'Crc16OpensafetyB', 0x1755B,        NON_REVERSE,    0x0000,         0x0000,     0x20FE,     ],
+    [   'crc-16-profibus',  'Crc16Profibus',    0x11DCF,        NON_REVERSE,    0x0000,         0xFFFF,     0xA819,     ],
+    [   'crc-16-tms37157',  'Crc16Tms37157',    0x11021,        REVERSE,        0x3791,         0x0000,     0x26B1,     ],
+
+    [   'crc-17-can-fd',    'Crc17CanFd',       0x3685B,        NON_REVERSE,    0x00000,        0x00000,    0x04F03,    ],
+    [   'crc-21-can-fd',    'Crc21CanFd',       0x302899,       NON_REVERSE,    0x000000,       0x000000,   0x0ED841,   ],
 
     [   'crc-24',           'Crc24',            0x1864CFB,      NON_REVERSE,    0xB704CE,       0x000000,   0x21CF02,   ],
     [   'crc-24-flexray-a', 'Crc24FlexrayA',    0x15D6DCB,      NON_REVERSE,    0xFEDCBA,       0x000000,   0x7979BD,   ],
     [   'crc-24-flexray-b', 'Crc24FlexrayB',    0x15D6DCB,      NON_REVERSE,    0xABCDEF,       0x000000,   0x1F23B8,   ],
+    [   'crc-24-ble',       'Crc24Ble',         0x100065B,      REVERSE,        0xAAAAAA,       0x000000,   0xC25A56,   ],
+    [   'crc-24-interlaken', 'Crc24Interlaken',  0x1328B63,      NON_REVERSE,    0x000000,       0xFFFFFF,   0xB4F3E6,   ],
+    [   'crc-24-lte-a',     'Crc24LteA',        0x1864CFB,      NON_REVERSE,    0x000000,       0x000000,   0xCDE703,   ],
+    [   'crc-24-lte-b',     'Crc24LteB',        0x1800063,      NON_REVERSE,    0x000000,       0x000000,   0x23EF52,   ],
+    [   'crc-24-os-9',      'Crc24Os9',         0x1800063,      NON_REVERSE,    0x000000,       0xFFFFFF,   0x200FA5,   ],
+
+    [   'crc-30-cdma',      'Crc30Cdma',        0x6030B9C7,     NON_REVERSE,    0x00000000,     0x3FFFFFFF, 0x04C34ABF, ],
+    [   'crc-31-philips',   'Crc31Philips',     0x84C11DB7,     NON_REVERSE,    0x00000000,     0x7FFFFFFF, 0x0CE9E46C, ],
 
     [   'crc-32',           'Crc32',            0x104C11DB7,    REVERSE,        0x00000000,     0xFFFFFFFF, 0xCBF43926, ],
     [   'crc-32-bzip2',     'Crc32Bzip2',       0x104C11DB7,    NON_REVERSE,    0x00000000,     0xFFFFFFFF, 0xFC891918, ],
@@ -93,12 +167,25 @@ _crc_definitions_table = [
     [   'crc-32q',          'Crc32Q',           0x1814141AB,    NON_REVERSE,    0x00000000,     0x00000000, 0x3010BF7F, ],
     [   'jamcrc',           'CrcJamCrc',        0x104C11DB7,    REVERSE,        0xFFFFFFFF,     0x00000000, 0x340BC6D9, ],
     [   'xfer',             'CrcXfer',          0x1000000AF,    NON_REVERSE,    0x00000000,     0x00000000, 0xBD0BE338, ],
+    [   'crc-32-autosar',   'Crc32Autosar',     0x1F4ACFB13,    REVERSE,        0x00000000,     0xFFFFFFFF, 0x1697D06A, ],
+    [   'crc-32-cd-rom-edc', 'Crc32CdRomEdc',    0x18001801B,    REVERSE,        0x00000000,     0x00000000, 0x6EC2EDC4, ],
+    [   'crc-32-mef',       'Crc32Mef',         0x1741B8CD7,    REVERSE,        0xFFFFFFFF,     0x00000000, 0xD2C22F51, ],
+
+    [   'crc-40-gsm',       'Crc40Gsm',         0x10004820009,  NON_REVERSE,    0xFFFFFFFFFF,   0xFFFFFFFFFF, 0xD4164FC646, ],
 
 # 64-bit
 #       Name                Identifier-name,    Poly                    Reverse         Init-value          XOR-out             Check
     [   'crc-64',           'Crc64',            0x1000000000000001B,    REVERSE,        0x0000000000000000, 0x0000000000000000, 0x46A5A9388A5BEFFE, ],
     [   'crc-64-we',        'Crc64We',          0x142F0E1EBA9EA3693,    NON_REVERSE,    0x0000000000000000, 0xFFFFFFFFFFFFFFFF, 0x62EC59E3F1A4F00A, ],
     [   'crc-64-jones',     'Crc64Jones',       0x1AD93D23594C935A9,    REVERSE,        0xFFFFFFFFFFFFFFFF, 0x0000000000000000, 0xCAA717168609F281, ],
+    [   'crc-64-go-iso',    'Crc64GoIso',       0x1000000000000001B,    REVERSE,        0x0000000000000000, 0xFFFFFFFFFFFFFFFF, 0xB90956C775A41001, ],
+    [   'crc-64-ms',        'Crc64Ms',          0x1259C84CBA6426349,    REVERSE,        0xFFFFFFFFFFFFFFFF, 0x0000000000000000, 0x75D4B74F024ECEEA, ],
+    [   'crc-64-redis',     'Crc64Redis',       0x1AD93D23594C935A9,    REVERSE,        0x0000000000000000, 0x0000000000000000, 0xE9C6D914C4B8D9CA, ],
+    [   'crc-64-xz',        'Crc64Xz',          0x142F0E1EBA9EA3693,    REVERSE,        0x0000000000000000, 0xFFFFFFFFFFFFFFFF, 0x995DC9BBDF1939FA, ],
+
+# 82-bit
+#       Name                Identifier-name,    Poly                            Reverse         Init-value                  XOR-out                     Check
+    [   'crc-82-darc',      'Crc82Darc',        0x4308C0111011401440411,        REVERSE,        0x000000000000000000000,    0x000000000000000000000,    0x09EA83F625023801FD612,    ],
 ]
 
 
@@ -118,14 +205,22 @@ def _simplify_name(name):
     return name
 
 
+def _params_key(poly, initCrc, rev, xorOut, revOut=None):
+    (sizeBits, initCrc, xorOut) = _verifyParams(poly, initCrc, xorOut)
+    if revOut is None:
+        revOut = rev
+    return (poly, bool(rev), initCrc, xorOut, bool(revOut))
+
+
 _crc_definitions_by_name = {}
 _crc_definitions_by_identifier = {}
 _crc_definitions = []
 
-_crc_table_headings = [ 'name', 'identifier', 'poly', 'reverse', 'init', 'xor_out', 'check' ]
+_crc_table_headings = [ 'name', 'identifier', 'poly', 'reverse', 'init', 'xor_out', 'check', 'reverse_out' ]
 
 for table_entry in _crc_definitions_table:
     crc_definition = dict(zip(_crc_table_headings, table_entry))
+    crc_definition.setdefault('reverse_out', crc_definition['reverse'])
     _crc_definitions.append(crc_definition)
     name = _simplify_name(table_entry[0])
     if name in _crc_definitions_by_name:
@@ -143,19 +238,83 @@ def _get_definition_by_name(crc_name):
     return definition
 
 
+# The index by parameters is only needed by findPredefinedName, so it is built
+# on its first call rather than when the module is imported.
+_crc_definitions_by_params = None
+
+
+def _get_definitions_by_params():
+    global _crc_definitions_by_params
+    if _crc_definitions_by_params is None:
+        by_params = {}
+        for crc_definition in _crc_definitions:
+            # Several names may describe the same algorithm.  The first entry
+            # in the table is used as the canonical name.
+            params = _params_key(crc_definition['poly'], crc_definition['init'], crc_definition['reverse'], crc_definition['xor_out'], crc_definition['reverse_out'])
+            by_params.setdefault(params, crc_definition)
+        _crc_definitions_by_params = by_params
+    return _crc_definitions_by_params
+
+
+def findPredefinedName(poly, initCrc=~0, rev=True, xorOut=0, revOut=None):
+    '''Return the name of the predefined CRC algorithm using the specified
+    parameters, or None if there is no such algorithm.
+
+    The parameters have the same meaning as those of crcmod.mkCrcFun.
+    '''
+    definition = _get_definitions_by_params().get(_params_key(poly, initCrc, rev, xorOut, revOut), None)
+    if definition is None:
+        return None
+    return definition['name']
+
+
+# Functions and Crc prototypes are only built the first time a CRC algorithm is
+# requested, and are then reused.  Short-lived programs only pay for the tables
+# of the algorithms they actually use, and only once.  They are kept separately
+# for each backend that is forced.
+_crc_functions = {}
+_crc_prototypes = {}
+
+
+def _get_prototype(definition):
+    key = (definition['name'], _backend.get())
+    prototype = _crc_prototypes.get(key, None)
+    if prototype is None:
+        prototype = crcmod.Crc(poly=definition['poly'], initCrc=definition['init'], rev=definition['reverse'], xorOut=definition['xor_out'], revOut=definition['reverse_out'])
+        _crc_prototypes[key] = prototype
+    return prototype
+
+
 class PredefinedCrc(crcmod.Crc):
+    __slots__ = ()
+
     def __init__(self, crc_name):
         definition = _get_definition_by_name(crc_name)
-        super().__init__(poly=definition['poly'], initCrc=definition['init'], rev=definition['reverse'], xorOut=definition['xor_out'])
+        self._initFrom(_get_prototype(definition))
 
 
 # crcmod.predefined.Crc is an alias for crcmod.predefined.PredefinedCrc
 Crc = PredefinedCrc
 
 
+def new(crc_name, data=None):
+    '''Return a new PredefinedCrc instance for the named algorithm, like
+    hashlib.new.  If data is given, it is passed to the update method.
+    '''
+    crc = PredefinedCrc(crc_name)
+    if data is not None:
+        crc.update(data)
+    return crc
+
+
 def mkPredefinedCrcFun(crc_name):
     definition = _get_definition_by_name(crc_name)
-    return crcmod.mkCrcFun(poly=definition['poly'], initCrc=definition['init'], rev=definition['reverse'], xorOut=definition['xor_out'])
+    key = (definition['name'], _backend.get())
+    crcfun = _crc_functions.get(key, None)
+    if crcfun is None:
+        crcfun = crcmod.mkCrcFun(poly=definition['poly'], initCrc=definition['init'], rev=definition['reverse'], xorOut=definition['xor_out'], revOut=definition['reverse_out'])
+        _crc_functions[key] = crcfun
+    return crcfun
 
 
 # crcmod.predefined.mkCrcFun is an alias for crcmod.predefined.mkPredefinedCrcFun
@@ -0,0 +1,220 @@
+#-----------------------------------------------------------------------------
+# Copyright (c) 2010  Raymond L. Buvel
+# Copyright (c) 2010  Craig McQueen
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#-----------------------------------------------------------------------------
+'''
+crcmod.search recovers the parameters of an unknown CRC algorithm from
+samples of data and their CRC values.
+
+To use it, e.g.:
+    import crcmod.search
+
+    samples = [(b'...', 0x1234), (b'...', 0x5678), (b'...', 0x9ABC)]
+    for algorithm in crcmod.search.discover(samples, width=16):
+        print(algorithm)
+
+The search relies on the linearity of the CRC.  The XOR of two samples of the
+same length is the CRC of the XOR of their data with the initial and final XOR
+values cancelled out.  The polynomial must divide every such difference, so it
+is found from the greatest common divisor of the differences instead of trying
+every polynomial in turn.  The initial and final XOR values are then solved for
+each candidate polynomial as a linear system over GF(2).
+'''
+
+from crcmod.crcmod import mkCrcFun, _verifyPoly, _bitrev, _bitrevTable, _mkReflect
+from crcmod.predefined import findPredefinedName
+import crcmod.gf2 as gf2
+
+__all__ = [
+    'discover',
+]
+
+# Upper limit on the number of polynomials tried when the samples do not pin
+# down the polynomial on their own.
+_maxCandidates = 1 << 20
+
+#-----------------------------------------------------------------------------
+def discover(samples, width, xorOut=None):
+    '''Return a list of the CRC algorithms that produce the given samples.
+
+    samples -- A sequence of (data, crc) pairs.  At least two of the data
+    strings must have the same length.  A few more samples of that length help
+    to single out the polynomial, and samples of different lengths are needed
+    to tell the initial value and the final XOR value apart.
+
+    width -- The number of bits in the CRC.
+
+    xorOut -- The final XOR value if it is known.  If all the samples have the
+    same length and xorOut is not specified, it is assumed to be zero.
+
+    Each algorithm is returned as a dictionary with the keys 'poly', 'reverse',
+    'init', 'xor_out' and 'reverse_out', which have the same meaning as the
+    parameters of crcmod.mkCrcFun.  The 'name' key contains the name of the
+    matching crcmod.predefined algorithm, or None.
+    '''
+    _verifyPoly(1 << width)
+    mask = (1 << width) - 1
+
+    samples = [(bytes(memoryview(data)), crc & mask) for (data, crc) in samples]
+    reflect = _mkReflect(width)
+
+    results = []
+    for (rev, revOut) in ((False, False), (True, True), (False, True), (True, False)):
+        results.extend(_discover(samples, width, xorOut, rev, revOut, reflect))
+
+    # List the well-known algorithms first.
+    results.sort(key=lambda result: result['name'] is None)
+    return results
+
+#-----------------------------------------------------------------------------
+# Return the algorithms with the specified reflection of the data and of the
+# result that produce the samples.  When the result is reflected differently
+# from the data, the reflected CRC values come from an algorithm that reflects
+# both the same way, whose initial and final XOR values are the reflections of
+# those of the algorithm sought.  So the CRC values are reflected, and the
+# search is the same as for revOut == rev.
+
+def _discover(samples, width, xorOut, rev, revOut, reflect):
+    if revOut != rev:
+        samples = [(data, reflect(crc)) for (data, crc) in samples]
+        if xorOut is not None:
+            xorOut = reflect(xorOut & ((1 << width) - 1))
+    else:
+        reflect = lambda x: x
+
+    byLength = {}
+    for (data, crc) in samples:
+        byLength.setdefault(len(data), []).append((data, crc))
+
+    # Differences of samples with the same length, converted to the
+    # non-reflected form where the data bits are polynomial coefficients.
+    gcd = 0
+    for group in byLength.values():
+        (data0, crc0) = group[0]
+        for (data, crc) in group[1:]:
+            diff = bytes([a ^ b for (a, b) in zip(data0, data)])
+            crcDiff = crc0 ^ crc
+            if rev:
+                diff = diff.translate(_bitrevTable)
+                crcDiff = _bitrev(crcDiff, width)
+            gcd = gf2.gcd(gcd, (int.from_bytes(diff, 'big') << width) ^ crcDiff)
+
+    if gcd == 0:
+        raise ValueError('At least two different samples of the same length are required')
+
+    results = []
+    for poly in _divisors(gcd, width):
+        for (initCrc, xor) in _solveInit(poly, rev, samples, width, xorOut):
+            (initCrc, xor) = (reflect(initCrc), reflect(xor))
+            results.append({
+                'poly' : poly,
+                'reverse' : rev,
+                'init' : initCrc,
+                'xor_out' : xor,
+                'reverse_out' : revOut,
+                'name' : findPredefinedName(poly, initCrc, rev, xor, revOut),
+            })
+    return results
+
+#-----------------------------------------------------------------------------
+# Return the polynomials of the specified degree that divide g and have the x^0
+# term set.  The smaller of the two factors is enumerated.
+
+def _divisors(g, n):
+    k = g.bit_length() - 1 - n
+    if k < 0:
+        return []
+    if k == 0:
+        return [g] if g & 1 else []
+
+    polys = []
+    if k < n:
+        if (1 << k) > _maxCandidates:
+            raise ValueError('Too many candidate polynomials, more samples are required')
+        for q in range(1 << k, 1 << (k+1)):
+            (p, r) = gf2.divmodPoly(g, q)
+            if r == 0 and (p & 1):
+                polys.append(p)
+    else:
+        if (1 << (n-1)) > _maxCandidates:
+            raise ValueError('Too many candidate polynomials, more samples are required')
+        for p in range((1 << n) | 1, 1 << (n+1), 2):
+            if gf2.divmodPoly(g, p)[1] == 0:
+                polys.append(p)
+    return polys
+
+#-----------------------------------------------------------------------------
+# Find the initial and final XOR values for a known polynomial.  The CRC of a
+# sample is crc0(data) ^ xorOut ^ Z(init ^ xorOut) where crc0 uses zero initial
+# and final XOR values, and Z is the linear effect of the shift register
+# contents on the result after len(data) bytes.
+
+def _solveInit(poly, rev, samples, width, xorOut):
+    crc0 = mkCrcFun(poly, 0, rev, 0)
+
+    def zeroExtend(reg, n):
+        return crc0(bytes(n), reg)
+
+    (data1, crc1) = samples[0]
+    y1 = crc1 ^ crc0(data1)
+    cols1 = [zeroExtend(1 << i, len(data1)) for i in range(width)]
+    others = [(data, crc) for (data, crc) in samples if len(data) != len(data1)]
+
+    if xorOut is not None:
+        xor = xorOut & ((1 << width) - 1)
+        candidates = [(reg, xor) for reg in _gf2solve(cols1, y1 ^ xor)]
+    elif others:
+        # Eliminate xorOut using a sample of a different length.  Polynomials
+        # with a factor of (x+1) leave more than one solution.
+        (data2, crc2) = others[0]
+        y2 = crc2 ^ crc0(data2)
+        cols2 = [zeroExtend(1 << i, len(data2)) for i in range(width)]
+        candidates = [(reg, y1 ^ zeroExtend(reg, len(data1)))
+                      for reg in _gf2solve([a ^ b for (a, b) in zip(cols1, cols2)], y1 ^ y2)]
+    else:
+        candidates = [(reg, 0) for reg in _gf2solve(cols1, y1)]
+
+    results = []
+    for (reg, xor) in candidates:
+        initCrc = reg ^ xor
+        crcfun = mkCrcFun(poly, initCrc, rev, xor)
+        for (data, crc) in samples:
+            if crcfun(data) != crc:
+                break
+        else:
+            results.append((initCrc, xor))
+    return results
+
+#-----------------------------------------------------------------------------
+# Return a list of all the solutions x of the linear system
+# sum(x_i * cols[i]) == y.  The list is empty if there is no solution.
+
+def _gf2solve(cols, y):
+    (x, null) = gf2.solve(cols, y)
+    if x is None:
+        return []
+
+    if (1 << len(null)) > _maxCandidates:
+        raise ValueError('Too many candidate initial values, more samples are required')
+    solutions = [x]
+    for comb in null:
+        solutions.extend([v ^ comb for v in solutions])
+    return solutions
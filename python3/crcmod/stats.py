@@ -0,0 +1,176 @@
+#-----------------------------------------------------------------------------
+# Copyright (c) 2010  Raymond L. Buvel
+# Copyright (c) 2010  Craig McQueen
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#-----------------------------------------------------------------------------
+'''
+crcmod.stats counts the work done by CRC functions and Crc instances, to find
+the callers that spend their time on the overhead of many small calls and
+would gain from the batch function.
+
+To use it, e.g.:
+    import crcmod
+    import crcmod.stats
+
+    crc32 = crcmod.stats.instrument(crcmod.mkCrcFun(0x104C11DB7))
+    crc32(b'123456789')
+    crcmod.stats.getStats(crc32).asDict()
+
+instrument returns a separate instrumented object and leaves the original
+alone, so CRC functions and Crc instances that are not instrumented run
+exactly as fast as before.
+'''
+
+import time
+
+from crcmod.crcmod import Crc
+
+__all__ = [
+    'Stats',
+    'instrument',
+    'getStats',
+]
+
+#-----------------------------------------------------------------------------
+class Stats:
+    '''Counters of an instrumented CRC function.
+
+    calls -- The number of calls of the function and of its batch function.
+
+    bytes -- The number of bytes processed.
+
+    nanoseconds -- The time spent computing CRCs.
+
+    batchItems -- The number of buffers processed by the batch function.
+
+    sizes -- A histogram of the sizes of the buffers passed to the function
+    itself.  Element 0 counts empty buffers, and element i counts the buffers
+    of 2^(i-1) up to 2^i - 1 bytes.
+
+    The counters are updated without a lock, so calls made at the same time
+    from several threads may be missed.
+    '''
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        '''Set all of the counters to zero.'''
+        self.calls = 0
+        self.bytes = 0
+        self.nanoseconds = 0
+        self.batchItems = 0
+        self.sizes = []
+
+    def histogram(self):
+        '''Return a dictionary mapping the smallest size of each bucket of the
+        sizes histogram to its count.  Empty buckets are left out.
+        '''
+        return dict([(i and 1 << (i-1), n) for (i, n) in enumerate(self.sizes) if n])
+
+    def asDict(self):
+        '''Return the counters as a dictionary, e.g. for JSON.'''
+        return {
+            'calls' : self.calls,
+            'bytes' : self.bytes,
+            'nanoseconds' : self.nanoseconds,
+            'batchItems' : self.batchItems,
+            'histogram' : self.histogram(),
+        }
+
+    def _add(self, nbytes, nanoseconds):
+        self.calls += 1
+        self.bytes += nbytes
+        self.nanoseconds += nanoseconds
+        i = nbytes.bit_length()
+        sizes = self.sizes
+        if i >= len(sizes):
+            sizes.extend([0] * (i + 1 - len(sizes)))
+        sizes[i] += 1
+
+#-----------------------------------------------------------------------------
+def instrument(obj, callback=None):
+    '''Return an instrumented copy of a CRC function or Crc instance.
+
+    obj -- A function returned by crcmod.mkCrcFun, crcmod.predefined.mkCrcFun
+    or crcmod.jit.mkCrcFun, or a Crc instance.
+
+    callback -- A function called as callback(nbytes, nanoseconds) after each
+    call of the CRC function or its batch function, e.g. to feed a metrics
+    system.
+
+    A Crc instance is copied, including its current CRC value.  The instances
+    made from the copy with the new and copy methods share its counters.
+    '''
+    if isinstance(obj, Crc):
+        n = obj.copy()
+        n.algorithm = obj.algorithm._withFun(_instrumentFun(obj.algorithm.crcfun, callback))
+        return n
+    return _instrumentFun(obj, callback)
+
+def getStats(obj):
+    '''Return the Stats of an instrumented CRC function or Crc instance, or
+    None if it is not instrumented.
+    '''
+    if isinstance(obj, Crc):
+        obj = obj.algorithm.crcfun
+    return getattr(obj, 'stats', None)
+
+#-----------------------------------------------------------------------------
+# Return the number of bytes in an object supporting the buffer interface.
+
+def _nbytes(data):
+    if type(data) is bytes:
+        return len(data)
+    return memoryview(data).nbytes
+
+def _instrumentFun(fun, callback):
+    stats = Stats()
+    clock = time.perf_counter_ns
+
+    def crcfun(data, *args, **kwargs):
+        start = clock()
+        crc = fun(data, *args, **kwargs)
+        nanoseconds = clock() - start
+        nbytes = _nbytes(data)
+        stats._add(nbytes, nanoseconds)
+        if callback is not None:
+            callback(nbytes, nanoseconds)
+        return crc
+
+    batch = getattr(fun, 'batch', None)
+    if batch is not None:
+        def instrumentedBatch(datas, *args, **kwargs):
+            datas = list(datas)
+            start = clock()
+            crcs = batch(datas, *args, **kwargs)
+            nanoseconds = clock() - start
+            nbytes = sum([_nbytes(data) for data in datas])
+            stats.calls += 1
+            stats.bytes += nbytes
+            stats.nanoseconds += nanoseconds
+            stats.batchItems += len(datas)
+            if callback is not None:
+                callback(nbytes, nanoseconds)
+            return crcs
+        crcfun.batch = instrumentedBatch
+
+    crcfun.backend = fun.backend
+    crcfun.stats = stats
+    return crcfun
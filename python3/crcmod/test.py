@@ -27,12 +27,32 @@ import unittest
 
 from array import array
 import binascii
-
-from .crcmod import mkCrcFun, Crc
-from .crcmod import _usingExtension
+import hashlib
+import io
+import itertools
+import json
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+from .crcmod import mkCrcFun, Crc, CrcAlgorithm, forge, backends, useBackend
+from .crcmod import _usingExtension, _getTable
+from .crcmod import _mkSliceTables, _mkNibbleTable, _mkTable, _mkTable_r
 from .predefined import PredefinedCrc
 from .predefined import mkPredefinedCrcFun
+from .predefined import findPredefinedName
+from . import predefined
 from .predefined import _crc_definitions as _predefined_crc_definitions
+from .search import discover
+from . import analysis
+from . import bench
+from . import gf2
+from . import stats
+from . import jit
 
 
 #-----------------------------------------------------------------------------
@@ -337,6 +357,37 @@ class CompareReferenceCrcTest(unittest.TestCase):
             for msg in self.test_messages:
                 self.assertEqual(crcfun(msg), crc_poly_fun(msg))
 
+    def test_compare_poly_widths(self):
+        """Compare CRCs of widths other than 8, 16, 24, 32 and 64 bits to the
+        polynomial-based implementation.  The reflected algorithm is the same
+        as the forward algorithm applied to bit reversed bytes, with the result
+        bit reversed."""
+        def bitrev(x, n):
+            return int(format(x, '0%db' % n)[::-1], 2)
+
+        for g in [0xB, 0x25, 0x89, 0x633, 0xC599, 0x3685B, 0x84C11DB7,
+                  0x10004820009, (1 << 63) | 0x3, 0x4308C0111011401440411,
+                  (1 << 128) | 0x87]:
+            n = g.bit_length() - 1
+            gp = poly(g)
+            xp = poly(1 << n)
+            def crcp(d):
+                p = 0
+                for i in d:
+                    p = p*256 + i
+                return int(poly(p)*xp%gp)
+
+            crcfun = mkCrcFun(g, 0, False)
+            crcfun_r = mkCrcFun(g, 0, True)
+            for msg in self.test_messages:
+                self.assertEqual(crcfun(msg), crcp(msg))
+                rmsg = bytes([bitrev(i, 8) for i in msg])
+                self.assertEqual(crcfun_r(msg), bitrev(crcp(rmsg), n))
+            self.assertEqual(Crc(g).digest_size, (n + 7)//8)
+
+        self.assertRaises(ValueError, mkCrcFun, 1)
+        self.assertRaises(ValueError, mkCrcFun, 1 << 129)
+
 
 class CrcClassTest(unittest.TestCase):
     """Verify the Crc class"""
@@ -393,6 +444,16 @@ crcValue = 0x00000000'''
         self.assertEqual(crc.crcValue, 0x84BFF58)
         self.assertEqual(crc.digest(), b'\x08\x4b\xff\x58')
         self.assertEqual(crc.hexdigest(), '084BFF58')
+        self.assertEqual(crc.intdigest(), 0x84BFF58)
+        self.assertEqual(crc.digest('little'), b'\x58\xff\x4b\x08')
+        self.assertEqual(crc.hexdigest('little'), '58FF4B08')
+        frame = bytearray(b'..\x00\x00\x00\x00.')
+        self.assertEqual(crc.digestInto(frame, 2), 4)
+        self.assertEqual(frame, b'..\x08\x4b\xff\x58.')
+        crc.digestInto(memoryview(frame)[1:], 0, 'little')
+        self.assertEqual(frame, b'.\x58\xff\x4b\x08\x58.')
+        self.assertRaises(ValueError, crc.digestInto, frame, 4)
+        self.assertRaises(TypeError, crc.digestInto, bytes(frame))
 
         # Verify the .copy() method
         x = crc.copy()
@@ -418,6 +479,293 @@ xorOut   = 0xFFFFFFFF
 crcValue = 0x00000000'''
         self.assertEqual(str(y), str_rep)
 
+    def test_reverse_out(self):
+        """Verify a CRC whose result is reflected differently from the data"""
+        def bitrev(x, n):
+            return int(format(x, '0%db' % n)[::-1], 2)
+
+        for (poly, n) in [(g8, 8), (0x180F, 12), (g32, 32), (0x4308C0111011401440411, 82)]:
+            for rev in (False, True):
+                reg = mkCrcFun(poly, initCrc=0x5A, rev=rev)
+                crcfun = mkCrcFun(poly, initCrc=bitrev(0x5A, n) ^ 0x33, rev=rev, xorOut=0x33, revOut=not rev)
+                self.assertEqual(crcfun(b''), bitrev(0x5A, n) ^ 0x33)
+                self.assertEqual(crcfun(self.msg), bitrev(reg(self.msg), n) ^ 0x33)
+                self.assertEqual(crcfun(self.msg[4:], crcfun(self.msg[:4])), crcfun(self.msg))
+
+        crc = Crc(0x180F, initCrc=0, rev=False, revOut=True)
+        self.assertEqual(crc.reverse, False)
+        self.assertEqual(crc.reverseOut, True)
+        self.assertTrue('reverseOut = True' in str(crc))
+        x = crc.new(b'123456789')
+        self.assertEqual(x.reverseOut, True)
+        self.assertEqual(x.crcValue, 0xDAF)
+        self.assertEqual(x.copy().crcValue, 0xDAF)
+        self.assertEqual(Crc(g32).reverseOut, True)
+
+    def test_update_bits(self):
+        """Verify the CRC of data that is not a whole number of bytes"""
+        def bitwise(crc, data, nbits, offset):
+            # Shift the bits one at a time through a non-reflected register.
+            n = crc.poly.bit_length() - 1
+            mask = (1 << n) - 1
+            reg = crc.crcValue ^ crc.xorOut
+            if crc.reverseOut:
+                reg = int(format(reg, '0%db' % n)[::-1], 2)
+            for i in range(offset, offset+nbits):
+                if crc.reverse:
+                    bit = (data[i//8] >> (i%8)) & 1
+                else:
+                    bit = (data[i//8] >> (7 - i%8)) & 1
+                msb = (reg >> (n-1)) ^ bit
+                reg = (reg << 1) & mask
+                if msb:
+                    reg ^= crc.poly & mask
+            if crc.reverseOut:
+                reg = int(format(reg, '0%db' % n)[::-1], 2)
+            return reg ^ crc.xorOut
+
+        for (poly, n) in [(g8, 8), (0x25, 5), (0x180F, 12), (g32, 32), (g64a, 64),
+                          (0x4308C0111011401440411, 82)]:
+            for (rev, revOut) in [(False, False), (True, True), (False, True), (True, False)]:
+                crc = Crc(poly, initCrc=0x5A, rev=rev, xorOut=0x33, revOut=revOut)
+                for (nbits, offset) in [(0, 0), (3, 0), (8, 0), (13, 0), (5, 3), (1, 7),
+                                        (20, 5), (120, 6), (8*len(self.msg), 0)]:
+                    x = crc.new()
+                    x.updateBits(self.msg, nbits, offset)
+                    self.assertEqual(x.crcValue, bitwise(crc, self.msg, nbits, offset))
+
+                # Splitting the bits anywhere gives the same result.
+                x = crc.new()
+                x.updateBits(self.msg, 11)
+                x.updateBits(self.msg, 50, 11)
+                x.updateBits(bytearray(self.msg), 8*len(self.msg) - 61, 61)
+                self.assertEqual(x.crcValue, crc.new(self.msg).crcValue)
+
+        crc = Crc(g32)
+        self.assertRaises(ValueError, crc.updateBits, b'12', 17)
+        self.assertRaises(ValueError, crc.updateBits, b'12', 10, 7)
+        self.assertRaises(ValueError, crc.updateBits, b'12', -1)
+
+    def test_correct(self):
+        """Verify the correction of bit errors"""
+        def flip(data, bit):
+            data = bytearray(data)
+            data[bit//8] ^= 1 << (bit%8)
+            return bytes(data)
+
+        for crc in [Crc(g32, initCrc=0, xorOut=~0), Crc(g16, rev=False),
+                    Crc(0x180F, initCrc=0, rev=False, revOut=True), Crc(0x180F, rev=True)]:
+            received = crc.new(self.msg).crcValue
+            self.assertEqual(crc.correct(self.msg, received), self.msg)
+            for bit in range(8*len(self.msg)):
+                self.assertEqual(crc.correct(flip(self.msg, bit), received), self.msg)
+            for i in range(crc.poly.bit_length() - 1):
+                self.assertEqual(crc.correct(self.msg, received ^ (1 << i)), self.msg)
+
+            # The data follows whatever has been passed to update.
+            x = crc.new(self.msg[:5])
+            self.assertEqual(x.correct(flip(self.msg[5:], 3), received), self.msg[5:])
+
+        crc = Crc(g32, initCrc=0, xorOut=~0)
+        received = crc.new(self.msg).crcValue
+        for (a, b) in [(0, 1), (3, 100), (64, 135), (7, 8*len(self.msg) + 5)]:
+            damaged = flip(self.msg, a)
+            if b < 8*len(self.msg):
+                damaged = flip(damaged, b)
+                self.assertEqual(crc.correct(damaged, received, maxBits=2), self.msg)
+            else:
+                self.assertEqual(crc.correct(damaged, received ^ (1 << (b - 8*len(self.msg))),
+                                             maxBits=2), self.msg)
+            self.assertRaises(ValueError, crc.correct, flip(damaged, 50), received)
+        self.assertRaises(ValueError, crc.correct, self.msg, received, maxBits=3)
+
+        # x^3+x+1 only tells 7 positions apart.
+        crc = Crc(0xB, initCrc=0, rev=False)
+        self.assertRaises(ValueError, crc.correct, flip(b'\x12\x34', 3), crc.new(b'\x12\x34').crcValue)
+
+    def test_algorithm(self):
+        """Instances share an immutable CrcAlgorithm and only hold the CRC value"""
+        crc = Crc(g32)
+        self.assertFalse(hasattr(crc, '__dict__'))
+        self.assertFalse(hasattr(PredefinedCrc('crc-32'), '__dict__'))
+        self.assertRaises(AttributeError, setattr, crc, 'name', 'x')
+        self.assertRaises(AttributeError, setattr, crc, 'poly', g16)
+
+        self.assertTrue(Crc(g32).algorithm is crc.algorithm)
+        self.assertTrue(crc.new().algorithm is crc.algorithm)
+        self.assertTrue(crc.copy().algorithm is crc.algorithm)
+        self.assertFalse(Crc(g32, initCrc=0).algorithm is crc.algorithm)
+
+        algorithm = crc.algorithm
+        self.assertRaises(AttributeError, setattr, algorithm, 'poly', g16)
+        self.assertRaises(AttributeError, delattr, algorithm, 'table')
+        self.assertEqual(algorithm.poly, g32)
+        self.assertEqual(algorithm.initCrc, 0xFFFFFFFF)
+        self.assertEqual(algorithm.digest_size, 4)
+        self.assertEqual(algorithm.crcfun(self.msg), mkCrcFun(g32)(self.msg))
+
+        algorithm = CrcAlgorithm(g16, 0, False)
+        crc = algorithm.new(self.msg)
+        self.assertTrue(crc.algorithm is algorithm)
+        self.assertEqual(crc.crcValue, Crc(g16, 0, False).new(self.msg).crcValue)
+        self.assertEqual(crc.reverse, False)
+
+    def test_table(self):
+        """The table is a read-only view of the table used by the kernels"""
+        for (poly, rev) in [(g8, False), (g16, True), (g24, False), (g32, True),
+                            (g64a, False), (0x180F, False), (0x10007, True),
+                            (0x10000000000000000000000000000008B, True)]:
+            n = poly.bit_length() - 1
+            crc = Crc(poly, rev=rev)
+            if rev:
+                expected = _mkTable_r(poly, n)
+            else:
+                size = [size for size in (8, 16, 24, 32, 64, 128) if size >= n][0]
+                expected = _mkTable(poly << (size - n), size)
+            self.assertEqual(len(crc.table), 256)
+            self.assertEqual(list(crc.table), expected)
+            self.assertEqual(crc.table.tolist(), expected)
+            self.assertEqual(crc.table[-1], expected[-1])
+            with self.assertRaises(TypeError):
+                crc.table[1] = 0
+            self.assertRaises(IndexError, crc.table.__getitem__, 256)
+
+    def test_table_cache(self):
+        """The tables are shared, and only a bounded number of them are kept"""
+        self.assertTrue(Crc(g16, 0).table is Crc(g16, 0xFFFF).table)
+        crcfun = mkCrcFun(g8, initCrc=0, rev=False)
+        for k in range(1, 2*_getTable.cache_info().maxsize):
+            mkCrcFun((1 << 32) | (k << 1) | 1)
+        self.assertLessEqual(_getTable.cache_info().currsize, _getTable.cache_info().maxsize)
+        self.assertEqual(crcfun(b'123456789'), crc8p(b'123456789'))
+
+    def test_state(self):
+        """The state can be saved and restored to continue a calculation"""
+        for crc in [Crc(g32), Crc(g16, 0, False), Crc(0x180F, 0, False, revOut=True),
+                    PredefinedCrc('crc-82-darc')]:
+            crc.update(self.msg[:5])
+            state = crc.getstate(5)
+            self.assertEqual(state[0], 1)
+            self.assertEqual(state[-2], crc.crcValue)
+            (restored, length) = Crc.fromstate(state)
+            self.assertEqual(length, 5)
+            self.assertTrue(restored.algorithm is crc.algorithm)
+            restored.update(self.msg[5:])
+            self.assertEqual(restored.crcValue, crc.new(self.msg).crcValue)
+
+            restored = pickle.loads(pickle.dumps(crc))
+            self.assertTrue(type(restored) is type(crc))
+            self.assertTrue(restored.algorithm is crc.algorithm)
+            self.assertEqual(restored.crcValue, crc.crcValue)
+
+        state = Crc(g8).getstate()
+        self.assertEqual(Crc.fromstate(state)[1], None)
+        self.assertRaises(ValueError, Crc.fromstate, state[:6] + (0x100, None))
+        self.assertRaises(ValueError, Crc.fromstate, (2,) + state[1:])
+        self.assertRaises(ValueError, Crc.fromstate, state[1:])
+        self.assertRaises(ValueError, Crc.fromstate, ())
+
+    def test_forge(self):
+        """Verify forcing the CRC to a target value by changing a field"""
+        data = self.msg * 20
+        for crc in [Crc(g32, initCrc=0, xorOut=~0), Crc(g16, rev=False), Crc(g64a),
+                    Crc(0x180F, initCrc=0, rev=False, revOut=True), Crc(0x25, rev=False),
+                    Crc(polyFromBits([82, 1, 0]))]:
+            n = crc.digest_size
+            target = 0x123456789ABCDEF0123 & ((1 << (crc.poly.bit_length() - 1)) - 1)
+            for offset in (0, 17, len(data) - n):
+                forged = forge(crc, data, offset, target)
+                self.assertEqual(crc.new(forged).crcValue, target)
+                self.assertEqual(forged[:offset], data[:offset])
+                self.assertEqual(forged[offset+n:], data[offset+n:])
+
+            # The data follows whatever has been passed to update.
+            x = crc.new(self.msg)
+            self.assertEqual(crc.new(self.msg + forge(x, data, 5, target)).crcValue, target)
+
+        crc = Crc(g32)
+        self.assertRaises(ValueError, forge, crc, data, len(data) - 3, 0)
+        self.assertRaises(ValueError, forge, crc, data, -1, 0)
+
+
+class CodeGenerationTest(unittest.TestCase):
+    """Verify the variants of the C code generator"""
+
+    def test_slice_tables(self):
+        for (poly, rev) in [(g8, False), (g16, True), (g24, False), (g32, True), (g64a, False)]:
+            crc = Crc(poly, initCrc=0, rev=rev)
+            crcfun = mkCrcFun(poly, initCrc=0, rev=rev)
+            tables = _mkSliceTables(crc.table, 4, rev, 8*crc.digest_size)
+            self.assertEqual(tables[0], list(crc.table))
+            for k in range(4):
+                for i in (0, 1, 0x80, 0xA5, 0xFF):
+                    self.assertEqual(tables[k][i], crcfun(bytes([i]) + bytes(k)))
+
+    def test_nibble_table(self):
+        for (poly, rev) in [(g8, False), (g16, True), (g24, False), (g32, True), (g64a, False)]:
+            crc = Crc(poly, initCrc=0, rev=rev)
+            n = 8*crc.digest_size
+            mask = (1 << n) - 1
+            table = _mkNibbleTable(crc.table, rev)
+            for (reg, b) in [(0, 0x5A), (mask, 0x00), (0x1234 & mask, 0xC3), (mask // 3, 0xFF)]:
+                # Two nibble steps, as in the generated code.
+                x = reg
+                if rev:
+                    x = table[(x ^ b) & 0xF] ^ (x >> 4)
+                    x = table[(x ^ (b >> 4)) & 0xF] ^ (x >> 4)
+                else:
+                    x = table[((x >> (n-4)) ^ (b >> 4)) & 0xF] ^ ((x << 4) & mask)
+                    x = table[((x >> (n-4)) ^ b) & 0xF] ^ ((x << 4) & mask)
+                self.assertEqual(x, crc._crc(bytes([b]), reg))
+
+    def test_generate_code_variants(self):
+        crc = Crc(g32, initCrc=0, xorOut=~0)
+
+        out = io.StringIO()
+        crc.generateCode('crc32', out)
+        self.assertTrue('static const UINT32 table[256] = {' in out.getvalue())
+
+        out = io.StringIO()
+        crc.generateCode('crc32', out, table='slice8', unroll=2, align=64)
+        code = out.getvalue()
+        self.assertTrue('static const UINT32 crc32_table[8][256] __attribute__((aligned(64))) = {' in code)
+        self.assertTrue('while (len >= 16)' in code)
+        self.assertEqual(code.count('data += 8;'), 2)
+
+        out = io.StringIO()
+        crc.generateCode('crc32', out, streaming=True)
+        code = out.getvalue()
+        for name in ('crc32_init(void)', 'crc32_update(const UINT8 *data', 'crc32_finalize(UINT32 crc)'):
+            self.assertTrue(name in code)
+        self.assertTrue('return 0xFFFFFFFFU;' in code)
+
+        out = io.StringIO()
+        crc.generateCode('crc32', out, table='nibble')
+        code = out.getvalue()
+        self.assertTrue('static const UINT32 crc32_table[16] = {' in code)
+        self.assertEqual(code.count('U,'), 16)
+
+        out = io.StringIO()
+        crc.generateCode('crc32', out, table='bitwise')
+        code = out.getvalue()
+        self.assertFalse('table' in code)
+        self.assertTrue('0xEDB88320U' in code)
+
+        out = io.StringIO()
+        Crc(0x180F, initCrc=0, rev=False).generateCode('crc12', out)
+        code = out.getvalue()
+        self.assertTrue('crc = crc << 4;' in code)
+        self.assertTrue('crc = crc >> 4;' in code)
+
+        out = io.StringIO()
+        Crc((1 << 128) | 0x87, initCrc=0).generateCode('crc128', out)
+        code = out.getvalue()
+        self.assertTrue('static const UINT128 table[256] = {' in code)
+        self.assertTrue('(((UINT128)0x0000000000000000ULL << 64) | 0x0000000000000000ULL),' in code)
+
+        self.assertRaises(ValueError, crc.generateCode, 'crc32', out, table='slice3')
+        self.assertRaises(ValueError, crc.generateCode, 'crc32', out, unroll=0)
+
 
 class PredefinedCrcTest(unittest.TestCase):
     """Verify the predefined CRCs"""
@@ -479,6 +827,74 @@ class PredefinedCrcTest(unittest.TestCase):
             self.assertEqual(crc1.crcValue, table_entry['check'], "Wrong answer for CRC '%s'" % table_entry['name'])
 
 
+    def test_predefined_reuse(self):
+        """Functions and tables of predefined CRCs are built once and shared."""
+        crcfun = mkPredefinedCrcFun('crc-32')
+        self.assertTrue(mkPredefinedCrcFun('CRC32') is crcfun)
+        self.assertTrue(mkPredefinedCrcFun('Crc32') is crcfun)
+
+        crc1 = PredefinedCrc('crc-32')
+        crc1.update(b'123456789')
+        crc2 = PredefinedCrc('crc32')
+        self.assertTrue(crc1.table is crc2.table)
+        self.assertEqual(crc2.crcValue, 0x00000000)
+        self.assertEqual(crc1.crcValue, 0xCBF43926)
+        self.assertTrue(Crc(0x104C11DB7, 0, True, 0xFFFFFFFF).table is crc1.table)
+
+
+    def test_find_predefined_name(self):
+        for table_entry in _predefined_crc_definitions:
+            name = findPredefinedName(table_entry['poly'], table_entry['init'], table_entry['reverse'], table_entry['xor_out'], table_entry['reverse_out'])
+            self.assertEqual(name, table_entry['name'])
+        self.assertEqual(findPredefinedName(0x180F, initCrc=0, rev=False, revOut=True), 'crc-12-umts')
+        self.assertEqual(findPredefinedName(0x180F, initCrc=0, rev=False), 'crc-12-dect')
+        self.assertEqual(findPredefinedName(0x104C11DB7, initCrc=0, xorOut=~0), 'crc-32')
+        self.assertEqual(findPredefinedName(0x11021, initCrc=0, rev=False), 'xmodem')
+        self.assertEqual(findPredefinedName(0x11021, initCrc=0x1234, rev=False), None)
+        self.assertRaises(ValueError, findPredefinedName, 0x1)
+
+
+    def test_hashlib_interface(self):
+        crc = predefined.new('CRC32', b'123456789')
+        self.assertEqual(crc.name, 'crc-32')
+        self.assertEqual(crc.new().name, 'crc-32')
+        self.assertEqual(crc.block_size, 1)
+        self.assertEqual(crc.hexdigest(), 'CBF43926')
+        self.assertEqual(PredefinedCrc('crc-ccitt-false').name, 'crc-ccitt-false')
+        self.assertEqual(Crc(0x11021, 0, False).name, 'xmodem')
+        self.assertEqual(Crc(0x1234F).name, 'crc-0x1234F')
+
+        # The name is looked up once per algorithm.
+        oldFind = predefined.findPredefinedName
+        try:
+            predefined.findPredefinedName = None
+            self.assertEqual(crc.copy().name, 'crc-32')
+            self.assertEqual(crc.algorithm._withFun(crc.algorithm.crcfun).name, 'crc-32')
+        finally:
+            predefined.findPredefinedName = oldFind
+
+        data = bytes(range(256)) * 2000
+        expected = predefined.new('crc-32c', data).crcValue
+        crc = PredefinedCrc('crc-32c')
+        crc.update(data[:1000])
+        stream = io.BytesIO(data)
+        stream.seek(1000)
+        self.assertEqual(crc.updateFile(stream), len(data) - 1000)
+        self.assertEqual(crc.crcValue, expected)
+        stream.write(b'more')
+
+        with tempfile.TemporaryFile() as f:
+            f.write(data)
+            f.seek(0)
+            crc = PredefinedCrc('crc-32c')
+            self.assertEqual(crc.updateFile(f), len(data))
+            self.assertEqual(crc.crcValue, expected)
+            if hasattr(hashlib, 'file_digest'):
+                f.seek(0)
+                crc = hashlib.file_digest(f, lambda: PredefinedCrc('crc-32c'))
+                self.assertEqual(crc.crcValue, expected)
+
+
 class InputTypesTest(unittest.TestCase):
     """Check the various input types that CRC functions can accept."""
 
@@ -530,6 +946,423 @@ class InputTypesTest(unittest.TestCase):
                 crcfun("123456789")
 
 
+class BackendTest(unittest.TestCase):
+    """Verify the reporting and forcing of backends"""
+
+    msg = b'123456789' * 200
+
+    def test_backends(self):
+        fast = 'table' if _usingExtension else 'python'
+        self.assertEqual(backends(), ['table', 'python'] if _usingExtension else ['python'])
+        self.assertEqual(mkCrcFun(g8).backend, fast)
+        self.assertEqual(mkCrcFun(g32, initCrc=0, xorOut=0xFFFFFFFF).backend, 'binascii')
+        self.assertEqual(mkCrcFun(g16, rev=False).backend, fast if _usingExtension else 'binascii')
+        self.assertEqual(Crc(g64a, revOut=False).backend, fast)
+
+    def test_use_backend(self):
+        for name in backends():
+            for (poly, rev) in [(g8, True), (g16, False), (g32, True), (g64a, False)]:
+                expected = mkCrcFun(poly, rev=rev, xorOut=0x5A)
+                with useBackend(name):
+                    crcfun = mkCrcFun(poly, rev=rev, xorOut=0x5A)
+                    crc = Crc(poly, rev=rev, xorOut=0x5A)
+                    predefined = PredefinedCrc('crc-32')
+                self.assertEqual(crcfun.backend, name)
+                self.assertEqual(crc.new().backend, name)
+                self.assertEqual(predefined.backend, name)
+                self.assertEqual(crcfun(self.msg), expected(self.msg))
+                self.assertEqual(crcfun.batch([self.msg, b'']), expected.batch([self.msg, b'']))
+                self.assertEqual(crc.new(self.msg).crcValue, expected(self.msg))
+            self.assertEqual(PredefinedCrc('crc-32').backend, 'binascii')
+
+        self.assertRaises(ValueError, useBackend('slice16').__enter__)
+        if not _usingExtension:
+            self.assertRaises(ValueError, useBackend('table').__enter__)
+
+    def test_environment(self):
+        env = dict(os.environ, CRCMOD_BACKEND='python',
+                   PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        out = subprocess.check_output([sys.executable, '-c',
+                                       'import crcmod; print(crcmod.mkCrcFun(0x104C11DB7).backend)'],
+                                      env=env)
+        self.assertEqual(out.strip(), b'python')
+
+        # A bad value is reported without stopping the import.
+        env['CRCMOD_BACKEND'] = 'bogus'
+        result = subprocess.run([sys.executable, '-c',
+                                 'import crcmod; print(crcmod.mkCrcFun(0x11021).backend)'],
+                                env=env, capture_output=True)
+        self.assertEqual(result.returncode, 0)
+        self.assertIn(b'Ignoring CRCMOD_BACKEND', result.stderr)
+        self.assertIn(result.stdout.strip(), [b'table', b'binascii'])
+
+
+class StatsTest(unittest.TestCase):
+    """Verify the instrumentation of CRC functions and Crc instances"""
+
+    def test_function(self):
+        calls = []
+        plain = mkCrcFun(g16, rev=False)
+        crcfun = stats.instrument(plain, lambda nbytes, ns: calls.append(nbytes))
+        self.assertEqual(stats.getStats(plain), None)
+        self.assertEqual(crcfun.backend, plain.backend)
+
+        for data in (b'', b'1', b'123456789', bytearray(1000), array('I', [1, 2])):
+            self.assertEqual(crcfun(data), plain(data))
+        self.assertEqual(crcfun(b'123', crc=5), plain(b'123', 5))
+        self.assertEqual(crcfun.batch([b'12', b'345'], 7), plain.batch([b'12', b'345'], 7))
+
+        s = stats.getStats(crcfun)
+        self.assertEqual(s.calls, 7)
+        self.assertEqual(s.bytes, 0 + 1 + 9 + 1000 + 8 + 3 + 5)
+        self.assertEqual(s.batchItems, 2)
+        self.assertEqual(s.histogram(), {0: 1, 1: 1, 2: 1, 8: 2, 512: 1})
+        self.assertEqual(calls, [0, 1, 9, 1000, 8, 3, 5])
+        self.assertTrue(s.nanoseconds > 0)
+        self.assertEqual(s.asDict()['bytes'], s.bytes)
+        s.reset()
+        self.assertEqual(s.asDict(), {'calls': 0, 'bytes': 0, 'nanoseconds': 0,
+                                      'batchItems': 0, 'histogram': {}})
+
+    def test_crc_class(self):
+        crc = Crc(g32)
+        crc.update(b'1234')
+        counted = stats.instrument(crc)
+        counted.update(b'56789')
+        self.assertEqual(counted.crcValue, crc.new(b'123456789').crcValue)
+        counted.new(b'123').copy().update(b'45')
+        self.assertEqual(stats.getStats(counted).calls, 3)
+        self.assertEqual(stats.getStats(counted).bytes, 10)
+        self.assertEqual(stats.getStats(crc), None)
+
+
+class BatchTest(unittest.TestCase):
+    """Verify the interleaved kernels used for large buffers and batches."""
+
+    check_crc_names = [
+        'crc-5-usb',
+        'crc-8',
+        'crc-12-dect',
+        'crc-16',
+        'xmodem',
+        'crc-24',
+        'crc-32',
+        'posix',
+        'crc-40-gsm',
+        'crc-64',
+        'crc-64-we',
+        'crc-82-darc',
+        'crc-12-umts',
+    ]
+
+    data = bytes([(i*i + 7*i + (i >> 8)) & 0xFF for i in range(5000)])
+
+    def test_large_buffer(self):
+        """The CRC of a large buffer is the same as when it is fed in pieces
+        too small to be split."""
+        for crc_name in self.check_crc_names:
+            crcfun = mkPredefinedCrcFun(crc_name)
+            for length in (1023, 1024, 1027, 4099, 5000):
+                crc = crcfun(b'')
+                for i in range(0, length, 500):
+                    crc = crcfun(self.data[i:min(i+500, length)], crc)
+                self.assertEqual(crcfun(self.data[:length]), crc)
+                self.assertEqual(crcfun(bytearray(self.data[:length]), 0x15), crcfun(self.data[:length], 0x15))
+
+    def test_batch(self):
+        lengths = [0, 1, 5, 100, 1500, 3, 3000, 0, 17, 4, 2, 1]
+        for crc_name in self.check_crc_names:
+            crcfun = mkPredefinedCrcFun(crc_name)
+            for n in range(len(lengths) + 1):
+                datas = [self.data[i:i+length] for (i, length) in enumerate(lengths[:n])]
+                self.assertEqual(crcfun.batch(datas), [crcfun(data) for data in datas])
+                self.assertEqual(crcfun.batch(datas, 0x15), [crcfun(data, 0x15) for data in datas])
+            self.assertEqual(crcfun.batch((b'123', bytearray(b'456789'), array('B', b'0'))),
+                             [crcfun(b'123'), crcfun(b'456789'), crcfun(b'0')])
+            self.assertRaises(TypeError, crcfun.batch, [b'123', "456789"])
+
+    def test_threads(self):
+        """Buffers large enough for the GIL to be released give the same CRCs
+        when computed by several threads at once."""
+        data = self.data * 5
+        crcfuns = [mkPredefinedCrcFun(crc_name) for crc_name in self.check_crc_names]
+        expected = [crcfun(data) for crcfun in crcfuns]
+        results = []
+        def work():
+            for i in range(10):
+                results.append([crcfun(data) for crcfun in crcfuns])
+        threads = [threading.Thread(target=work) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [expected] * 40)
+
+
+class SearchTest(unittest.TestCase):
+    """Verify recovery of CRC parameters from samples"""
+
+    test_messages = [
+        b'CatMouse987654321',
+        b'123456789abcdefgh',
+        b'The quick brown f',
+        b'T',
+        b'123456789',
+    ]
+
+    check_crc_names = [
+        'crc-8-maxim',
+        'xmodem',
+        'modbus',
+        'crc-24',
+        'crc-32',
+        'crc-32-mpeg',
+        'crc-64-jones',
+        'crc-12-umts',
+    ]
+
+    def test_discover_predefined(self):
+        for crc_name in self.check_crc_names:
+            crc = PredefinedCrc(crc_name)
+            crcfun = mkPredefinedCrcFun(crc_name)
+            samples = [(msg, crcfun(msg)) for msg in self.test_messages]
+            results = discover(samples, width=crc.poly.bit_length() - 1)
+            self.assertEqual(results[0]['name'], crc_name)
+            for result in results:
+                self.assertEqual(result['poly'], crc.poly)
+                self.assertEqual(result['reverse'], crc.reverse)
+                self.assertEqual(result['reverse_out'], crc.reverseOut)
+                check = mkCrcFun(result['poly'], result['init'], result['reverse'], result['xor_out'],
+                                 revOut=result['reverse_out'])
+                for (msg, value) in samples:
+                    self.assertEqual(check(msg), value)
+
+    def test_discover_known_xor_out(self):
+        crcfun = mkCrcFun(g16, initCrc=0x1234, rev=False, xorOut=0xFFFF)
+        samples = [(msg, crcfun(msg)) for msg in self.test_messages[:3]]
+        results = discover(samples, width=16, xorOut=0xFFFF)
+        self.assertEqual([(r['poly'], r['reverse'], r['init'], r['xor_out']) for r in results],
+                         [(g16, False, 0x1234, 0xFFFF)])
+
+    def test_discover_errors(self):
+        samples = [(msg, 0) for msg in self.test_messages[3:]]
+        self.assertRaises(ValueError, discover, samples, width=16)
+
+
+class AnalysisTest(unittest.TestCase):
+    """Verify the error detection analysis of polynomials"""
+
+    def undetected(self, p, dataBits, weight):
+        # Count the patterns of weight bits whose codeword polynomial is a
+        # multiple of the generator.
+        p = poly(p)
+        count = 0
+        for bits in itertools.combinations(range(dataBits + p.deg()), weight):
+            if not (poly(sum(1 << i for i in bits)) % p):
+                count += 1
+        return count
+
+    def test_weights(self):
+        for (p, dataBits) in [(0xB, 9), (0x13, 12), (g8, 10), (0x107, 12)]:
+            expected = [0, 0] + [self.undetected(p, dataBits, w) for w in range(2, 6)]
+            self.assertEqual(analysis.weights(p, dataBits, maxWeight=5), expected)
+            hd = min([w for w in range(2, 6) if expected[w]] or [None])
+            self.assertEqual(analysis.hammingDistance(p, dataBits, maxWeight=5), hd)
+
+    def test_hd_lengths(self):
+        # The values published by Koopman.
+        self.assertEqual(analysis.hdLengths(g32, 300, maxWeight=5), {5: 300, 6: 268})
+        self.assertEqual(analysis.hdLengths(0x107, 200, maxWeight=5), {2: 200, 4: 119})
+        self.assertEqual(analysis.hdLengths(0xB, 10, maxWeight=3), {2: 10, 3: 4})
+
+    def test_rank(self):
+        results = analysis.rank([0x107, g8, 0x131, 0x1D5], 100, maxWeight=4)
+        self.assertEqual([r[0] for r in results], [0x131, 0x107, g8, 0x1D5])
+        self.assertEqual([r[1] for r in results], [4, 4, 4, 2])
+        self.assertEqual(results[0][2], 42870)
+        self.assertEqual(analysis.rank([0xB, 0x107], 3, maxWeight=3), [(0x107, None, 0), (0xB, 3, 4)])
+
+
+class GF2Test(unittest.TestCase):
+    """Verify the GF(2) polynomial arithmetic against the poly class"""
+
+    moduli = [0x3, g8, g16, g32, g64a, g64b, polyFromBits([128, 7, 2, 1, 0])]
+
+    def test_clmul_divmod(self):
+        for a in self.moduli:
+            for b in self.moduli:
+                self.assertEqual(gf2.clmul(a, b), int(poly(a) * poly(b)))
+                (q, r) = divmod(poly(a) * poly(b) + poly(a), poly(b))
+                self.assertEqual(gf2.divmodPoly(gf2.clmul(a, b) ^ a, b), (int(q), int(r)))
+                self.assertEqual(gf2.modPoly(gf2.clmul(a, b) ^ a, b), int(r))
+        self.assertEqual(gf2.clmul(0, g32), 0)
+        self.assertEqual(gf2.gcd(gf2.clmul(g8, g16), gf2.clmul(g8, g32)), g8)
+        self.assertRaises(ZeroDivisionError, gf2.modPoly, g8, 0)
+        self.assertRaises(ValueError, gf2.clmul, -1, g8)
+
+    def test_powmod(self):
+        for p in self.moduli:
+            a = (p * 0x9E3779B97F4A7C15) >> 3
+            r = poly(1) % poly(p)
+            for e in range(20):
+                self.assertEqual(gf2.powmod(a, e, p), int(r))
+                r = (r * poly(a)) % poly(p)
+            self.assertEqual(gf2.mulmod(a, a, p), int((poly(a) * poly(a)) % poly(p)))
+
+    def test_xnmod(self):
+        # x^n modulo the polynomial shifts a CRC register past n zero bits.
+        crcfun = mkCrcFun(g32, initCrc=0, rev=False)
+        for n in (0, 1, 7, 1000):
+            self.assertEqual(gf2.xnmod(32 + 8*n, g32), crcfun(b'\x01' + bytes(n)))
+        self.assertEqual(gf2.xnmod(2**32 - 1, g32), 1)
+        self.assertRaises(ValueError, gf2.powmod, 2, -1, g32)
+
+    def test_inverse(self):
+        for p in self.moduli[1:]:
+            for a in (2, 0x1234567, p >> 1):
+                if gf2.gcd(a, p) == 1:
+                    self.assertEqual(gf2.mulmod(gf2.inverse(a, p), a, p), 1)
+                else:
+                    self.assertRaises(ValueError, gf2.inverse, a, p)
+        self.assertRaises(ValueError, gf2.inverse, 0x3, g8)
+
+
+class BenchTest(unittest.TestCase):
+    """Verify that the benchmarks run and produce JSON"""
+
+    def test_run(self):
+        results = bench.run(maxSize=16, pythonMaxSize=1, minTime=0.0001, repeat=1)
+        json.dumps(results)
+        backends = 2 if _usingExtension else 1
+        self.assertEqual(len(results['kernels']), 12*backends + 12*(backends - 1))
+        self.assertEqual([r['operation'] for r in results['crc']], ['update', 'digest', 'new', 'copy'])
+        self.assertEqual(len(results['tables']), 12)
+        self.assertEqual({r['function'] for r in results['stdlib'] if r['algorithm'] == 'xmodem'},
+                         {'crcmod', 'crcmod kernel', 'binascii.crc_hqx'})
+        self.assertTrue(all(r['matches'] for r in results['stdlib']))
+
+    def test_allocation_limit(self):
+        oldMaxSize = bench._allocationMaxSize
+        bench._allocationMaxSize = 1
+        try:
+            results = bench.run(maxSize=16, pythonMaxSize=1, minTime=0.0001, repeat=1)
+        finally:
+            bench._allocationMaxSize = oldMaxSize
+        for r in results['stdlib']:
+            self.assertEqual(r['peakBytes'] is None, r['size'] > 1)
+            self.assertEqual(r['retainedBlocks'] is None, r['size'] > 1)
+
+
+@unittest.skipUnless(shutil.which(jit._compiler()[0]), "no C compiler available")
+class JitTest(unittest.TestCase):
+    """Verify the CRC functions compiled at run time"""
+
+    check_crc_names = [
+        'crc-8-maxim',
+        'xmodem',
+        'modbus',
+        'crc-24',
+        'crc-32',
+        'crc-32-mpeg',
+        'crc-64-jones',
+        'crc-5-usb',
+        'crc-12-dect',
+        'crc-12-umts',
+        'crc-82-darc',
+    ]
+
+    def setUp(self):
+        self.cacheDir = tempfile.mkdtemp()
+        self.oldCacheDir = os.environ.get('CRCMOD_JIT_CACHE', None)
+        os.environ['CRCMOD_JIT_CACHE'] = self.cacheDir
+
+    def tearDown(self):
+        if self.oldCacheDir is None:
+            del os.environ['CRCMOD_JIT_CACHE']
+        else:
+            os.environ['CRCMOD_JIT_CACHE'] = self.oldCacheDir
+        shutil.rmtree(self.cacheDir)
+
+    def test_compile_predefined(self):
+        msg = b'123456789'
+        for crc_name in self.check_crc_names:
+            crc = PredefinedCrc(crc_name)
+            for table in ('slice8', 'byte', 'bitwise'):
+                compiled = jit.compile(crc, table=table)
+                compiled.update(msg)
+                self.assertEqual(compiled.crcValue, crc.new(msg).crcValue)
+                compiled.update(msg)
+                self.assertEqual(compiled.crcValue, crc.new(msg + msg).crcValue)
+
+    def test_compile_warnings(self):
+        # The generated code compiles without warnings, including the CRC
+        # types narrower than int.
+        oldCC = os.environ.get('CC', None)
+        os.environ['CC'] = ' '.join(jit._compiler() + ['-Wall', '-Wextra', '-Werror'])
+        try:
+            msg = b'123456789'
+            for crc_name in ('crc-8', 'crc-8-maxim', 'xmodem', 'modbus', 'crc-12-dect', 'crc-5-usb'):
+                crc = PredefinedCrc(crc_name)
+                for table in ('bitwise', 'nibble', 'byte', 'slice4'):
+                    compiled = jit.compile(crc, table=table)
+                    compiled.update(msg)
+                    self.assertEqual(compiled.crcValue, crc.new(msg).crcValue)
+        finally:
+            if oldCC is None:
+                del os.environ['CC']
+            else:
+                os.environ['CC'] = oldCC
+
+    def test_input_types(self):
+        crcfun = jit.mkCrcFun(g32, initCrc=0, xorOut=0xFFFFFFFF)
+        expected = mkCrcFun(g32, initCrc=0, xorOut=0xFFFFFFFF)
+        self.assertEqual(crcfun.backend, 'jit-slice8')
+        for data in (b'123456789', bytearray(b'123456789'), memoryview(b'123456789'),
+                     array('I', [1, 2, 3]), b''):
+            self.assertEqual(crcfun(data), expected(data))
+            self.assertEqual(crcfun(data, 0x1234), expected(data, 0x1234))
+        self.assertRaises(TypeError, crcfun, "123456789")
+
+    def test_mkcrcfun(self):
+        datas = [b'123456789', b'', bytes(range(256)) * 40]
+        crcfun = jit.mkCrcFun(0x180F, initCrc=0, rev=False, revOut=True)
+        expected = mkCrcFun(0x180F, initCrc=0, rev=False, revOut=True)
+        self.assertEqual(crcfun(b'123456789'), 0xDAF)
+        self.assertEqual(crcfun.batch(datas), expected.batch(datas))
+        self.assertEqual(crcfun.batch(datas, 0x15), expected.batch(datas, 0x15))
+
+        instrumented = stats.instrument(crcfun)
+        self.assertEqual(instrumented.batch(datas), expected.batch(datas))
+        self.assertEqual(stats.getStats(instrumented).batchItems, 3)
+
+    def test_disk_cache(self):
+        jit.mkCrcFun(g16, initCrc=0x1D0F, rev=False, table='nibble')
+        self.assertEqual(len(os.listdir(self.cacheDir)), 1)
+
+
+class ImportTest(unittest.TestCase):
+    # These modules are imported on first use, see crcmod.py.  Importing them
+    # with crcmod makes the import several times slower.
+    lazy_modules = ['crcmod.gf2', 'binascii', 'collections.abc', 'contextlib']
+
+    def test_lazy_imports(self):
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        out = subprocess.check_output([sys.executable, '-S', '-c',
+                                       'import sys, crcmod; '
+                                       'print(" ".join(m for m in %r if m in sys.modules))'
+                                       % self.lazy_modules],
+                                      env=env)
+        self.assertEqual(out.strip(), b'')
+
+    def test_table128(self):
+        import collections.abc
+        g128 = (1 << 128) | (1 << 7) | (1 << 2) | (1 << 1) | 1
+        crc = Crc(g128)
+        self.assertIsInstance(crc.table, collections.abc.Sequence)
+        self.assertEqual(list(crc.table), _mkTable_r(g128, 128))
+        self.assertIn(crc.table[-1], crc.table)
+
+
 def runtests():
     print("Using extension:", _usingExtension)
     print()
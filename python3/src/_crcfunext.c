@@ -29,6 +29,13 @@
 #define PY_SSIZE_T_CLEAN
 #include <Python.h>
 
+// Critical sections only exist from Python 3.13, where they lock an object on
+// the free-threaded build.  The GIL serves the same purpose on the others.
+#ifndef Py_BEGIN_CRITICAL_SECTION
+#define Py_BEGIN_CRITICAL_SECTION(op) {
+#define Py_END_CRITICAL_SECTION() }
+#endif
+
 // Note: the type declarations are set up to work on 32-bit and 64-bit
 // platforms using the GNU C compiler.  They may need to be adjusted for other
 // platforms.
@@ -46,31 +53,45 @@ typedef unsigned long long UINT64;
 #define INPUT16 "OHs#"
 #define INPUT32 "OIs#"
 #define INPUT64 "OKs#"
+#define INPUT128 "OOs#"
 
-// The following macro is taken from hashlib.h in the Python 3.1 code,
+// The following is adapted from the macro in hashlib.h in the Python 3.1 code,
 // providing "Common code for use by all hashlib related modules".
 
 // Given a PyObject* obj, fill in the Py_buffer* viewp with the result
-// of PyObject_GetBuffer.  Sets an exception and issues a return NULL
-// on any errors.
+// of PyObject_GetBuffer.  Sets an exception and returns -1 on any errors.
+static int
+_getBufferView(PyObject *obj, Py_buffer *viewp)
+{
+    if (PyUnicode_Check(obj))
+    {
+        PyErr_SetString(PyExc_TypeError,
+                        "Unicode-objects must be encoded before calculating a CRC");
+        return -1;
+    }
+    if (!PyObject_CheckBuffer(obj))
+    {
+        PyErr_SetString(PyExc_TypeError,
+                        "object supporting the buffer API required");
+        return -1;
+    }
+    if (PyObject_GetBuffer(obj, viewp, PyBUF_SIMPLE) == -1)
+    {
+        return -1;
+    }
+    if (viewp->ndim > 1)
+    {
+        PyErr_SetString(PyExc_BufferError,
+                        "Buffer must be single dimension");
+        PyBuffer_Release(viewp);
+        return -1;
+    }
+    return 0;
+}
+
+// Same as above, but issues a return NULL on any errors.
 #define GET_BUFFER_VIEW_OR_ERROUT(obj, viewp) do { \
-        if (PyUnicode_Check((obj))) { \
-            PyErr_SetString(PyExc_TypeError, \
-                            "Unicode-objects must be encoded before calculating a CRC");\
-            return NULL; \
-        } \
-        if (!PyObject_CheckBuffer((obj))) { \
-            PyErr_SetString(PyExc_TypeError, \
-                            "object supporting the buffer API required"); \
-            return NULL; \
-        } \
-        if (PyObject_GetBuffer((obj), (viewp), PyBUF_SIMPLE) == -1) { \
-            return NULL; \
-        } \
-        if ((viewp)->ndim > 1) { \
-            PyErr_SetString(PyExc_BufferError, \
-                            "Buffer must be single dimension"); \
-            PyBuffer_Release((viewp)); \
+        if (_getBufferView((obj), (viewp)) < 0) { \
             return NULL; \
         } \
     } while(0);
@@ -83,6 +104,437 @@ typedef unsigned long long UINT64;
 #define BYTE3(x) ((UINT8)((x) >> 24))
 #define BYTE7(x) ((UINT8)((x) >> 56))
 
+//-----------------------------------------------------------------------------
+// The 128-bit CRC is held in two 64-bit halves, since there is no portable
+// 128-bit integer type.  The table holds the low half of each entry followed
+// by the high half.  These functions convert between a Python integer and the
+// two halves.
+
+static int
+_getCrc128(PyObject *obj, UINT64 *hi, UINT64 *lo)
+{
+    PyObject *shift;
+    PyObject *high;
+
+    if (!PyLong_Check(obj))
+    {
+        PyErr_SetString(PyExc_TypeError, "an integer is required for the crc");
+        return -1;
+    }
+
+    *lo = PyLong_AsUnsignedLongLongMask(obj);
+    if (*lo == (UINT64)-1 && PyErr_Occurred())
+    {
+        return -1;
+    }
+
+    shift = PyLong_FromLong(64);
+    if (shift == NULL)
+    {
+        return -1;
+    }
+    high = PyNumber_Rshift(obj, shift);
+    Py_DECREF(shift);
+    if (high == NULL)
+    {
+        return -1;
+    }
+
+    *hi = PyLong_AsUnsignedLongLongMask(high);
+    Py_DECREF(high);
+    if (*hi == (UINT64)-1 && PyErr_Occurred())
+    {
+        return -1;
+    }
+    return 0;
+}
+
+static PyObject*
+_makeCrc128(UINT64 hi, UINT64 lo)
+{
+    PyObject *high;
+    PyObject *low;
+    PyObject *shift;
+    PyObject *tmp;
+    PyObject *result;
+
+    high = PyLong_FromUnsignedLongLong(hi);
+    if (high == NULL)
+    {
+        return NULL;
+    }
+    shift = PyLong_FromLong(64);
+    if (shift == NULL)
+    {
+        Py_DECREF(high);
+        return NULL;
+    }
+    tmp = PyNumber_Lshift(high, shift);
+    Py_DECREF(high);
+    Py_DECREF(shift);
+    if (tmp == NULL)
+    {
+        return NULL;
+    }
+
+    low = PyLong_FromUnsignedLongLong(lo);
+    if (low == NULL)
+    {
+        Py_DECREF(tmp);
+        return NULL;
+    }
+    result = PyNumber_Or(tmp, low);
+    Py_DECREF(tmp);
+    Py_DECREF(low);
+    return result;
+}
+
+//-----------------------------------------------------------------------------
+// Interleaved kernels.  Each table lookup depends on the result of the one
+// before, so a single CRC runs at the latency of a load and a few operations
+// per byte.  Running several independent CRCs in lock-step lets the CPU overlap
+// their lookups.  The lanes are either separate messages (see _crcmulti) or
+// equal segments of one large buffer, whose CRCs are merged afterwards.
+//
+// These kernels cover the CRCs of up to 64 bits.  The CRC is passed as a UINT64
+// whatever the size of the kernel.
+
+#define LANES 4
+
+// Buffers shorter than this are not worth splitting.
+#define SPLIT_SIZE 1024
+
+// The GIL is released while computing the CRC of a buffer of at least this
+// size, the same threshold as zlib.crc32, so that other threads can run.  The
+// buffer is held by a Py_buffer and the table by the argument tuple meanwhile.
+#define ALLOW_THREADS_SIZE (5*1024)
+
+#define SHL8(x) ((x) << 8)
+#define SHR8(x) ((x) >> 8)
+
+// GCC packs the lanes into vector registers, which puts shuffles between
+// every lookup and the next.
+#if defined(__GNUC__) && !defined(__clang__)
+#define NO_SLP_VECTORIZE __attribute__((optimize("no-tree-slp-vectorize")))
+#else
+#define NO_SLP_VECTORIZE
+#endif
+
+typedef UINT64 (*singleFunc)(const UINT8 *data, Py_ssize_t len, UINT64 crc,
+                             const void *table);
+typedef void (*lanesFunc)(const UINT8 **data, Py_ssize_t len, UINT64 *crc,
+                          const void *table);
+
+typedef struct {
+    int sizeBits;       // 8, 16, 24, 32 or 64
+    int rev;            // non-zero for the bit reversed kernels
+    singleFunc single;  // process one buffer
+    lanesFunc lanes;    // process LANES buffers of the same length
+} kernelDef;
+
+// Define the single and interleaved functions for one kernel.  INDEX extracts
+// the byte of the CRC that selects the table entry, and SHIFT moves the rest of
+// the CRC along by a byte.
+#define DEFINE_KERNEL(name, type, INDEX, SHIFT) \
+static UINT64 \
+name##Single(const UINT8 *data, Py_ssize_t len, UINT64 crc64, const void *t) \
+{ \
+    const type *table = t; \
+    type crc = (type)crc64; \
+    while (len--) \
+    { \
+        crc = table[*data ^ INDEX(crc)] ^ SHIFT(crc); \
+        data++; \
+    } \
+    return crc; \
+} \
+\
+static NO_SLP_VECTORIZE void \
+name##Lanes(const UINT8 **data, Py_ssize_t len, UINT64 *crc, const void *t) \
+{ \
+    const type *table = t; \
+    const UINT8 *d0 = data[0], *d1 = data[1], *d2 = data[2], *d3 = data[3]; \
+    type c0 = (type)crc[0], c1 = (type)crc[1], c2 = (type)crc[2], c3 = (type)crc[3]; \
+    Py_ssize_t i; \
+    for (i = 0; i < len; i++) \
+    { \
+        c0 = table[d0[i] ^ INDEX(c0)] ^ SHIFT(c0); \
+        c1 = table[d1[i] ^ INDEX(c1)] ^ SHIFT(c1); \
+        c2 = table[d2[i] ^ INDEX(c2)] ^ SHIFT(c2); \
+        c3 = table[d3[i] ^ INDEX(c3)] ^ SHIFT(c3); \
+    } \
+    crc[0] = c0; \
+    crc[1] = c1; \
+    crc[2] = c2; \
+    crc[3] = c3; \
+}
+
+DEFINE_KERNEL(_kernel8, UINT8, BYTE0, SHL8)
+DEFINE_KERNEL(_kernel8r, UINT8, BYTE0, SHR8)
+DEFINE_KERNEL(_kernel16, UINT16, BYTE1, SHL8)
+DEFINE_KERNEL(_kernel16r, UINT16, BYTE0, SHR8)
+DEFINE_KERNEL(_kernel24, UINT32, BYTE2, SHL8)
+DEFINE_KERNEL(_kernel24r, UINT32, BYTE0, SHR8)
+DEFINE_KERNEL(_kernel32, UINT32, BYTE3, SHL8)
+DEFINE_KERNEL(_kernel32r, UINT32, BYTE0, SHR8)
+DEFINE_KERNEL(_kernel64, UINT64, BYTE7, SHL8)
+DEFINE_KERNEL(_kernel64r, UINT64, BYTE0, SHR8)
+
+static const kernelDef kernelTable[] = {
+    {8, 0, _kernel8Single, _kernel8Lanes},
+    {8, 1, _kernel8rSingle, _kernel8rLanes},
+    {16, 0, _kernel16Single, _kernel16Lanes},
+    {16, 1, _kernel16rSingle, _kernel16rLanes},
+    {24, 0, _kernel24Single, _kernel24Lanes},
+    {24, 1, _kernel24rSingle, _kernel24rLanes},
+    {32, 0, _kernel32Single, _kernel32Lanes},
+    {32, 1, _kernel32rSingle, _kernel32rLanes},
+    {64, 0, _kernel64Single, _kernel64Lanes},
+    {64, 1, _kernel64rSingle, _kernel64rLanes},
+    {0, 0, NULL, NULL}
+};
+
+#define KERNEL8     (&kernelTable[0])
+#define KERNEL8R    (&kernelTable[1])
+#define KERNEL16    (&kernelTable[2])
+#define KERNEL16R   (&kernelTable[3])
+#define KERNEL24    (&kernelTable[4])
+#define KERNEL24R   (&kernelTable[5])
+#define KERNEL32    (&kernelTable[6])
+#define KERNEL32R   (&kernelTable[7])
+#define KERNEL64    (&kernelTable[8])
+#define KERNEL64R   (&kernelTable[9])
+
+//-----------------------------------------------------------------------------
+// Arithmetic modulo the generator polynomial, on values in the same form as
+// the CRC register of the kernel.  Appending n zero bytes to the data
+// multiplies the register by x^(8n), so the CRC of a buffer is found from the
+// CRCs of its segments.
+//
+// The reversed kernels hold the coefficient of x^0 in the highest bit of the
+// register and the others in the lowest bits of the kernel, shifted up if the
+// CRC is narrower.  Both forms of the polynomial, without its x^n term, are
+// the table entry for the byte that only affects the last shift.
+
+typedef struct {
+    int rev;
+    UINT64 poly;    // the polynomial, in the form of the register
+    UINT64 one;     // the polynomial 1, i.e. x^0
+    UINT64 top;     // the highest bit of the register
+    UINT64 mask;    // all of the bits of the register
+} crcField;
+
+static void
+_initField(crcField *f, const kernelDef *k, const void *table)
+{
+    static const UINT8 byte01 = 0x01;
+    static const UINT8 byte80 = 0x80;
+
+    f->rev = k->rev;
+    if (k->rev)
+    {
+        f->poly = k->single(&byte80, 1, 0, table);
+        f->one = f->poly;
+        while (f->one & (f->one - 1))
+        {
+            f->one &= f->one - 1;
+        }
+        f->top = f->one;
+        f->mask = (f->one << 1) - 1;
+    }
+    else
+    {
+        f->top = (UINT64)1 << (k->sizeBits - 1);
+        f->mask = (f->top << 1) - 1;
+        f->poly = k->single(&byte01, 1, 0, table) & f->mask;
+        f->one = f->poly & (~f->poly + 1);
+    }
+}
+
+// Multiply by x.
+static UINT64
+_mulx(const crcField *f, UINT64 a)
+{
+    if (f->rev)
+    {
+        return (a & 1) ? (a >> 1) ^ f->poly : (a >> 1);
+    }
+    return (a & f->top) ? ((a << 1) & f->mask) ^ f->poly : ((a << 1) & f->mask);
+}
+
+static UINT64
+_mulmod(const crcField *f, UINT64 a, UINT64 b)
+{
+    UINT64 p = 0;
+    UINT64 m = f->one;
+    while (m)
+    {
+        if (a & m)
+        {
+            p ^= b;
+        }
+        b = _mulx(f, b);
+        m = f->rev ? (m >> 1) : ((m << 1) & f->mask);
+    }
+    return p;
+}
+
+// Return x^(8n) modulo the polynomial.
+static UINT64
+_xpow8n(const crcField *f, Py_ssize_t n)
+{
+    UINT64 result = f->one;
+    UINT64 sq = f->one;
+    int i;
+
+    for (i = 0; i < 8; i++)
+    {
+        sq = _mulx(f, sq);
+    }
+    while (n)
+    {
+        if (n & 1)
+        {
+            result = _mulmod(f, result, sq);
+        }
+        n >>= 1;
+        if (n)
+        {
+            sq = _mulmod(f, sq, sq);
+        }
+    }
+    return result;
+}
+
+//-----------------------------------------------------------------------------
+// Compute the CRC of a large buffer by splitting it into LANES segments of the
+// same length.  The first segment starts from crc and the others from zero.
+// The few bytes left over are processed before the segments.
+
+static UINT64
+_crcSplit(const kernelDef *k, const UINT8 *data, Py_ssize_t len, UINT64 crc,
+          const void *table)
+{
+    crcField f;
+    Py_ssize_t seg = len / LANES;
+    Py_ssize_t lead = len % LANES;
+    const UINT8 *p[LANES];
+    UINT64 c[LANES];
+    UINT64 x;
+    int i;
+    PyThreadState *save = NULL;
+
+    if (len >= ALLOW_THREADS_SIZE)
+    {
+        save = PyEval_SaveThread();
+    }
+
+    crc = k->single(data, lead, crc, table);
+    data += lead;
+    for (i = 0; i < LANES; i++)
+    {
+        p[i] = data + i*seg;
+        c[i] = 0;
+    }
+    c[0] = crc;
+
+    k->lanes(p, seg, c, table);
+
+    _initField(&f, k, table);
+    x = _xpow8n(&f, seg);
+    crc = c[0] & f.mask;
+    for (i = 1; i < LANES; i++)
+    {
+        crc = _mulmod(&f, crc, x) ^ (c[i] & f.mask);
+    }
+
+    if (save != NULL)
+    {
+        PyEval_RestoreThread(save);
+    }
+    return crc;
+}
+
+// Compute the CRCs of n buffers, each starting from crc.  A lane that finishes
+// its buffer is given the next one, so the lanes keep running in lock-step
+// until there are no buffers left to hand out.  The buffers still in progress
+// are then finished one at a time.
+
+static void
+_crcBatch(const kernelDef *k, const Py_buffer *bufs, Py_ssize_t n, UINT64 crc,
+          const void *table, UINT64 *out)
+{
+    const UINT8 *p[LANES];
+    Py_ssize_t left[LANES];
+    Py_ssize_t msg[LANES];
+    UINT64 c[LANES];
+    Py_ssize_t next = 0;
+    Py_ssize_t step;
+    int active = 0;
+    int i;
+
+    for (i = 0; i < LANES && next < n; i++, next++)
+    {
+        p[i] = bufs[next].buf;
+        left[i] = bufs[next].len;
+        msg[i] = next;
+        c[i] = crc;
+        active++;
+    }
+
+    while (active == LANES)
+    {
+        step = left[0];
+        for (i = 1; i < LANES; i++)
+        {
+            if (left[i] < step)
+            {
+                step = left[i];
+            }
+        }
+
+        k->lanes(p, step, c, table);
+
+        for (i = 0; i < LANES; i++)
+        {
+            p[i] += step;
+            left[i] -= step;
+            if (left[i] == 0)
+            {
+                out[msg[i]] = c[i];
+                if (next < n)
+                {
+                    p[i] = bufs[next].buf;
+                    left[i] = bufs[next].len;
+                    msg[i] = next;
+                    c[i] = crc;
+                    next++;
+                }
+                else
+                {
+                    msg[i] = -1;
+                    active--;
+                }
+            }
+        }
+    }
+
+    for (i = 0; i < LANES; i++)
+    {
+        if (i < n && msg[i] >= 0)
+        {
+            if (left[i] >= SPLIT_SIZE)
+            {
+                out[msg[i]] = _crcSplit(k, p[i], left[i], c[i], table);
+            }
+            else
+            {
+                out[msg[i]] = k->single(p[i], left[i], c[i], table);
+            }
+        }
+    }
+}
+
 //-----------------------------------------------------------------------------
 // Compute a 8-bit crc over the input data.
 // Inputs:
@@ -120,10 +572,17 @@ _crc8(PyObject* self, PyObject* args)
     data = buf.buf;
     dataLen = buf.len;
 
-    while (dataLen--)
+    if (dataLen >= SPLIT_SIZE)
     {
-        crc = table[*data ^ crc];
-        data++;
+        crc = (UINT8)_crcSplit(KERNEL8, data, dataLen, crc, table);
+    }
+    else
+    {
+        while (dataLen--)
+        {
+            crc = table[*data ^ crc];
+            data++;
+        }
     }
 
     PyBuffer_Release(&buf);
@@ -169,10 +628,17 @@ _crc8r(PyObject* self, PyObject* args)
     data = buf.buf;
     dataLen = buf.len;
 
-    while (dataLen--)
+    if (dataLen >= SPLIT_SIZE)
     {
-        crc = table[*data ^ crc];
-        data++;
+        crc = (UINT8)_crcSplit(KERNEL8R, data, dataLen, crc, table);
+    }
+    else
+    {
+        while (dataLen--)
+        {
+            crc = table[*data ^ crc];
+            data++;
+        }
     }
 
     PyBuffer_Release(&buf);
@@ -217,10 +683,17 @@ _crc16(PyObject* self, PyObject* args)
     data = buf.buf;
     dataLen = buf.len;
 
-    while (dataLen--)
+    if (dataLen >= SPLIT_SIZE)
     {
-        crc = table[*data ^ BYTE1(crc)] ^ (crc << 8);
-        data++;
+        crc = (UINT16)_crcSplit(KERNEL16, data, dataLen, crc, table);
+    }
+    else
+    {
+        while (dataLen--)
+        {
+            crc = table[*data ^ BYTE1(crc)] ^ (crc << 8);
+            data++;
+        }
     }
 
     PyBuffer_Release(&buf);
@@ -266,10 +739,17 @@ _crc16r(PyObject* self, PyObject* args)
     data = buf.buf;
     dataLen = buf.len;
 
-    while (dataLen--)
+    if (dataLen >= SPLIT_SIZE)
     {
-        crc = table[*data ^ BYTE0(crc)] ^ (crc >> 8);
-        data++;
+        crc = (UINT16)_crcSplit(KERNEL16R, data, dataLen, crc, table);
+    }
+    else
+    {
+        while (dataLen--)
+        {
+            crc = table[*data ^ BYTE0(crc)] ^ (crc >> 8);
+            data++;
+        }
     }
 
     PyBuffer_Release(&buf);
@@ -314,10 +794,17 @@ _crc24(PyObject* self, PyObject* args)
     data = buf.buf;
     dataLen = buf.len;
 
-    while (dataLen--)
+    if (dataLen >= SPLIT_SIZE)
     {
-        crc = table[*data ^ BYTE2(crc)] ^ (crc << 8);
-        data++;
+        crc = (UINT32)_crcSplit(KERNEL24, data, dataLen, crc, table);
+    }
+    else
+    {
+        while (dataLen--)
+        {
+            crc = table[*data ^ BYTE2(crc)] ^ (crc << 8);
+            data++;
+        }
     }
 
     PyBuffer_Release(&buf);
@@ -364,10 +851,17 @@ _crc24r(PyObject* self, PyObject* args)
     dataLen = buf.len;
 
     crc = crc & 0xFFFFFFU;
-    while (dataLen--)
+    if (dataLen >= SPLIT_SIZE)
     {
-        crc = table[*data ^ BYTE0(crc)] ^ (crc >> 8);
-        data++;
+        crc = (UINT32)_crcSplit(KERNEL24R, data, dataLen, crc, table);
+    }
+    else
+    {
+        while (dataLen--)
+        {
+            crc = table[*data ^ BYTE0(crc)] ^ (crc >> 8);
+            data++;
+        }
     }
 
     PyBuffer_Release(&buf);
@@ -412,10 +906,17 @@ _crc32(PyObject* self, PyObject* args)
     data = buf.buf;
     dataLen = buf.len;
 
-    while (dataLen--)
+    if (dataLen >= SPLIT_SIZE)
     {
-        crc = table[*data ^ BYTE3(crc)] ^ (crc << 8);
-        data++;
+        crc = (UINT32)_crcSplit(KERNEL32, data, dataLen, crc, table);
+    }
+    else
+    {
+        while (dataLen--)
+        {
+            crc = table[*data ^ BYTE3(crc)] ^ (crc << 8);
+            data++;
+        }
     }
 
     PyBuffer_Release(&buf);
@@ -461,10 +962,17 @@ _crc32r(PyObject* self, PyObject* args)
     data = buf.buf;
     dataLen = buf.len;
 
-    while (dataLen--)
+    if (dataLen >= SPLIT_SIZE)
     {
-        crc = table[*data ^ BYTE0(crc)] ^ (crc >> 8);
-        data++;
+        crc = (UINT32)_crcSplit(KERNEL32R, data, dataLen, crc, table);
+    }
+    else
+    {
+        while (dataLen--)
+        {
+            crc = table[*data ^ BYTE0(crc)] ^ (crc >> 8);
+            data++;
+        }
     }
 
     PyBuffer_Release(&buf);
@@ -509,10 +1017,17 @@ _crc64(PyObject* self, PyObject* args)
     data = buf.buf;
     dataLen = buf.len;
 
-    while (dataLen--)
+    if (dataLen >= SPLIT_SIZE)
     {
-        crc = table[*data ^ BYTE7(crc)] ^ (crc << 8);
-        data++;
+        crc = (UINT64)_crcSplit(KERNEL64, data, dataLen, crc, table);
+    }
+    else
+    {
+        while (dataLen--)
+        {
+            crc = table[*data ^ BYTE7(crc)] ^ (crc << 8);
+            data++;
+        }
     }
 
     PyBuffer_Release(&buf);
@@ -558,15 +1073,876 @@ _crc64r(PyObject* self, PyObject* args)
     data = buf.buf;
     dataLen = buf.len;
 
+    if (dataLen >= SPLIT_SIZE)
+    {
+        crc = (UINT64)_crcSplit(KERNEL64R, data, dataLen, crc, table);
+    }
+    else
+    {
+        while (dataLen--)
+        {
+            crc = table[*data ^ BYTE0(crc)] ^ (crc >> 8);
+            data++;
+        }
+    }
+
+    PyBuffer_Release(&buf);
+
+    return PyLong_FromUnsignedLongLong(crc);
+}
+
+//-----------------------------------------------------------------------------
+// Compute a 128-bit crc over the input data.
+// Inputs:
+//   data - string containing the data
+//   crc - integer containing the initial crc
+//   table - string containing the 128-bit table corresponding to the generator
+//           polynomial.
+// Returns:
+//   crc - integer containing the resulting crc
+
+static PyObject*
+_crc128(PyObject* self, PyObject* args)
+{
+    PyObject *obj;
+    Py_buffer buf;
+    PyObject *crcObj;
+    UINT64 hi, lo;
+    UINT8* data;
+    Py_ssize_t dataLen;
+    UINT64* table;
+    Py_ssize_t tableLen;
+    UINT64* entry;
+    PyThreadState *save = NULL;
+
+    if (!PyArg_ParseTuple(args, INPUT128, &obj, &crcObj,
+                            &table, &tableLen))
+    {
+        return NULL;
+    }
+
+    if (tableLen != 256*16)
+    {
+        PyErr_SetString(PyExc_ValueError, "invalid CRC table");
+        return NULL;
+    }
+
+    if (_getCrc128(crcObj, &hi, &lo) < 0)
+    {
+        return NULL;
+    }
+
+    GET_BUFFER_VIEW_OR_ERROUT(obj, &buf);
+    data = buf.buf;
+    dataLen = buf.len;
+
+    if (dataLen >= ALLOW_THREADS_SIZE)
+    {
+        save = PyEval_SaveThread();
+    }
+
     while (dataLen--)
     {
-        crc = table[*data ^ BYTE0(crc)] ^ (crc >> 8);
+        entry = &table[2*(*data ^ BYTE7(hi))];
+        hi = entry[1] ^ (hi << 8) ^ (lo >> 56);
+        lo = entry[0] ^ (lo << 8);
         data++;
     }
 
+    if (save != NULL)
+    {
+        PyEval_RestoreThread(save);
+    }
+
     PyBuffer_Release(&buf);
 
-    return PyLong_FromUnsignedLongLong(crc);
+    return _makeCrc128(hi, lo);
+}
+
+//-----------------------------------------------------------------------------
+// Compute a 128-bit crc over the input data.  The data stream is bit reversed
+// during the computation.
+// Inputs:
+//   data - string containing the data
+//   crc - integer containing the initial crc
+//   table - string containing the 128-bit table corresponding to the generator
+//           polynomial.
+// Returns:
+//   crc - integer containing the resulting crc
+
+static PyObject*
+_crc128r(PyObject* self, PyObject* args)
+{
+    PyObject *obj;
+    Py_buffer buf;
+    PyObject *crcObj;
+    UINT64 hi, lo;
+    UINT8* data;
+    Py_ssize_t dataLen;
+    UINT64* table;
+    Py_ssize_t tableLen;
+    UINT64* entry;
+    PyThreadState *save = NULL;
+
+    if (!PyArg_ParseTuple(args, INPUT128, &obj, &crcObj,
+                            &table, &tableLen))
+    {
+        return NULL;
+    }
+
+    if (tableLen != 256*16)
+    {
+        PyErr_SetString(PyExc_ValueError, "invalid CRC table");
+        return NULL;
+    }
+
+    if (_getCrc128(crcObj, &hi, &lo) < 0)
+    {
+        return NULL;
+    }
+
+    GET_BUFFER_VIEW_OR_ERROUT(obj, &buf);
+    data = buf.buf;
+    dataLen = buf.len;
+
+    if (dataLen >= ALLOW_THREADS_SIZE)
+    {
+        save = PyEval_SaveThread();
+    }
+
+    while (dataLen--)
+    {
+        entry = &table[2*(*data ^ BYTE0(lo))];
+        lo = entry[0] ^ (lo >> 8) ^ (hi << 56);
+        hi = entry[1] ^ (hi >> 8);
+        data++;
+    }
+
+    if (save != NULL)
+    {
+        PyEval_RestoreThread(save);
+    }
+
+    PyBuffer_Release(&buf);
+
+    return _makeCrc128(hi, lo);
+}
+
+//-----------------------------------------------------------------------------
+// Compute the crc of each of a sequence of buffers, interleaving the buffers
+// to overlap their table lookups.
+// Inputs:
+//   datas - sequence of objects containing the data
+//   crc - unsigned integer containing the initial crc for every buffer
+//   table - string containing the table corresponding to the generator
+//           polynomial.
+//   sizeBits - the size of the kernel: 8, 16, 24, 32 or 64
+//   rev - non-zero for the bit reversed algorithms
+// Returns:
+//   list of unsigned integers containing the resulting crcs
+
+static PyObject*
+_crcmulti(PyObject* self, PyObject* args)
+{
+    PyObject *obj;
+    PyObject *seq;
+    PyObject *result = NULL;
+    PyObject *value;
+    UINT64 crc;
+    UINT64 mask;
+    void* table;
+    Py_ssize_t tableLen;
+    int sizeBits;
+    int rev;
+    const kernelDef *k;
+    Py_buffer *bufs;
+    UINT64 *crcs;
+    Py_ssize_t n;
+    Py_ssize_t acquired = 0;
+    Py_ssize_t i;
+    int ok;
+
+    if (!PyArg_ParseTuple(args, "OKs#ii", &obj, &crc,
+                            &table, &tableLen, &sizeBits, &rev))
+    {
+        return NULL;
+    }
+
+    for (k = kernelTable; k->sizeBits; k++)
+    {
+        if (k->sizeBits == sizeBits && k->rev == (rev != 0))
+        {
+            break;
+        }
+    }
+    if (!k->sizeBits)
+    {
+        PyErr_SetString(PyExc_ValueError, "invalid CRC size");
+        return NULL;
+    }
+
+    if (tableLen != 256*(sizeBits == 24 ? 4 : sizeBits/8))
+    {
+        PyErr_SetString(PyExc_ValueError, "invalid CRC table");
+        return NULL;
+    }
+
+    seq = PySequence_Fast(obj, "a sequence of data is required");
+    if (seq == NULL)
+    {
+        return NULL;
+    }
+    n = PySequence_Fast_GET_SIZE(seq);
+
+    bufs = PyMem_New(Py_buffer, n ? n : 1);
+    crcs = PyMem_New(UINT64, n ? n : 1);
+    if (bufs == NULL || crcs == NULL)
+    {
+        PyErr_NoMemory();
+        goto done;
+    }
+
+    // The list must not change while its items are borrowed, which on the
+    // free-threaded build takes a critical section.
+    ok = 1;
+    Py_BEGIN_CRITICAL_SECTION(seq);
+    for (acquired = 0; acquired < n; acquired++)
+    {
+        if (_getBufferView(PySequence_Fast_GET_ITEM(seq, acquired), &bufs[acquired]) < 0)
+        {
+            ok = 0;
+            break;
+        }
+    }
+    Py_END_CRITICAL_SECTION();
+    if (!ok)
+    {
+        goto done;
+    }
+
+    _crcBatch(k, bufs, n, crc, table, crcs);
+
+    mask = (sizeBits == 64) ? ~(UINT64)0 : (((UINT64)1 << sizeBits) - 1);
+    result = PyList_New(n);
+    if (result == NULL)
+    {
+        goto done;
+    }
+    for (i = 0; i < n; i++)
+    {
+        value = PyLong_FromUnsignedLongLong(crcs[i] & mask);
+        if (value == NULL)
+        {
+            Py_CLEAR(result);
+            goto done;
+        }
+        PyList_SET_ITEM(result, i, value);
+    }
+
+done:
+    for (i = 0; i < acquired; i++)
+    {
+        PyBuffer_Release(&bufs[i]);
+    }
+    PyMem_Free(bufs);
+    PyMem_Free(crcs);
+    Py_DECREF(seq);
+    return result;
+}
+
+//-----------------------------------------------------------------------------
+// Search for the error patterns that a CRC does not detect, for crcmod.analysis.
+//
+// The syndrome of bit i of a codeword is x^i modulo the polynomial.  An error
+// pattern goes undetected when the syndromes of its bits add up to zero.  The
+// patterns are shifted so that their lowest bit is bit 0, since shifting does
+// not change whether a pattern is detected.  The remaining bits are split into
+// a left part, whose highest bit is j, and a right part of up to two bits above
+// j.  The bits are swept down through j, adding the right parts whose lowest
+// bit is j+1 to a hash table.  Each left part is then looked up in the table.
+
+typedef struct {
+    UINT64 key;         // sum of the syndromes of the right part
+    UINT64 sum;         // sum of (n - last bit) over the right parts
+    Py_ssize_t last;    // lowest last bit of the right parts
+    int used;
+} scanSlot;
+
+typedef struct {
+    const UINT64 *s;    // the syndromes
+    Py_ssize_t n;       // the number of bits in the codeword
+    int right;          // the number of bits in the right part
+    scanSlot *slots;
+    UINT64 mask;        // the number of slots, less one
+    UINT64 total;       // sum of (n - last bit) over the patterns found
+    Py_ssize_t last;    // lowest last bit of the patterns found, or -1
+} scanState;
+
+static scanSlot*
+_scanSlot(scanState *st, UINT64 key)
+{
+    UINT64 i = (key * 0x9E3779B97F4A7C15ULL) >> 20;
+    scanSlot *slot;
+
+    for (;;)
+    {
+        slot = &st->slots[i & st->mask];
+        if (!slot->used || slot->key == key)
+        {
+            return slot;
+        }
+        i++;
+    }
+}
+
+static void
+_scanInsert(scanState *st, UINT64 key, Py_ssize_t last)
+{
+    scanSlot *slot = _scanSlot(st, key);
+
+    if (!slot->used)
+    {
+        slot->used = 1;
+        slot->key = key;
+        slot->sum = 0;
+        slot->last = last;
+    }
+    slot->sum += (UINT64)(st->n - last);
+    if (last < slot->last)
+    {
+        slot->last = last;
+    }
+}
+
+static void
+_scanFound(scanState *st, UINT64 sum, Py_ssize_t last)
+{
+    st->total += sum;
+    if (st->last < 0 || last < st->last)
+    {
+        st->last = last;
+    }
+}
+
+// Look up the left parts with depth more bits below top, the highest bit being j.
+static void
+_scanLeft(scanState *st, UINT64 key, Py_ssize_t top, int depth, Py_ssize_t j)
+{
+    Py_ssize_t i;
+    scanSlot *slot;
+
+    if (depth == 0)
+    {
+        if (st->right == 0)
+        {
+            if (key == 0)
+            {
+                _scanFound(st, (UINT64)(st->n - j), j);
+            }
+            return;
+        }
+        slot = _scanSlot(st, key);
+        if (slot->used)
+        {
+            _scanFound(st, slot->sum, slot->last);
+        }
+        return;
+    }
+    for (i = depth; i < top; i++)
+    {
+        _scanLeft(st, key ^ st->s[i], i, depth - 1, j);
+    }
+}
+
+// Return (total, last) for the undetected patterns of weight bits in a
+// codeword, where total is the number of such patterns and last is the number
+// of bits, less one, in the shortest codeword that has one (or -1 if none).
+// Inputs:
+//   syndromes - string containing the UINT64 syndrome of each bit of the
+//               codeword
+//   weight - the number of bits in the error patterns
+//   right - the number of bits in the right part, 0, 1 or 2
+// Returns:
+//   (total, last)
+
+static PyObject*
+_weightScan(PyObject* self, PyObject* args)
+{
+    Py_buffer buf;
+    int weight;
+    int right;
+    scanState st;
+    UINT64 *s = NULL;
+    Py_ssize_t n;
+    Py_ssize_t j;
+    Py_ssize_t q;
+    UINT64 count;
+    UINT64 size;
+    PyObject *result = NULL;
+
+    st.slots = NULL;
+    if (!PyArg_ParseTuple(args, "y*ii", &buf, &weight, &right))
+    {
+        return NULL;
+    }
+
+    if (weight < 2 || right < 0 || right > 2 || right > weight - 2)
+    {
+        PyErr_SetString(PyExc_ValueError, "invalid error weight");
+        goto done;
+    }
+
+    n = buf.len / 8;
+    s = PyMem_New(UINT64, n ? n : 1);
+    if (s == NULL)
+    {
+        PyErr_NoMemory();
+        goto done;
+    }
+    memcpy(s, buf.buf, n*8);
+
+    // The table holds every right part, and is kept at most half full.
+    count = (right == 2) ? (UINT64)n*(UINT64)n/2 : (UINT64)n;
+    for (size = 1024; size < 2*count; size *= 2)
+    {
+        if (size > ((UINT64)1 << 32) / sizeof(scanSlot))
+        {
+            PyErr_SetString(PyExc_MemoryError, "codeword too long for this error weight");
+            goto done;
+        }
+    }
+
+    st.s = s;
+    st.n = n;
+    st.right = right;
+    st.mask = size - 1;
+    st.total = 0;
+    st.last = -1;
+    if (right > 0)
+    {
+        st.slots = PyMem_Calloc(size, sizeof(scanSlot));
+        if (st.slots == NULL)
+        {
+            PyErr_NoMemory();
+            goto done;
+        }
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    for (j = n - 2 + (right == 0); j >= weight - right - 1; j--)
+    {
+        if (right == 1)
+        {
+            _scanInsert(&st, s[j+1], j+1);
+        }
+        else if (right == 2)
+        {
+            for (q = j + 2; q < n; q++)
+            {
+                _scanInsert(&st, s[j+1] ^ s[q], q);
+            }
+        }
+        _scanLeft(&st, s[0] ^ s[j], j, weight - right - 2, j);
+    }
+    Py_END_ALLOW_THREADS
+
+    result = Py_BuildValue("Kn", st.total, st.last);
+
+done:
+    PyMem_Free(st.slots);
+    PyMem_Free(s);
+    PyBuffer_Release(&buf);
+    return result;
+}
+
+//-----------------------------------------------------------------------------
+// Arithmetic on polynomials over GF(2), for crcmod.gf2.  A polynomial is passed
+// as a string of bytes holding its bits, least significant byte first, and is
+// held as an array of UINT64 words, least significant word first.
+
+// Multiply two 64-bit polynomials, giving the low and high words of the
+// product.  The portable version works through b four bits at a time.
+static void
+_clmul64Portable(UINT64 a, UINT64 b, UINT64 *lo, UINT64 *hi)
+{
+    UINT64 tlo[16], thi[16];
+    UINT64 l = 0, h = 0;
+    int i;
+
+    tlo[0] = 0;
+    thi[0] = 0;
+    for (i = 1; i < 16; i++)
+    {
+        if (i & 1)
+        {
+            tlo[i] = tlo[i-1] ^ a;
+            thi[i] = thi[i-1];
+        }
+        else
+        {
+            tlo[i] = tlo[i/2] << 1;
+            thi[i] = (thi[i/2] << 1) | (tlo[i/2] >> 63);
+        }
+    }
+
+    for (i = 60; i >= 0; i -= 4)
+    {
+        h = (h << 4) | (l >> 60);
+        l = l << 4;
+        l ^= tlo[(b >> i) & 15];
+        h ^= thi[(b >> i) & 15];
+    }
+    *lo = l;
+    *hi = h;
+}
+
+// Use the carry-less multiply instruction of x86-64 processors if the
+// compiler can generate it and the processor has it.
+#if (defined(__GNUC__) || defined(__clang__)) && defined(__x86_64__)
+#include <wmmintrin.h>
+
+__attribute__((target("pclmul,sse2")))
+static void
+_clmul64Pclmul(UINT64 a, UINT64 b, UINT64 *lo, UINT64 *hi)
+{
+    __m128i r = _mm_clmulepi64_si128(_mm_cvtsi64_si128((long long)a),
+                                     _mm_cvtsi64_si128((long long)b), 0);
+    *lo = (UINT64)_mm_cvtsi128_si64(r);
+    *hi = (UINT64)_mm_cvtsi128_si64(_mm_srli_si128(r, 8));
+}
+
+#define HAVE_PCLMUL 1
+#endif
+
+static void (*_clmul64)(UINT64 a, UINT64 b, UINT64 *lo, UINT64 *hi) = _clmul64Portable;
+
+// Convert between strings of bytes and arrays of words.  The array must have
+// room for all of the bytes.
+static void
+_bytesToWords(const UINT8 *s, Py_ssize_t len, UINT64 *w, Py_ssize_t nw)
+{
+    Py_ssize_t i;
+
+    memset(w, 0, nw*sizeof(UINT64));
+    for (i = 0; i < len; i++)
+    {
+        w[i/8] |= (UINT64)s[i] << (8*(i%8));
+    }
+}
+
+static PyObject*
+_wordsToBytes(const UINT64 *w, Py_ssize_t nw)
+{
+    PyObject *result;
+    UINT8 *s;
+    Py_ssize_t i;
+
+    result = PyBytes_FromStringAndSize(NULL, nw*8);
+    if (result == NULL)
+    {
+        return NULL;
+    }
+    s = (UINT8*)PyBytes_AS_STRING(result);
+    for (i = 0; i < nw*8; i++)
+    {
+        s[i] = (UINT8)(w[i/8] >> (8*(i%8)));
+    }
+    return result;
+}
+
+// r = a*b, where r has room for na+nb words.
+static void
+_clmulWords(const UINT64 *a, Py_ssize_t na, const UINT64 *b, Py_ssize_t nb, UINT64 *r)
+{
+    Py_ssize_t i, j;
+    UINT64 lo, hi;
+
+    memset(r, 0, (na+nb)*sizeof(UINT64));
+    for (i = 0; i < na; i++)
+    {
+        if (a[i] == 0)
+        {
+            continue;
+        }
+        for (j = 0; j < nb; j++)
+        {
+            _clmul64(a[i], b[j], &lo, &hi);
+            r[i+j] ^= lo;
+            r[i+j+1] ^= hi;
+        }
+    }
+}
+
+// Reduce r, of nr words, modulo p, of degree n.  The remainder is left in the
+// low words of r.
+static void
+_modWords(UINT64 *r, Py_ssize_t nr, const UINT64 *p, Py_ssize_t np, Py_ssize_t n)
+{
+    Py_ssize_t bit, shift, ws, k;
+    int bs;
+
+    for (bit = nr*64 - 1; bit >= n; bit--)
+    {
+        if (!((r[bit/64] >> (bit%64)) & 1))
+        {
+            continue;
+        }
+        shift = bit - n;
+        ws = shift / 64;
+        bs = (int)(shift % 64);
+        for (k = 0; k < np && k + ws < nr; k++)
+        {
+            r[k+ws] ^= p[k] << bs;
+            if (bs && k + ws + 1 < nr)
+            {
+                r[k+ws+1] ^= p[k] >> (64 - bs);
+            }
+        }
+    }
+}
+
+// The modulus of _mulmod and _powmod, and working space for them.
+typedef struct {
+    UINT64 *p;
+    Py_ssize_t np;      // the number of words in p
+    Py_ssize_t n;       // the degree of p
+    Py_ssize_t nw;      // the number of words in a reduced polynomial
+    UINT64 *t;          // room for a product of two reduced polynomials
+} gf2Modulus;
+
+static int
+_initModulus(gf2Modulus *m, const UINT8 *s, Py_ssize_t len)
+{
+    Py_ssize_t i;
+
+    m->np = (len + 7) / 8;
+    m->p = PyMem_New(UINT64, m->np ? m->np : 1);
+    if (m->p == NULL)
+    {
+        PyErr_NoMemory();
+        return -1;
+    }
+    _bytesToWords(s, len, m->p, m->np);
+
+    m->n = -1;
+    for (i = m->np*64 - 1; i >= 0; i--)
+    {
+        if ((m->p[i/64] >> (i%64)) & 1)
+        {
+            m->n = i;
+            break;
+        }
+    }
+    if (m->n < 0)
+    {
+        PyErr_SetString(PyExc_ZeroDivisionError, "polynomial division by zero");
+        return -1;
+    }
+
+    m->nw = m->n ? (m->n + 63) / 64 : 1;
+    m->t = PyMem_New(UINT64, 2*m->nw);
+    if (m->t == NULL)
+    {
+        PyErr_NoMemory();
+        return -1;
+    }
+    return 0;
+}
+
+// r = a*b mod p, where a, b and r are reduced.
+static void
+_mulmodWords(gf2Modulus *m, const UINT64 *a, const UINT64 *b, UINT64 *r)
+{
+    _clmulWords(a, m->nw, b, m->nw, m->t);
+    _modWords(m->t, 2*m->nw, m->p, m->np, m->n);
+    memcpy(r, m->t, m->nw*sizeof(UINT64));
+}
+
+// Reduce the polynomial in s into r, which has m->nw words.
+static int
+_reduceBytes(gf2Modulus *m, const UINT8 *s, Py_ssize_t len, UINT64 *r)
+{
+    Py_ssize_t nw = (len + 7) / 8;
+    UINT64 *w;
+
+    if (nw < m->nw)
+    {
+        nw = m->nw;
+    }
+    w = PyMem_New(UINT64, nw);
+    if (w == NULL)
+    {
+        PyErr_NoMemory();
+        return -1;
+    }
+    _bytesToWords(s, len, w, nw);
+    _modWords(w, nw, m->p, m->np, m->n);
+    memcpy(r, w, m->nw*sizeof(UINT64));
+    PyMem_Free(w);
+    return 0;
+}
+
+//-----------------------------------------------------------------------------
+// Carry-less multiply.
+// Inputs:
+//   a, b - strings containing the polynomials
+// Returns:
+//   string containing the product
+
+static PyObject*
+_gf2clmul(PyObject* self, PyObject* args)
+{
+    Py_buffer a, b;
+    UINT64 *wa = NULL, *wb = NULL, *r = NULL;
+    Py_ssize_t na, nb;
+    PyObject *result = NULL;
+
+    if (!PyArg_ParseTuple(args, "y*y*", &a, &b))
+    {
+        return NULL;
+    }
+
+    na = (a.len + 7) / 8;
+    nb = (b.len + 7) / 8;
+    wa = PyMem_New(UINT64, na ? na : 1);
+    wb = PyMem_New(UINT64, nb ? nb : 1);
+    r = PyMem_New(UINT64, na + nb ? na + nb : 1);
+    if (wa == NULL || wb == NULL || r == NULL)
+    {
+        PyErr_NoMemory();
+        goto done;
+    }
+    _bytesToWords(a.buf, a.len, wa, na);
+    _bytesToWords(b.buf, b.len, wb, nb);
+    _clmulWords(wa, na, wb, nb, r);
+    result = _wordsToBytes(r, na + nb);
+
+done:
+    PyMem_Free(wa);
+    PyMem_Free(wb);
+    PyMem_Free(r);
+    PyBuffer_Release(&a);
+    PyBuffer_Release(&b);
+    return result;
+}
+
+//-----------------------------------------------------------------------------
+// Multiply modulo a polynomial.
+// Inputs:
+//   a, b - strings containing the polynomials
+//   p - string containing the modulus
+// Returns:
+//   string containing a*b mod p
+
+static PyObject*
+_gf2mulmod(PyObject* self, PyObject* args)
+{
+    Py_buffer a, b, p;
+    gf2Modulus m = {NULL, 0, 0, 0, NULL};
+    UINT64 *wa = NULL, *wb = NULL;
+    PyObject *result = NULL;
+
+    if (!PyArg_ParseTuple(args, "y*y*y*", &a, &b, &p))
+    {
+        return NULL;
+    }
+
+    if (_initModulus(&m, p.buf, p.len) < 0)
+    {
+        goto done;
+    }
+    wa = PyMem_New(UINT64, m.nw);
+    wb = PyMem_New(UINT64, m.nw);
+    if (wa == NULL || wb == NULL)
+    {
+        PyErr_NoMemory();
+        goto done;
+    }
+    if (_reduceBytes(&m, a.buf, a.len, wa) < 0 || _reduceBytes(&m, b.buf, b.len, wb) < 0)
+    {
+        goto done;
+    }
+    _mulmodWords(&m, wa, wb, wa);
+    result = _wordsToBytes(wa, m.nw);
+
+done:
+    PyMem_Free(wa);
+    PyMem_Free(wb);
+    PyMem_Free(m.p);
+    PyMem_Free(m.t);
+    PyBuffer_Release(&a);
+    PyBuffer_Release(&b);
+    PyBuffer_Release(&p);
+    return result;
+}
+
+//-----------------------------------------------------------------------------
+// Raise to a power modulo a polynomial.
+// Inputs:
+//   a - string containing the polynomial
+//   e - string containing the exponent, an unsigned integer
+//   p - string containing the modulus
+// Returns:
+//   string containing a^e mod p
+
+static PyObject*
+_gf2powmod(PyObject* self, PyObject* args)
+{
+    Py_buffer a, e, p;
+    gf2Modulus m = {NULL, 0, 0, 0, NULL};
+    UINT64 *wa = NULL, *r = NULL;
+    Py_ssize_t bit;
+    int started = 0;
+    PyObject *result = NULL;
+
+    if (!PyArg_ParseTuple(args, "y*y*y*", &a, &e, &p))
+    {
+        return NULL;
+    }
+
+    if (_initModulus(&m, p.buf, p.len) < 0)
+    {
+        goto done;
+    }
+    wa = PyMem_New(UINT64, m.nw);
+    r = PyMem_New(UINT64, m.nw);
+    if (wa == NULL || r == NULL)
+    {
+        PyErr_NoMemory();
+        goto done;
+    }
+    if (_reduceBytes(&m, a.buf, a.len, wa) < 0)
+    {
+        goto done;
+    }
+
+    // Start from 1 reduced modulo p.
+    memset(r, 0, m.nw*sizeof(UINT64));
+    r[0] = m.n ? 1 : 0;
+
+    for (bit = 8*e.len - 1; bit >= 0; bit--)
+    {
+        if (started)
+        {
+            _mulmodWords(&m, r, r, r);
+        }
+        if ((((const UINT8*)e.buf)[bit/8] >> (bit%8)) & 1)
+        {
+            _mulmodWords(&m, r, wa, r);
+            started = 1;
+        }
+    }
+    result = _wordsToBytes(r, m.nw);
+
+done:
+    PyMem_Free(wa);
+    PyMem_Free(r);
+    PyMem_Free(m.p);
+    PyMem_Free(m.t);
+    PyBuffer_Release(&a);
+    PyBuffer_Release(&e);
+    PyBuffer_Release(&p);
+    return result;
 }
 
 //-----------------------------------------------------------------------------
@@ -581,17 +1957,55 @@ static PyMethodDef methodTable[] = {
 {"_crc32r", _crc32r, METH_VARARGS},
 {"_crc64", _crc64, METH_VARARGS},
 {"_crc64r", _crc64r, METH_VARARGS},
+{"_crc128", _crc128, METH_VARARGS},
+{"_crc128r", _crc128r, METH_VARARGS},
+{"_crcmulti", _crcmulti, METH_VARARGS},
+{"_weightScan", _weightScan, METH_VARARGS},
+{"_gf2clmul", _gf2clmul, METH_VARARGS},
+{"_gf2mulmod", _gf2mulmod, METH_VARARGS},
+{"_gf2powmod", _gf2powmod, METH_VARARGS},
 {NULL, NULL}
 };
 
 //-----------------------------------------------------------------------------
+// The module is initialized in several phases so that it can be loaded in
+// subinterpreters with their own GIL and on the free-threaded build.  It keeps
+// no state of its own: the functions only work on their arguments, and the
+// tables are read-only strings held by the callers.
+
+static int
+_execModule(PyObject *module)
+{
+#ifdef HAVE_PCLMUL
+    // Every interpreter selects the same function, so storing it again when
+    // the module is loaded in another one does not change anything.
+    __builtin_cpu_init();
+    if (__builtin_cpu_supports("pclmul"))
+    {
+        _clmul64 = _clmul64Pclmul;
+    }
+#endif
+    return 0;
+}
+
+static PyModuleDef_Slot moduleSlots[] = {
+    {Py_mod_exec, _execModule},
+#ifdef Py_mod_multiple_interpreters
+    {Py_mod_multiple_interpreters, Py_MOD_PER_INTERPRETER_GIL_SUPPORTED},
+#endif
+#ifdef Py_mod_gil
+    {Py_mod_gil, Py_MOD_GIL_NOT_USED},
+#endif
+    {0, NULL}
+};
+
 static struct PyModuleDef moduleDef = {
    PyModuleDef_HEAD_INIT,
    "_crcfunext",  // name of module
    NULL,          // module documentation, may be NULL
-   -1,            // size of per-interpreter state of the module,
-                  // or -1 if the module keeps state in global variables.
-   methodTable
+   0,             // size of per-interpreter state of the module
+   methodTable,
+   moduleSlots
 };
 
 //-----------------------------------------------------------------------------
@@ -604,6 +2018,5 @@ PyInit__crcfunext(void)
         Py_FatalError("crcfunext: One of the data types is invalid");
     }
 
-    return PyModule_Create(&moduleDef);
+    return PyModuleDef_Init(&moduleDef);
 }
-
@@ -45,5 +45,14 @@ Crc(g24, initCrc=0, rev=True, xorOut=~0).generateCode('crc24x',out)
 Crc(g32, initCrc=0, rev=True, xorOut=~0).generateCode('crc32x',out)
 Crc(g64, initCrc=0, rev=True, xorOut=~0).generateCode('crc64x',out)
 
+# Check out the slicing-by-N and streaming variants.
+Crc(g32, initCrc=0, rev=True, xorOut=~0).generateCode('crc32s8',out,table='slice8')
+Crc(g32, initCrc=0, rev=False, xorOut=~0).generateCode('crc32s4',out,table='slice4',unroll=2)
+Crc(g64, initCrc=0, rev=True, xorOut=~0).generateCode('crc64s',out,table='slice8',streaming=True)
+
+# Check out the variants for targets with little memory.
+Crc(g16, rev=False).generateCode('crc16n',out,table='nibble')
+Crc(g16, rev=True).generateCode('crc16b',out,table='bitwise')
+
 out.close()
 print('Done')